@@ -0,0 +1,178 @@
+from functools import lru_cache
+import numpy as np
+import librosa
+import scipy.fft
+import scipy.signal
+
+
+@lru_cache(maxsize=None)
+def fft_window(n_fft):
+    """Periodic Hann window, as used by librosa.stft."""
+    return scipy.signal.get_window('hann', n_fft, fftbins=True)
+
+
+@lru_cache(maxsize=None)
+def mel_basis(sr, n_fft, n_mels):
+    """Slaney mel filterbank, as used by librosa.feature.melspectrogram."""
+    return np.ascontiguousarray(librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels).T)
+
+
+@lru_cache(maxsize=None)
+def dct_matrix(n_mels, n_mfcc):
+    """Orthonormal DCT-II matrix mapping log-mel frames to MFCCs."""
+    return np.ascontiguousarray(scipy.fft.dct(np.eye(n_mels), type=2, norm='ortho', axis=0)[:n_mfcc].T)
+
+
+@lru_cache(maxsize=None)
+def delta_coeffs(width, order):
+    """Savitzky-Golay filter used by librosa.feature.delta away from the edges."""
+    return scipy.signal.savgol_coeffs(width, order, deriv=order, use='dot')
+
+
+def frame_energy_db(power):
+    """Energy of each (n_frames, n_bins) power frame in dB."""
+    return 10.0 * np.log10(np.maximum(power.sum(axis=1), 1e-10))
+
+
+class AudioFrontEnd:
+    """Shared STFT / mel front-end for feature extraction.
+
+    The power spectrogram and log-mel frames are computed once and every
+    consumer works on those arrays: denoising gates the power spectra,
+    normalization is the equivalent dB offset of the denoised peak, the energy VAD reads
+    per-frame energies and MFCC/delta extraction applies the cached DCT and
+    Savitzky-Golay filters. Results match ``librosa.feature.mfcc`` /
+    ``librosa.feature.delta`` with ``center=True``. Window, mel basis and DCT
+    matrices are cached per configuration.
+    """
+
+    def __init__(self, sr, n_fft=2048, hop_length=512, n_mfcc=22, use_dmfcc=False,
+                 use_ddmfcc=False, n_mels=128, top_db=80.0, delta_width=9):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mfcc = n_mfcc
+        self.use_dmfcc = use_dmfcc
+        self.use_ddmfcc = use_ddmfcc
+        self.n_mels = n_mels
+        self.top_db = top_db
+        self.delta_width = delta_width
+
+        self.window = fft_window(n_fft)
+        self.mel_basis = mel_basis(sr, n_fft, n_mels)
+        self.dct_matrix = dct_matrix(n_mels, n_mfcc)
+
+    @property
+    def n_bins(self):
+        return self.n_fft // 2 + 1
+
+    @property
+    def delta_orders(self):
+        return [order for order, used in ((1, self.use_dmfcc), (2, self.use_ddmfcc)) if used]
+
+    @property
+    def n_features(self):
+        return self.n_mfcc * (1 + len(self.delta_orders))
+
+    def frames(self, y):
+        """Strided (n_frames, n_fft) view of every complete frame in ``y``."""
+        if len(y) < self.n_fft:
+            return np.zeros((0, self.n_fft))
+        return np.lib.stride_tricks.sliding_window_view(y, self.n_fft)[::self.hop_length]
+
+    def power_frames(self, frames):
+        """Power spectra of a block of frames."""
+        return np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2
+
+    def centered_frames(self, y):
+        """Frames of ``y`` zero-padded by half a window on each side, as with ``center=True``."""
+        pad = self.n_fft // 2
+        return self.frames(np.pad(np.asarray(y, dtype=np.float64), (pad, pad)))
+
+    def power_spectrogram(self, y):
+        """Centered power spectrogram, shape (n_frames, n_bins)."""
+        return self.power_frames(self.centered_frames(y))
+
+    def mel_db(self, power):
+        """Log-mel energies in dB (ref=1.0, amin=1e-10), not yet clamped."""
+        return 10.0 * np.log10(np.maximum(power @ self.mel_basis, 1e-10))
+
+    def clamp(self, mel_db, peak_db=None):
+        """Apply the ``top_db`` floor relative to ``peak_db`` (default: the block maximum)."""
+        if self.top_db is None or len(mel_db) == 0:
+            return mel_db
+        peak_db = mel_db.max() if peak_db is None else peak_db
+        return np.maximum(mel_db, peak_db - self.top_db)
+
+    def mfcc(self, mel_db):
+        return mel_db @ self.dct_matrix
+
+    def normalization_offset(self, peak):
+        """MFCC offset equivalent to ``librosa.util.normalize`` for a waveform peak."""
+        offset = np.zeros(self.n_mfcc)
+        if peak > 0:
+            # A waveform gain is a constant dB shift of every mel band, i.e. only c0 moves
+            offset[0] = -20.0 * np.log10(peak) * np.sqrt(self.n_mels)
+        return offset
+
+    def deltas(self, mfcc):
+        """Delta / delta-delta frames for the configured orders (librosa interp edges)."""
+        return [librosa.feature.delta(mfcc.T, width=self.delta_width, order=order).T
+                for order in self.delta_orders]
+
+    def frame_peaks(self, frames):
+        """Peak |sample| of the hop each frame is centred on."""
+        centre = self.n_fft // 2
+        return np.abs(frames[:, centre:centre + self.hop_length]).max(axis=1)
+
+    @staticmethod
+    def gated_peaks(peaks, power, gated):
+        """Frame peaks after denoising: each scaled by its frame's amplitude gain."""
+        return peaks * np.sqrt(gated.sum(axis=1) / np.maximum(power.sum(axis=1), 1e-20))
+
+    def features(self, y, normalize=False, denoiser=None):
+        """Stacked MFCC (+ delta) frames of a whole signal, shape (n_frames, n_features).
+
+        Normalization uses the peak of the denoised signal, as when the
+        waveform is denoised before ``librosa.util.normalize``.
+        """
+        frames = self.centered_frames(y)
+        power = self.power_frames(frames)
+        peaks = self.frame_peaks(frames)
+        if denoiser is not None:
+            gated = denoiser.process(power)
+            peaks = self.gated_peaks(peaks, power, gated)
+            power = gated
+        mfcc = self.mfcc(self.clamp(self.mel_db(power)))
+        if normalize:
+            mfcc = mfcc + self.normalization_offset(peaks.max() if len(peaks) else 0.0)
+        if self.delta_orders and len(mfcc) < self.delta_width:
+            raise ValueError(f"Need at least {self.delta_width} frames for deltas, got {len(mfcc)}")
+        return np.hstack([mfcc] + self.deltas(mfcc))
+
+
+def extract_file_features(audio_path, n_mfcc=22, use_dmfcc=False, use_ddmfcc=False,
+                          n_fft=2048, hop_length=512):
+    """Load an audio file at its native rate and return its (n_frames, n_features) matrix."""
+    y, sr = librosa.load(audio_path, sr=None)
+    frontend = AudioFrontEnd(sr, n_fft=n_fft, hop_length=hop_length, n_mfcc=n_mfcc,
+                             use_dmfcc=use_dmfcc, use_ddmfcc=use_ddmfcc)
+    return frontend.features(y)
+
+
+def stft_config(config, sr):
+    """(n_fft, hop_length) of a recorded feature config, for audio at ``sr``.
+
+    Sizes recorded for a fixed sample rate are scaled to ``sr``. Enrollment
+    at each file's native rate records ``'native'``; those sizes are used as
+    they are, which assumes the recordings were made at ``sr``. A config
+    without them gets the ``extract_file_features`` defaults.
+    """
+    n_fft, hop_length = config.get('n_fft', 2048), config.get('hop_length', 512)
+    rate = config.get('sr', 'native')
+    if rate != 'native':
+        n_fft = int(round(n_fft * sr / float(rate)))
+        hop_length = max(1, int(round(hop_length * sr / float(rate))))
+    if hop_length > n_fft:
+        raise ValueError(f"Invalid STFT settings: hop length {hop_length} exceeds window {n_fft}")
+    return n_fft, hop_length
@@ -0,0 +1,364 @@
+import os
+import warnings
+from pydub import AudioSegment
+import noisereduce as nr
+from noisereduce.spectralgate.stationary import SpectralGateStationary
+import scipy.io.wavfile as wav
+import soundfile as sf
+import numpy as np
+from scipy.signal import stft
+from silence import remove_silence_array
+
+
+# Per-file operations of the preprocessing toolkit. Each takes the file, the
+# source root it was found under and the destination root (outputs mirror the
+# source tree) and returns the paths it wrote. No tkinter here, so they can
+# run in worker processes.
+
+SOURCE_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.flac')
+
+
+def list_files(source_root, extensions, exclude=False):
+    """Files under ``source_root`` with (or, with ``exclude``, without) one of the extensions."""
+    files = []
+    for root_dir, _, filenames in os.walk(source_root):
+        files.extend(os.path.join(root_dir, f) for f in filenames
+                     if f.lower().endswith(extensions) != exclude)
+    return sorted(files)
+
+
+def _destination(file_path, source_root, dest_root, extension=None):
+    rel_path = os.path.relpath(file_path, source_root)
+    if extension is not None:
+        rel_path = os.path.splitext(rel_path)[0] + "." + extension
+    output_path = os.path.join(dest_root, rel_path)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    return output_path
+
+
+def convert_file(file_path, source_root, dest_root, output_format="wav"):
+    """Convert one file to ``output_format``."""
+    audio = AudioSegment.from_file(file_path)
+    output_path = _destination(file_path, source_root, dest_root, output_format)
+    audio.export(output_path, format=output_format)
+    return [output_path]
+
+
+def remove_silence_file(file_path, source_root, dest_root, silence_thresh=-50, min_silence_len=1000):
+    """Keep only the non-silent parts of one file; files that are all silence are skipped."""
+    audio = AudioSegment.from_file(file_path)
+    samples = np.array(audio.get_array_of_samples()).reshape(-1, audio.channels)
+    kept = remove_silence_array(samples, audio.frame_rate, silence_thresh, min_silence_len,
+                                sample_width=audio.sample_width)
+    if not len(kept):
+        print(f"File {file_path} contains only silence and was skipped.")
+        return []
+    processed_audio = audio._spawn(kept.tobytes())
+    output_path = _destination(file_path, source_root, dest_root)
+    processed_audio.export(output_path, format="wav")
+    return [output_path]
+
+
+# Containers read with frame-accurate seeking instead of a full pydub decode
+SEEKABLE_FORMATS = ('WAV', 'FLAC')
+
+_READ_DTYPES = {'PCM_S8': 'int16', 'PCM_U8': 'int16', 'PCM_16': 'int16', 'PCM_24': 'int32',
+                'PCM_32': 'int32', 'FLOAT': 'float32', 'DOUBLE': 'float64'}
+
+
+def _seekable_info(file_path):
+    """soundfile info of a WAV/FLAC file, None for anything pydub has to decode."""
+    try:
+        info = sf.info(file_path)
+    except Exception:
+        return None
+    return info if info.format in SEEKABLE_FORMATS else None
+
+
+def _wav_subtype(subtype):
+    return subtype if sf.check_format('WAV', subtype) else 'PCM_16'
+
+
+def _read_frames(source, start, stop):
+    """Frames [start, stop) from a memory-mapped array or an open SoundFile.
+
+    Frames past the end are zero-padded, as pydub does for slices that end
+    a fraction of a millisecond after the last frame.
+    """
+    if isinstance(source, np.ndarray):
+        block = source[start:stop]
+    else:
+        source.seek(min(start, source.frames))
+        block = source.read(max(stop - start, 0), dtype=_READ_DTYPES.get(source.subtype, 'float64'),
+                            always_2d=True)
+    if len(block) < stop - start:
+        padding = np.zeros((stop - start - len(block),) + block.shape[1:], dtype=block.dtype)
+        block = np.concatenate([block, padding])
+    return block
+
+
+def _memory_map_wav(file_path):
+    """Memory-mapped sample data of a PCM/float WAV file, or None (e.g. 24-bit, which needs decoding)."""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', wav.WavFileWarning)
+            _, data = wav.read(file_path, mmap=True)
+    except Exception:
+        return None
+    return data
+
+
+def segment_file(file_path, source_root, dest_root, utterance_length=3):
+    """Cut one file into ``utterance_length``-second WAV segments in a folder of its own.
+
+    WAV and FLAC files are never decoded as a whole: each segment is sliced
+    from a memory map of the WAV data or read after a seek, so memory stays
+    at one segment however long the recording is.
+    """
+    rel_path = os.path.relpath(file_path, source_root)
+    file_name = os.path.splitext(rel_path)[0]
+    output_folder = os.path.join(dest_root, file_name)
+
+    info = _seekable_info(file_path)
+    if info is None:
+        return _segment_with_pydub(file_path, output_folder, file_name, utterance_length)
+
+    os.makedirs(output_folder, exist_ok=True)
+    sr = info.samplerate
+    total_ms = round(1000 * info.frames / sr)
+    mapped = _memory_map_wav(file_path) if info.format == 'WAV' else None
+
+    outputs = []
+    with sf.SoundFile(file_path) as source:
+        for j in range(0, int(total_ms / 1000), utterance_length):
+            start = int(j * 1000 * (sr / 1000.0))
+            stop = int(min((j + utterance_length) * 1000, total_ms) * (sr / 1000.0))
+            output_path = os.path.join(output_folder,
+                                       f"{os.path.basename(file_name)}_{j // utterance_length + 1}.wav")
+            if mapped is not None:
+                # Same sample format as the source, written straight from the mapped view
+                wav.write(output_path, sr, _read_frames(mapped, start, stop))
+            else:
+                sf.write(output_path, _read_frames(source, start, stop), sr,
+                         subtype=_wav_subtype(info.subtype))
+            outputs.append(output_path)
+    return outputs
+
+
+def _segment_with_pydub(file_path, output_folder, file_name, utterance_length):
+    audio = AudioSegment.from_file(file_path)
+    total_duration = len(audio) / 1000
+    os.makedirs(output_folder, exist_ok=True)
+
+    outputs = []
+    for j in range(0, int(total_duration), utterance_length):
+        segment = audio[j * 1000: (j + utterance_length) * 1000]
+        output_path = os.path.join(output_folder,
+                                   f"{os.path.basename(file_name)}_{j // utterance_length + 1}.wav")
+        segment.export(output_path, format="wav")
+        outputs.append(output_path)
+    return outputs
+
+
+def trim_file(file_path, source_root, dest_root, utterance_length=3.0):
+    """Keep the first ``utterance_length`` seconds of one file, in its original format.
+
+    WAV and FLAC files only have the kept frames read; other formats are decoded with pydub.
+    """
+    output_path = _destination(file_path, source_root, dest_root)
+    info = _seekable_info(file_path)
+    if info is None:
+        audio = AudioSegment.from_file(file_path)
+        trimmed_audio = audio[:utterance_length * 1000]
+        trimmed_audio.export(output_path, format=os.path.splitext(output_path)[1][1:])
+        return [output_path]
+
+    sr = info.samplerate
+    total_ms = round(1000 * info.frames / sr)
+    stop = int(min(utterance_length * 1000, total_ms) * (sr / 1000.0))
+    with sf.SoundFile(file_path) as source:
+        trimmed = _read_frames(source, 0, stop)
+    sf.write(output_path, trimmed, sr, format=info.format, subtype=info.subtype)
+    return [output_path]
+
+
+# Streaming noise reduction: blocks are processed with this much audio of
+# context on each side, which is discarded afterwards. It spans five time
+# constants of the non-stationary noise estimate (2 s), so blocks join
+# without audible seams.
+NOISE_CONTEXT_SECONDS = 10
+
+# noisereduce's default STFT and stationary threshold (mean + 1.5 std of the dB
+# spectrum per frequency, floored 80 dB below each frequency's peak)
+NOISE_N_FFT = 1024
+NOISE_HOP = 256
+NOISE_STD_THRESH = 1.5
+NOISE_TOP_DB = 80.0
+
+# STFT frames analysed at once while streaming the noise statistics
+NOISE_STATS_FRAMES = 4096
+
+
+def _read_mono(source, start, stop):
+    """Frames [start, stop) of an open SoundFile as float32 mono."""
+    source.seek(start)
+    return source.read(stop - start, dtype='float32', always_2d=True).mean(axis=1)
+
+
+def _stft_db(source, first, last):
+    """dB magnitudes of STFT frames [first, last) of a whole file, on noisereduce's zero-padded frame grid."""
+    half = NOISE_N_FFT // 2
+    start, stop = first * NOISE_HOP - half, (last - 1) * NOISE_HOP + half
+    y = np.zeros(stop - start, dtype=np.float32)
+    lo, hi = max(start, 0), min(stop, source.frames)
+    y[lo - start:hi - start] = _read_mono(source, lo, hi)
+    _, _, spectrum = stft(y, nfft=NOISE_N_FFT, noverlap=NOISE_N_FFT - NOISE_HOP, nperseg=NOISE_N_FFT,
+                          boundary=None, padded=False)
+    return 20 * np.log10(np.abs(spectrum) + np.finfo(np.float64).eps)
+
+
+def stationary_noise_threshold(source):
+    """noisereduce's stationary gating threshold over a whole file, from streamed statistics.
+
+    Two passes over the STFT frames: the per-frequency peak (for the 80 dB
+    floor), then the sums and squared sums of the floored dB values. Only
+    ``NOISE_STATS_FRAMES`` frames are in memory at a time.
+    """
+    n_frames = 1 + source.frames // NOISE_HOP
+    batches = [(first, min(first + NOISE_STATS_FRAMES, n_frames))
+               for first in range(0, n_frames, NOISE_STATS_FRAMES)]
+    peak = None
+    for first, last in batches:
+        batch_peak = _stft_db(source, first, last).max(axis=1)
+        peak = batch_peak if peak is None else np.maximum(peak, batch_peak)
+    total = squares = 0.0
+    for first, last in batches:
+        db = np.maximum(_stft_db(source, first, last), (peak - NOISE_TOP_DB)[:, np.newaxis]).astype(np.float64)
+        total = total + db.sum(axis=1)
+        squares = squares + (db * db).sum(axis=1)
+    mean = total / n_frames
+    std = np.sqrt(np.maximum(squares / n_frames - mean ** 2, 0))
+    return mean + NOISE_STD_THRESH * std
+
+
+def _reduce_noise_stationary(y, sr, noise_thresh):
+    """``nr.reduce_noise(stationary=True, chunk_size=None)`` with a precomputed noise threshold.
+
+    noisereduce only takes the noise as a signal, so the gate is built on a
+    dummy noise clip and its threshold replaced (noisereduce 3.0 internals).
+    """
+    gate = SpectralGateStationary(
+        y=y, sr=sr, y_noise=y[:NOISE_N_FFT], n_std_thresh_stationary=NOISE_STD_THRESH, chunk_size=None,
+        clip_noise_stationary=True, padding=30000, n_fft=NOISE_N_FFT, win_length=None, hop_length=None,
+        time_constant_s=2.0, freq_mask_smooth_hz=500, time_mask_smooth_ms=50, tmp_folder=None,
+        prop_decrease=1.0, use_tqdm=False, n_jobs=1)
+    gate.noise_thresh = noise_thresh
+    return gate.get_traces()
+
+
+def reduce_noise_stream(file_path, output_path, block_seconds=60, stationary=False):
+    """Noise reduction in fixed-size blocks, written to a 16-bit mono WAV as they finish.
+
+    Only one block and its context are in memory at a time, whatever the
+    length of the recording. With ``stationary`` every block is gated
+    against the threshold of the whole file, computed from streamed
+    statistics, so the output matches a single unchunked pass. Without it
+    each block's noise estimate only sees its own context, so the output is
+    close to, but not identical with, a single pass (within a few tens of
+    LSB on 16-bit output).
+    """
+    with sf.SoundFile(file_path) as source:
+        sr = source.samplerate
+        # Whole numbers of STFT hops, so every block is analysed on the same frame grid
+        block = max(1, round(block_seconds * sr / NOISE_HOP)) * NOISE_HOP
+        context = round(NOISE_CONTEXT_SECONDS * sr / NOISE_HOP) * NOISE_HOP
+        noise_thresh = stationary_noise_threshold(source) if stationary else None
+        with sf.SoundFile(output_path, 'w', sr, 1, format='WAV', subtype='PCM_16') as output:
+            for start in range(0, source.frames, block):
+                stop = min(start + block, source.frames)
+                first, last = max(start - context, 0), min(stop + context, source.frames)
+                y = _read_mono(source, first, last)
+                if stationary:
+                    reduced = _reduce_noise_stationary(y, sr, noise_thresh)
+                else:
+                    # The block is already bounded, so noisereduce should not split it again
+                    reduced = nr.reduce_noise(y=y, sr=sr, chunk_size=None)
+                output.write(reduced[start - first:stop - first])
+
+
+def reduce_noise_file(file_path, source_root, dest_root, block_seconds=None, stationary=False):
+    """Spectral-gating noise reduction of one WAV file, streamed in blocks with ``block_seconds``."""
+    output_path = _destination(file_path, source_root, dest_root)
+    if block_seconds:
+        reduce_noise_stream(file_path, output_path, block_seconds, stationary)
+        return [output_path]
+
+    rate, data = wav.read(file_path)
+    if len(data.shape) > 1:
+        data = data.mean(axis=1).astype(np.int16)
+
+    reduced_noise = nr.reduce_noise(y=data.astype(float), sr=rate, stationary=stationary)
+
+    wav.write(output_path, rate, reduced_noise.astype(np.int16))
+    return [output_path]
+
+
+def normalize_file(file_path, source_root, dest_root):
+    """Peak-normalize one file to WAV."""
+    audio = AudioSegment.from_file(file_path)
+    normalized_audio = audio.normalize()
+    output_path = _destination(file_path, source_root, dest_root)
+    normalized_audio.export(output_path, format="wav")
+    return [output_path]
+
+
+# In-memory stages of the same operations, for chaining several of them on one
+# decoded file (see pipeline.py). Audio is float32 in [-1, 1], shaped (samples,)
+# or (samples, channels); positions follow pydub's millisecond slicing.
+
+def load_audio(file_path):
+    """Decode a file to (float32 samples, sample rate), with pydub for formats soundfile cannot read."""
+    try:
+        y, sr = sf.read(file_path, dtype='float32')
+        return y, sr
+    except Exception:
+        audio = AudioSegment.from_file(file_path)
+    y = np.array(audio.get_array_of_samples(), dtype=np.float32) / (1 << (8 * audio.sample_width - 1))
+    if audio.channels > 1:
+        y = y.reshape(-1, audio.channels)
+    return y, audio.frame_rate
+
+
+def _duration_ms(y, sr):
+    return round(1000 * len(y) / sr)
+
+
+def _frame(ms, sr):
+    return int(ms * (sr / 1000.0))
+
+
+def remove_silence(y, sr, silence_thresh=-50, min_silence_len=1000):
+    """Concatenated non-silent parts of a signal, measured on the 16-bit scale; empty if all silence."""
+    return remove_silence_array(y, sr, silence_thresh, min_silence_len, sample_width=2)
+
+
+def reduce_noise_array(y, sr):
+    """Spectral-gating noise reduction; multichannel input is mixed down to mono first."""
+    if y.ndim > 1:
+        y = y.mean(axis=1)
+    return nr.reduce_noise(y=y, sr=sr).astype(np.float32)
+
+
+def normalize(y, sr, headroom=0.1):
+    """Scale the peak to ``headroom`` dB below full scale, like ``AudioSegment.normalize``."""
+    peak = np.max(np.abs(y)) if len(y) else 0
+    if peak == 0:
+        return y
+    return y * np.float32(10 ** (-headroom / 20) / peak)
+
+
+def segment(y, sr, utterance_length=3):
+    """Consecutive ``utterance_length``-second pieces, the last one possibly shorter."""
+    total_ms = _duration_ms(y, sr)
+    return [y[_frame(j * 1000, sr):_frame(min((j + utterance_length) * 1000, total_ms), sr)]
+            for j in range(0, int(total_ms / 1000), utterance_length)]
@@ -1,12 +1,67 @@
 import os
+import queue
 import tkinter as tk
 from tkinter import font as tkfont
 from tkinter import Tk, Label, Button, filedialog, messagebox, ttk, StringVar, Entry
-from pydub import AudioSegment
-from pydub.silence import detect_nonsilent
-import noisereduce as nr
-import scipy.io.wavfile as wav
-import numpy as np
+from audio_operations import (SOURCE_EXTENSIONS, list_files, convert_file, remove_silence_file,
+                              segment_file, trim_file, reduce_noise_file, normalize_file)
+from batch_jobs import BatchJob, default_workers
+from manifest import Manifest
+from pipeline import DEFAULT_ORDER, build_chain, process_file
+
+
+active_job = None
+
+
+def start_batch(function, files, args, bar, success_message):
+    """Run a per-file operation over a process pool while the window stays responsive."""
+    global active_job
+    if active_job is not None and active_job.running():
+        messagebox.showwarning("Warning", "Processing is already in progress")
+        return
+
+    bar["maximum"] = 100
+    bar["value"] = 0
+    # Every operation takes (source_root, dest_root, ...); the manifest lives in the destination
+    manifest = Manifest.for_directory(args[1]) if skip_current_var.get() else None
+    active_job = BatchJob(function, files, args, workers=max(1, workers_var.get()), manifest=manifest)
+    active_job.start()
+    poll_batch(active_job, bar, success_message)
+
+
+def poll_batch(job, bar, success_message):
+    """Move a batch's progress onto its progress bar, and report the outcome when done."""
+    try:
+        while True:
+            msg_type, value, total = job.queue.get_nowait()
+
+            if msg_type == 'progress':
+                bar["value"] = value / total * 100
+            elif msg_type == 'complete':
+                if value['errors']:
+                    details = "\n".join(f"{os.path.basename(f)}: {e}" for f, e in value['errors'][:10])
+                    messagebox.showwarning(
+                        "Completed with errors",
+                        f"{len(value['errors'])} of {value['total']} files failed:\n{details}")
+                elif not value['cancelled']:
+                    if value['skipped']:
+                        success_message += f" ({len(value['skipped'])} up-to-date files skipped)"
+                    messagebox.showinfo("Success", success_message)
+                return
+            elif msg_type == 'error':
+                print("Error", f"An error occurred: {value}")
+                messagebox.showerror("Error", f"An error occurred: {value}")
+                return
+    except queue.Empty:
+        pass
+
+    root.after(100, poll_batch, job, bar, success_message)
+
+
+def close_window():
+    if active_job is not None:
+        active_job.cancel()
+    root.destroy()
 
 
 def select_directory():
@@ -39,34 +94,13 @@ def convert_to_format():
     if not output_format:
         output_format = "wav" 
 
-    try:
-        progress_bar["value"] = 0 
-        files = []
-        for root_dir, _, filenames in os.walk(source_path): 
-            files.extend(os.path.join(root_dir, f) for f in filenames if not f.lower().endswith(('.mp3', '.wav', '.ogg', '.flac')))
-        total_files = len(files)
-
-        if total_files == 0:
-            messagebox.showerror("Error", "No audio files to convert.")
-            return
-
-       
-        for i, file_path in enumerate(files):
-            audio = AudioSegment.from_file(file_path)
-            rel_path = os.path.relpath(file_path, source_path)
-            output_path = os.path.join(destination_path, os.path.splitext(rel_path)[0] + "." + output_format)
-            os.makedirs(os.path.dirname(output_path), exist_ok=True) 
-            audio.export(output_path, format=output_format)
-
-           
-            progress = (i + 1) / total_files * 100
-            progress_bar["value"] = progress
-            root.update_idletasks() 
+    files = list_files(source_path, SOURCE_EXTENSIONS, exclude=True)
+    if not files:
+        messagebox.showerror("Error", "No audio files to convert.")
+        return
 
-        messagebox.showinfo("Success", "Folder conversion completed!")
-    except Exception as e:
-        print("Error", f"An error occurred: {e}")
-        messagebox.showerror("Error", f"An error occurred: {e}")
+    start_batch(convert_file, files, (source_path, destination_path, output_format),
+                progress_bar, "Folder conversion completed!")
 
 
 def select_directory_silence():
@@ -93,51 +127,20 @@ def remove_silence_from_files():
         messagebox.showerror("Error", "Please select a destination folder.")
         return
 
+    silence_threshold = silence_thresh_var.get()
     try:
-        silence_threshold = silence_thresh_var.get()
-        if not silence_threshold.strip():
-            messagebox.showerror("Error", "Please enter a valid silence threshold (e.g., -50).")
-            return
-
         silence_threshold = int(silence_threshold)
+    except ValueError:
+        messagebox.showerror("Error", "Please enter a valid silence threshold (e.g., -50).")
+        return
 
-        progress_bar_silence["value"] = 0 
-        files = []
-        for root_dir, _, filenames in os.walk(source_path_silence): 
-            files.extend(os.path.join(root_dir, f) for f in filenames if f.lower().endswith((".wav", ".mp3", ".flac")))
-        total_files = len(files)
-
-        if total_files == 0:
-            messagebox.showerror("Error", "No audio files to process.")
-            return
+    files = list_files(source_path_silence, (".wav", ".mp3", ".flac"))
+    if not files:
+        messagebox.showerror("Error", "No audio files to process.")
+        return
 
-       
-        for i, file_path in enumerate(files):
-            audio = AudioSegment.from_file(file_path)
-
-           
-            nonsilent_ranges = detect_nonsilent(audio, min_silence_len=1000, silence_thresh=silence_threshold)
-            if nonsilent_ranges:
-               
-                processed_audio = sum(audio[start:end] for start, end in nonsilent_ranges)
-
-               
-                rel_path = os.path.relpath(file_path, source_path_silence)
-                output_path = os.path.join(destination_path_silence, rel_path)
-                os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                processed_audio.export(output_path, format="wav")
-            else:
-                print(f"File {file_path} contains only silence and was skipped.")
-
-           
-            progress = (i + 1) / total_files * 100
-            progress_bar_silence["value"] = progress
-            root.update_idletasks() 
-
-        messagebox.showinfo("Success", "Silence removal completed!")
-    except Exception as e:
-        print("Error", f"An error occurred: {e}")
-        messagebox.showerror("Error", f"An error occurred: {e}")
+    start_batch(remove_silence_file, files, (source_path_silence, destination_path_silence, silence_threshold),
+                progress_bar_silence, "Silence removal completed!")
 
 def select_directory_segmentation():
     global source_path_segmentation
@@ -164,46 +167,20 @@ def segment_audio_files():
         return
 
     try:
-       
         utterance_length = int(utterance_length_var.get())
-        if utterance_length <= 0:
-            messagebox.showerror("Error", "Please enter a valid utterance length.")
-            return
-
-        progress_bar_segmentation["value"] = 0 
-        files = []
-        for root_dir, _, filenames in os.walk(source_path_segmentation): 
-            files.extend(os.path.join(root_dir, f) for f in filenames if f.lower().endswith((".wav", ".mp3", ".flac")))
-        total_files = len(files)
+    except ValueError:
+        utterance_length = 0
+    if utterance_length <= 0:
+        messagebox.showerror("Error", "Please enter a valid utterance length.")
+        return
 
-        if total_files == 0:
-            messagebox.showerror("Error", "No audio files to segment.")
-            return
+    files = list_files(source_path_segmentation, (".wav", ".mp3", ".flac"))
+    if not files:
+        messagebox.showerror("Error", "No audio files to segment.")
+        return
 
-       
-        for i, file_path in enumerate(files):
-            audio = AudioSegment.from_file(file_path)
-            total_duration = len(audio) / 1000 
-
-           
-            rel_path = os.path.relpath(file_path, source_path_segmentation)
-            file_name = os.path.splitext(rel_path)[0]
-            output_folder = os.path.join(destination_path_segmentation, file_name)
-            os.makedirs(output_folder, exist_ok=True)
-           
-            for j in range(0, int(total_duration), utterance_length):
-                segment = audio[j * 1000: (j + utterance_length) * 1000] 
-                segment.export(os.path.join(output_folder, f"{file_name}_{j // utterance_length + 1}.wav"), format="wav")
-
-           
-            progress = (i + 1) / total_files * 100
-            progress_bar_segmentation["value"] = progress
-            root.update_idletasks() 
-
-        messagebox.showinfo("Success", "Segmentation completed!")
-    except Exception as e:
-        print("Error", f"An error occurred: {e}")
-        messagebox.showerror("Error", f"An error occurred: {e}")
+    start_batch(segment_file, files, (source_path_segmentation, destination_path_segmentation, utterance_length),
+                progress_bar_segmentation, "Segmentation completed!")
 
 
 def select_source_directory_trimmer():
@@ -234,32 +211,9 @@ def trim_utterances():
         messagebox.showerror("Error", "Invalid utterance length! Please enter a positive number.")
         return
 
-   
-    audio_files = []
-    for root_dir, _, files in os.walk(source_folder_trimmer):
-        audio_files.extend([os.path.join(root_dir, f) for f in files if f.lower().endswith(('.mp3', '.wav', '.ogg', '.flac'))])
-
-    progress_bar_trimmer["maximum"] = len(audio_files)
-    progress_bar_trimmer["value"] = 0
-
-    for idx, file_path in enumerate(audio_files):
-        try:
-            audio = AudioSegment.from_file(file_path)
-            trimmed_audio = audio[:utterance_length * 1000] 
-
-           
-            relative_path = os.path.relpath(file_path, source_folder_trimmer)
-            dest_path = os.path.join(destination_folder_trimmer, relative_path)
-            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-
-           
-            trimmed_audio.export(dest_path, format=os.path.splitext(dest_path)[1][1:])
-            progress_bar_trimmer["value"] += 1
-            root.update_idletasks()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to trim {file_path}: {e}")
-
-    messagebox.showinfo("Success", "Trimming completed successfully!")
+    audio_files = list_files(source_folder_trimmer, SOURCE_EXTENSIONS)
+    start_batch(trim_file, audio_files, (source_folder_trimmer, destination_folder_trimmer, utterance_length),
+                progress_bar_trimmer, "Trimming completed successfully!")
 
 
 def select_source_directory_noise_reduction():
@@ -282,42 +236,25 @@ def reduce_noise():
         messagebox.showwarning("Warning", "Please select both source and destination folders!")
         return
 
-   
-    audio_files = []
-    for root_dir, _, files in os.walk(source_folder_noise_reduction):
-        audio_files.extend([os.path.join(root_dir, f) for f in files if f.lower().endswith(('.wav'))])
-
+    audio_files = list_files(source_folder_noise_reduction, ('.wav',))
     if not audio_files:
         messagebox.showwarning("Warning", "No WAV files found in the source folder!")
         return
 
-    progress_bar_noise_reduction["maximum"] = len(audio_files)
-    progress_bar_noise_reduction["value"] = 0
-
-    for idx, file_path in enumerate(audio_files):
+    block_seconds = None
+    if stream_noise_var.get():
         try:
-            rate, data = wav.read(file_path)
-
-           
-            if len(data.shape) > 1:
-                data = data.mean(axis=1).astype(np.int16)
-
-            reduced_noise = nr.reduce_noise(y=data.astype(float), sr=rate)
-
-           
-            relative_path = os.path.relpath(file_path, source_folder_noise_reduction)
-            dest_path = os.path.join(destination_folder_noise_reduction, relative_path)
-            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-
-            wav.write(dest_path, rate, reduced_noise.astype(np.int16))
+            block_seconds = float(block_seconds_var.get())
+        except ValueError:
+            block_seconds = 0
+        if block_seconds <= 0:
+            messagebox.showerror("Error", "Please enter a valid block length.")
+            return
 
-           
-            progress_bar_noise_reduction["value"] += 1
-            root.update_idletasks()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to process {file_path}: {e}")
+    start_batch(reduce_noise_file, audio_files, (source_folder_noise_reduction, destination_folder_noise_reduction,
+                                                 block_seconds, stationary_noise_var.get()),
+                progress_bar_noise_reduction, "Noise reduction completed successfully!")
 
-    messagebox.showinfo("Success", "Noise reduction completed successfully!")
 
 def select_source_directory_audio_normalization():
     """Select source directory for Audio Normalization."""
@@ -339,41 +276,59 @@ def normalize_audio_files():
         messagebox.showwarning("Warning", "Please select both source and destination folders!")
         return
 
-   
-    audio_files = []
-    for root_dir, _, files in os.walk(source_folder_audio_normalization):
-        audio_files.extend([os.path.join(root_dir, f) for f in files if f.lower().endswith(('.wav'))])
-
+    audio_files = list_files(source_folder_audio_normalization, ('.wav',))
     if not audio_files:
         messagebox.showwarning("Warning", "No WAV files found in the source folder!")
         return
 
-    progress_bar_audio_normalization["maximum"] = len(audio_files)
-    progress_bar_audio_normalization["value"] = 0
+    start_batch(normalize_file, audio_files,
+                (source_folder_audio_normalization, destination_folder_audio_normalization),
+                progress_bar_audio_normalization, "Audio normalization completed successfully!")
 
-    for idx, file_path in enumerate(audio_files):
-        try:
-           
-            audio = AudioSegment.from_file(file_path)
 
-           
-            normalized_audio = audio.normalize()
+def select_source_directory_pipeline():
+    """Select source directory for the Pipeline."""
+    global source_folder_pipeline
+    source_folder_pipeline = filedialog.askdirectory()
+    source_label_pipeline.config(text=f"Source Folder: .../{source_folder_pipeline.split('/')[-1]}")
+
 
-           
-            relative_path = os.path.relpath(file_path, source_folder_audio_normalization)
-            dest_path = os.path.join(destination_folder_audio_normalization, relative_path)
-            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+def select_destination_directory_pipeline():
+    """Select destination directory for the Pipeline."""
+    global destination_folder_pipeline
+    destination_folder_pipeline = filedialog.askdirectory()
+    destination_label_pipeline.config(text=f"Destination: .../{destination_folder_pipeline.split('/')[-1]}")
 
-           
-            normalized_audio.export(dest_path, format="wav")
 
-           
-            progress_bar_audio_normalization["value"] += 1
-            root.update_idletasks()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to process {file_path}: {e}")
+def run_pipeline():
+    """Decode every file once and run the selected operations in memory."""
+    if not source_folder_pipeline or not destination_folder_pipeline:
+        messagebox.showwarning("Warning", "Please select both source and destination folders!")
+        return
 
-    messagebox.showinfo("Success", "Audio normalization completed successfully!")
+    try:
+        silence_threshold = int(silence_thresh_var_pipeline.get())
+        utterance_length = int(utterance_length_var_pipeline.get())
+        if utterance_length <= 0:
+            raise ValueError
+    except ValueError:
+        messagebox.showerror("Error", "Please enter a valid silence threshold and utterance length.")
+        return
+
+    stages = [name for name in DEFAULT_ORDER if pipeline_stage_vars[name].get()]
+    if not stages:
+        messagebox.showwarning("Warning", "Please select at least one operation!")
+        return
+    chain = build_chain(stages, {'silence': {'silence_thresh': silence_threshold},
+                                 'segment': {'utterance_length': utterance_length}})
+
+    audio_files = list_files(source_folder_pipeline, SOURCE_EXTENSIONS)
+    if not audio_files:
+        messagebox.showwarning("Warning", "No audio files found in the source folder!")
+        return
+
+    start_batch(process_file, audio_files, (source_folder_pipeline, destination_folder_pipeline, chain),
+                progress_bar_pipeline, "Pipeline completed successfully!")
 
 class ModernTheme:
    
@@ -432,16 +387,6 @@ def create_modern_label(parent, text, is_header=False):
                    fg=ModernTheme.TEXT_COLOR,
                    bg=ModernTheme.SECONDARY_COLOR)
 
-root = tk.Tk()
-root.title("Audio Processing Toolkit")
-root.geometry(f"{ModernTheme.WINDOW_WIDTH}x{ModernTheme.WINDOW_HEIGHT}")
-root.configure(bg=ModernTheme.SECONDARY_COLOR)
-
-setup_styles()
-
-notebook = ttk.Notebook(root)
-notebook.pack(expand=True, fill="both", padx=ModernTheme.PADDING, pady=ModernTheme.PADDING)
-
 class BaseFrame(ttk.Frame):
     def __init__(self, parent, title):
         super().__init__(parent)
@@ -453,149 +398,217 @@ class BaseFrame(ttk.Frame):
         header.grid(row=0, column=0, columnspan=2, pady=(20, 30), padx=20)
 
 
-conversion_frame = BaseFrame(notebook, "Format Conversion")
-notebook.add(conversion_frame, text="Conversion")
-
-create_modern_button(conversion_frame, "Select Source Folder", select_directory).grid(
-    row=1, column=0, pady=10, padx=20, sticky="w")
-source_label = create_modern_label(conversion_frame, "Source Folder: Not selected")
-source_label.grid(row=1, column=1, pady=10, padx=20, sticky="w")
-
-create_modern_button(conversion_frame, "Select Destination Folder", select_destination).grid(
-    row=2, column=0, pady=10, padx=20, sticky="w")
-destination_label = create_modern_label(conversion_frame, "Destination: Not selected")
-destination_label.grid(row=2, column=1, pady=10, padx=20, sticky="w")
-
-format_frame = ttk.Frame(conversion_frame, style="TFrame")
-format_frame.grid(row=3, column=0, columnspan=2, pady=10, padx=20, sticky="ew")
-create_modern_label(format_frame, "Output Format:").pack(side=tk.LEFT, padx=(0, 10))
-output_format_var = tk.StringVar(value="wav")
-ttk.Entry(format_frame, textvariable=output_format_var, width=10).pack(side=tk.LEFT)
-
-progress_bar = ttk.Progressbar(conversion_frame, length=600, mode="determinate", style="TProgressbar")
-progress_bar.grid(row=4, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
-
-create_modern_button(conversion_frame, "Convert", convert_to_format).grid(
-    row=5, column=0, columnspan=2, pady=20)
-
-silence_frame = BaseFrame(notebook, "Silence Removal")
-notebook.add(silence_frame, text="Silence Removal")
-
-create_modern_button(silence_frame, "Select Source Folder", select_directory_silence).grid(
-    row=1, column=0, pady=10, padx=20, sticky="w")
-source_label_silence = create_modern_label(silence_frame, "Source Folder: Not selected")
-source_label_silence.grid(row=1, column=1, pady=10, padx=20, sticky="w")
-
-create_modern_button(silence_frame, "Select Destination Folder", select_destination_silence).grid(
-    row=2, column=0, pady=10, padx=20, sticky="w")
-destination_label_silence = create_modern_label(silence_frame, "Destination: Not selected")
-destination_label_silence.grid(row=2, column=1, pady=10, padx=20, sticky="w")
-
-threshold_frame = ttk.Frame(silence_frame, style="TFrame")
-threshold_frame.grid(row=3, column=0, columnspan=2, pady=10, padx=20, sticky="ew")
-create_modern_label(threshold_frame, "Silence Threshold:").pack(side=tk.LEFT, padx=(0, 10))
-silence_thresh_var = tk.StringVar(value='-50')
-ttk.Entry(threshold_frame, textvariable=silence_thresh_var, width=10).pack(side=tk.LEFT)
-
-progress_bar_silence = ttk.Progressbar(silence_frame, length=600, mode="determinate", style="TProgressbar")
-progress_bar_silence.grid(row=4, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
-
-create_modern_button(silence_frame, "Remove Silence", remove_silence_from_files).grid(
-    row=5, column=0, columnspan=2, pady=20)
-
-segmentation_frame = BaseFrame(notebook, "Audio Segmentation")
-notebook.add(segmentation_frame, text="Segmentation")
-
-create_modern_button(segmentation_frame, "Select Source Folder", select_directory_segmentation).grid(
-    row=1, column=0, pady=10, padx=20, sticky="w")
-source_label_segmentation = create_modern_label(segmentation_frame, "Source Folder: Not selected")
-source_label_segmentation.grid(row=1, column=1, pady=10, padx=20, sticky="w")
-
-create_modern_button(segmentation_frame, "Select Destination Folder", select_destination_segmentation).grid(
-    row=2, column=0, pady=10, padx=20, sticky="w")
-destination_label_segmentation = create_modern_label(segmentation_frame, "Destination: Not selected")
-destination_label_segmentation.grid(row=2, column=1, pady=10, padx=20, sticky="w")
-
-length_frame = ttk.Frame(segmentation_frame, style="TFrame")
-length_frame.grid(row=3, column=0, columnspan=2, pady=10, padx=20, sticky="ew")
-create_modern_label(length_frame, "Utterance Length (s):").pack(side=tk.LEFT, padx=(0, 10))
-utterance_length_var = tk.StringVar(value='3')
-ttk.Entry(length_frame, textvariable=utterance_length_var, width=10).pack(side=tk.LEFT)
-
-progress_bar_segmentation = ttk.Progressbar(segmentation_frame, length=600, mode="determinate", style="TProgressbar")
-progress_bar_segmentation.grid(row=4, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
-
-create_modern_button(segmentation_frame, "Segment Audio", segment_audio_files).grid(
-    row=5, column=0, columnspan=2, pady=20)
-
-trimmer_frame = BaseFrame(notebook, "Utterance Trimmer")
-notebook.add(trimmer_frame, text="Trimmer")
-
-create_modern_button(trimmer_frame, "Select Source Folder", select_source_directory_trimmer).grid(
-    row=1, column=0, pady=10, padx=20, sticky="w")
-source_label_trimmer = create_modern_label(trimmer_frame, "Source Folder: Not selected")
-source_label_trimmer.grid(row=1, column=1, pady=10, padx=20, sticky="w")
-
-create_modern_button(trimmer_frame, "Select Destination Folder", select_destination_directory_trimmer).grid(
-    row=2, column=0, pady=10, padx=20, sticky="w")
-destination_label_trimmer = create_modern_label(trimmer_frame, "Destination: Not selected")
-destination_label_trimmer.grid(row=2, column=1, pady=10, padx=20, sticky="w")
-
-trim_length_frame = ttk.Frame(trimmer_frame, style="TFrame")
-trim_length_frame.grid(row=3, column=0, columnspan=2, pady=10, padx=20, sticky="ew")
-create_modern_label(trim_length_frame, "Utterance Length (s):").pack(side=tk.LEFT, padx=(0, 10))
-utterance_length_var_trim = tk.StringVar(value="3")
-ttk.Entry(trim_length_frame, textvariable=utterance_length_var_trim, width=10).pack(side=tk.LEFT)
-
-progress_bar_trimmer = ttk.Progressbar(trimmer_frame, length=600, mode="determinate", style="TProgressbar")
-progress_bar_trimmer.grid(row=4, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
-
-create_modern_button(trimmer_frame, "Trim", trim_utterances).grid(
-    row=5, column=0, columnspan=2, pady=20)
-
-noise_reduction_frame = BaseFrame(notebook, "Noise Reduction")
-notebook.add(noise_reduction_frame, text="Noise Reduction")
-
-create_modern_button(noise_reduction_frame, "Select Source Folder", select_source_directory_noise_reduction).grid(
-    row=1, column=0, pady=10, padx=20, sticky="w")
-source_label_noise_reduction = create_modern_label(noise_reduction_frame, "Source Folder: Not selected")
-source_label_noise_reduction.grid(row=1, column=1, pady=10, padx=20, sticky="w")
+# Spawned batch workers re-import this module, so the window is only built when run directly
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("Audio Processing Toolkit")
+    root.geometry(f"{ModernTheme.WINDOW_WIDTH}x{ModernTheme.WINDOW_HEIGHT}")
+    root.configure(bg=ModernTheme.SECONDARY_COLOR)
 
-create_modern_button(noise_reduction_frame, "Select Destination Folder", select_destination_directory_noise_reduction).grid(
-    row=2, column=0, pady=10, padx=20, sticky="w")
-destination_label_noise_reduction = create_modern_label(noise_reduction_frame, "Destination: Not selected")
-destination_label_noise_reduction.grid(row=2, column=1, pady=10, padx=20, sticky="w")
+    setup_styles()
 
-progress_bar_noise_reduction = ttk.Progressbar(noise_reduction_frame, length=600, mode="determinate", style="TProgressbar")
-progress_bar_noise_reduction.grid(row=4, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
+    notebook = ttk.Notebook(root)
+    notebook.pack(expand=True, fill="both", padx=ModernTheme.PADDING, pady=ModernTheme.PADDING)
 
-create_modern_button(noise_reduction_frame, "Reduce Noise", reduce_noise).grid(
-    row=5, column=0, columnspan=2, pady=20)
+    workers_frame = ttk.Frame(root, style="TFrame")
+    workers_frame.pack(fill="x", padx=ModernTheme.PADDING, pady=(0, ModernTheme.PADDING))
+    create_modern_label(workers_frame, "Worker Processes:").pack(side=tk.LEFT, padx=(0, 10))
+    workers_var = tk.IntVar(value=default_workers())
+    ttk.Spinbox(workers_frame, from_=1, to=64, textvariable=workers_var, width=5).pack(side=tk.LEFT)
+    skip_current_var = tk.BooleanVar(value=True)
+    ttk.Checkbutton(workers_frame, text="Skip Up-to-Date Files", variable=skip_current_var).pack(side=tk.LEFT, padx=(20, 0))
 
-audio_normalization_frame = BaseFrame(notebook, "Audio Normalization")
-notebook.add(audio_normalization_frame, text="Audio Normalization")
 
-create_modern_button(audio_normalization_frame, "Select Source Folder", select_source_directory_audio_normalization).grid(
-    row=1, column=0, pady=10, padx=20, sticky="w")
-source_label_audio_normalization = create_modern_label(audio_normalization_frame, "Source Folder: Not selected")
-source_label_audio_normalization.grid(row=1, column=1, pady=10, padx=20, sticky="w")
-
-create_modern_button(audio_normalization_frame, "Select Destination Folder", select_destination_directory_audio_normalization).grid(
-    row=2, column=0, pady=10, padx=20, sticky="w")
-destination_label_audio_normalization = create_modern_label(audio_normalization_frame, "Destination: Not selected")
-destination_label_audio_normalization.grid(row=2, column=1, pady=10, padx=20, sticky="w")
+    conversion_frame = BaseFrame(notebook, "Format Conversion")
+    notebook.add(conversion_frame, text="Conversion")
 
-progress_bar_audio_normalization = ttk.Progressbar(audio_normalization_frame, length=600, mode="determinate", style="TProgressbar")
-progress_bar_audio_normalization.grid(row=4, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
-
-create_modern_button(audio_normalization_frame, "Normalize Audio", normalize_audio_files).grid(
-    row=5, column=0, columnspan=2, pady=20)
+    create_modern_button(conversion_frame, "Select Source Folder", select_directory).grid(
+        row=1, column=0, pady=10, padx=20, sticky="w")
+    source_label = create_modern_label(conversion_frame, "Source Folder: Not selected")
+    source_label.grid(row=1, column=1, pady=10, padx=20, sticky="w")
 
-root.update_idletasks()
-screen_width = root.winfo_screenwidth()
-screen_height = root.winfo_screenheight()
-x = (screen_width - ModernTheme.WINDOW_WIDTH) // 2
-y = (screen_height - ModernTheme.WINDOW_HEIGHT) // 2
-root.geometry(f"{ModernTheme.WINDOW_WIDTH}x{ModernTheme.WINDOW_HEIGHT}+{x}+{y}")
+    create_modern_button(conversion_frame, "Select Destination Folder", select_destination).grid(
+        row=2, column=0, pady=10, padx=20, sticky="w")
+    destination_label = create_modern_label(conversion_frame, "Destination: Not selected")
+    destination_label.grid(row=2, column=1, pady=10, padx=20, sticky="w")
 
-root.mainloop()
+    format_frame = ttk.Frame(conversion_frame, style="TFrame")
+    format_frame.grid(row=3, column=0, columnspan=2, pady=10, padx=20, sticky="ew")
+    create_modern_label(format_frame, "Output Format:").pack(side=tk.LEFT, padx=(0, 10))
+    output_format_var = tk.StringVar(value="wav")
+    ttk.Entry(format_frame, textvariable=output_format_var, width=10).pack(side=tk.LEFT)
+
+    progress_bar = ttk.Progressbar(conversion_frame, length=600, mode="determinate", style="TProgressbar")
+    progress_bar.grid(row=4, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
+
+    create_modern_button(conversion_frame, "Convert", convert_to_format).grid(
+        row=5, column=0, columnspan=2, pady=20)
+
+    silence_frame = BaseFrame(notebook, "Silence Removal")
+    notebook.add(silence_frame, text="Silence Removal")
+
+    create_modern_button(silence_frame, "Select Source Folder", select_directory_silence).grid(
+        row=1, column=0, pady=10, padx=20, sticky="w")
+    source_label_silence = create_modern_label(silence_frame, "Source Folder: Not selected")
+    source_label_silence.grid(row=1, column=1, pady=10, padx=20, sticky="w")
+
+    create_modern_button(silence_frame, "Select Destination Folder", select_destination_silence).grid(
+        row=2, column=0, pady=10, padx=20, sticky="w")
+    destination_label_silence = create_modern_label(silence_frame, "Destination: Not selected")
+    destination_label_silence.grid(row=2, column=1, pady=10, padx=20, sticky="w")
+
+    threshold_frame = ttk.Frame(silence_frame, style="TFrame")
+    threshold_frame.grid(row=3, column=0, columnspan=2, pady=10, padx=20, sticky="ew")
+    create_modern_label(threshold_frame, "Silence Threshold:").pack(side=tk.LEFT, padx=(0, 10))
+    silence_thresh_var = tk.StringVar(value='-50')
+    ttk.Entry(threshold_frame, textvariable=silence_thresh_var, width=10).pack(side=tk.LEFT)
+
+    progress_bar_silence = ttk.Progressbar(silence_frame, length=600, mode="determinate", style="TProgressbar")
+    progress_bar_silence.grid(row=4, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
+
+    create_modern_button(silence_frame, "Remove Silence", remove_silence_from_files).grid(
+        row=5, column=0, columnspan=2, pady=20)
+
+    segmentation_frame = BaseFrame(notebook, "Audio Segmentation")
+    notebook.add(segmentation_frame, text="Segmentation")
+
+    create_modern_button(segmentation_frame, "Select Source Folder", select_directory_segmentation).grid(
+        row=1, column=0, pady=10, padx=20, sticky="w")
+    source_label_segmentation = create_modern_label(segmentation_frame, "Source Folder: Not selected")
+    source_label_segmentation.grid(row=1, column=1, pady=10, padx=20, sticky="w")
+
+    create_modern_button(segmentation_frame, "Select Destination Folder", select_destination_segmentation).grid(
+        row=2, column=0, pady=10, padx=20, sticky="w")
+    destination_label_segmentation = create_modern_label(segmentation_frame, "Destination: Not selected")
+    destination_label_segmentation.grid(row=2, column=1, pady=10, padx=20, sticky="w")
+
+    length_frame = ttk.Frame(segmentation_frame, style="TFrame")
+    length_frame.grid(row=3, column=0, columnspan=2, pady=10, padx=20, sticky="ew")
+    create_modern_label(length_frame, "Utterance Length (s):").pack(side=tk.LEFT, padx=(0, 10))
+    utterance_length_var = tk.StringVar(value='3')
+    ttk.Entry(length_frame, textvariable=utterance_length_var, width=10).pack(side=tk.LEFT)
+
+    progress_bar_segmentation = ttk.Progressbar(segmentation_frame, length=600, mode="determinate", style="TProgressbar")
+    progress_bar_segmentation.grid(row=4, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
+
+    create_modern_button(segmentation_frame, "Segment Audio", segment_audio_files).grid(
+        row=5, column=0, columnspan=2, pady=20)
+
+    trimmer_frame = BaseFrame(notebook, "Utterance Trimmer")
+    notebook.add(trimmer_frame, text="Trimmer")
+
+    create_modern_button(trimmer_frame, "Select Source Folder", select_source_directory_trimmer).grid(
+        row=1, column=0, pady=10, padx=20, sticky="w")
+    source_label_trimmer = create_modern_label(trimmer_frame, "Source Folder: Not selected")
+    source_label_trimmer.grid(row=1, column=1, pady=10, padx=20, sticky="w")
+
+    create_modern_button(trimmer_frame, "Select Destination Folder", select_destination_directory_trimmer).grid(
+        row=2, column=0, pady=10, padx=20, sticky="w")
+    destination_label_trimmer = create_modern_label(trimmer_frame, "Destination: Not selected")
+    destination_label_trimmer.grid(row=2, column=1, pady=10, padx=20, sticky="w")
+
+    trim_length_frame = ttk.Frame(trimmer_frame, style="TFrame")
+    trim_length_frame.grid(row=3, column=0, columnspan=2, pady=10, padx=20, sticky="ew")
+    create_modern_label(trim_length_frame, "Utterance Length (s):").pack(side=tk.LEFT, padx=(0, 10))
+    utterance_length_var_trim = tk.StringVar(value="3")
+    ttk.Entry(trim_length_frame, textvariable=utterance_length_var_trim, width=10).pack(side=tk.LEFT)
+
+    progress_bar_trimmer = ttk.Progressbar(trimmer_frame, length=600, mode="determinate", style="TProgressbar")
+    progress_bar_trimmer.grid(row=4, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
+
+    create_modern_button(trimmer_frame, "Trim", trim_utterances).grid(
+        row=5, column=0, columnspan=2, pady=20)
+
+    noise_reduction_frame = BaseFrame(notebook, "Noise Reduction")
+    notebook.add(noise_reduction_frame, text="Noise Reduction")
+
+    create_modern_button(noise_reduction_frame, "Select Source Folder", select_source_directory_noise_reduction).grid(
+        row=1, column=0, pady=10, padx=20, sticky="w")
+    source_label_noise_reduction = create_modern_label(noise_reduction_frame, "Source Folder: Not selected")
+    source_label_noise_reduction.grid(row=1, column=1, pady=10, padx=20, sticky="w")
+
+    create_modern_button(noise_reduction_frame, "Select Destination Folder", select_destination_directory_noise_reduction).grid(
+        row=2, column=0, pady=10, padx=20, sticky="w")
+    destination_label_noise_reduction = create_modern_label(noise_reduction_frame, "Destination: Not selected")
+    destination_label_noise_reduction.grid(row=2, column=1, pady=10, padx=20, sticky="w")
+
+    noise_options_frame = ttk.Frame(noise_reduction_frame, style="TFrame")
+    noise_options_frame.grid(row=3, column=0, columnspan=2, pady=10, padx=20, sticky="ew")
+    stream_noise_var = tk.BooleanVar(value=True)
+    ttk.Checkbutton(noise_options_frame, text="Process in Blocks", variable=stream_noise_var).pack(side=tk.LEFT)
+    create_modern_label(noise_options_frame, "Block Length (s):").pack(side=tk.LEFT, padx=(20, 10))
+    block_seconds_var = tk.StringVar(value="60")
+    ttk.Entry(noise_options_frame, textvariable=block_seconds_var, width=10).pack(side=tk.LEFT)
+    stationary_noise_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(noise_options_frame, text="Stationary Noise", variable=stationary_noise_var).pack(
+        side=tk.LEFT, padx=(20, 0))
+
+    progress_bar_noise_reduction = ttk.Progressbar(noise_reduction_frame, length=600, mode="determinate", style="TProgressbar")
+    progress_bar_noise_reduction.grid(row=4, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
+
+    create_modern_button(noise_reduction_frame, "Reduce Noise", reduce_noise).grid(
+        row=5, column=0, columnspan=2, pady=20)
+
+    audio_normalization_frame = BaseFrame(notebook, "Audio Normalization")
+    notebook.add(audio_normalization_frame, text="Audio Normalization")
+
+    create_modern_button(audio_normalization_frame, "Select Source Folder", select_source_directory_audio_normalization).grid(
+        row=1, column=0, pady=10, padx=20, sticky="w")
+    source_label_audio_normalization = create_modern_label(audio_normalization_frame, "Source Folder: Not selected")
+    source_label_audio_normalization.grid(row=1, column=1, pady=10, padx=20, sticky="w")
+
+    create_modern_button(audio_normalization_frame, "Select Destination Folder", select_destination_directory_audio_normalization).grid(
+        row=2, column=0, pady=10, padx=20, sticky="w")
+    destination_label_audio_normalization = create_modern_label(audio_normalization_frame, "Destination: Not selected")
+    destination_label_audio_normalization.grid(row=2, column=1, pady=10, padx=20, sticky="w")
+
+    progress_bar_audio_normalization = ttk.Progressbar(audio_normalization_frame, length=600, mode="determinate", style="TProgressbar")
+    progress_bar_audio_normalization.grid(row=4, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
+
+    create_modern_button(audio_normalization_frame, "Normalize Audio", normalize_audio_files).grid(
+        row=5, column=0, columnspan=2, pady=20)
+
+    pipeline_frame = BaseFrame(notebook, "Processing Pipeline")
+    notebook.add(pipeline_frame, text="Pipeline")
+
+    create_modern_button(pipeline_frame, "Select Source Folder", select_source_directory_pipeline).grid(
+        row=1, column=0, pady=10, padx=20, sticky="w")
+    source_label_pipeline = create_modern_label(pipeline_frame, "Source Folder: Not selected")
+    source_label_pipeline.grid(row=1, column=1, pady=10, padx=20, sticky="w")
+
+    create_modern_button(pipeline_frame, "Select Destination Folder", select_destination_directory_pipeline).grid(
+        row=2, column=0, pady=10, padx=20, sticky="w")
+    destination_label_pipeline = create_modern_label(pipeline_frame, "Destination: Not selected")
+    destination_label_pipeline.grid(row=2, column=1, pady=10, padx=20, sticky="w")
+
+    stages_frame = ttk.Frame(pipeline_frame, style="TFrame")
+    stages_frame.grid(row=3, column=0, columnspan=2, pady=10, padx=20, sticky="ew")
+    pipeline_stage_vars = {}
+    for name, text in zip(DEFAULT_ORDER, ("Remove Silence", "Reduce Noise", "Normalize", "Segment")):
+        pipeline_stage_vars[name] = tk.BooleanVar(value=True)
+        ttk.Checkbutton(stages_frame, text=text, variable=pipeline_stage_vars[name]).pack(side=tk.LEFT, padx=(0, 10))
+
+    pipeline_params_frame = ttk.Frame(pipeline_frame, style="TFrame")
+    pipeline_params_frame.grid(row=4, column=0, columnspan=2, pady=10, padx=20, sticky="ew")
+    create_modern_label(pipeline_params_frame, "Silence Threshold:").pack(side=tk.LEFT, padx=(0, 10))
+    silence_thresh_var_pipeline = tk.StringVar(value='-50')
+    ttk.Entry(pipeline_params_frame, textvariable=silence_thresh_var_pipeline, width=10).pack(side=tk.LEFT)
+    create_modern_label(pipeline_params_frame, "Utterance Length (s):").pack(side=tk.LEFT, padx=(20, 10))
+    utterance_length_var_pipeline = tk.StringVar(value='3')
+    ttk.Entry(pipeline_params_frame, textvariable=utterance_length_var_pipeline, width=10).pack(side=tk.LEFT)
+
+    progress_bar_pipeline = ttk.Progressbar(pipeline_frame, length=600, mode="determinate", style="TProgressbar")
+    progress_bar_pipeline.grid(row=5, column=0, columnspan=2, pady=(20, 10), padx=20, sticky="ew")
+
+    create_modern_button(pipeline_frame, "Run Pipeline", run_pipeline).grid(
+        row=6, column=0, columnspan=2, pady=20)
+
+    root.update_idletasks()
+    screen_width = root.winfo_screenwidth()
+    screen_height = root.winfo_screenheight()
+    x = (screen_width - ModernTheme.WINDOW_WIDTH) // 2
+    y = (screen_height - ModernTheme.WINDOW_HEIGHT) // 2
+    root.geometry(f"{ModernTheme.WINDOW_WIDTH}x{ModernTheme.WINDOW_HEIGHT}+{x}+{y}")
+
+    root.protocol("WM_DELETE_WINDOW", close_window)
+    root.mainloop()
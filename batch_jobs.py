@@ -0,0 +1,145 @@
+import os
+import threading
+import multiprocessing
+from queue import Queue
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from manifest import file_fingerprint
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def _run_file(function, file_path, args, kwargs):
+    """Run one file, returning its error instead of raising so one bad file never stops a batch."""
+    try:
+        return file_path, function(file_path, *args, **kwargs), None
+    except Exception as e:
+        return file_path, None, str(e)
+
+
+def batch_params(function, args, kwargs):
+    """What a batch does to each file, as recorded in a manifest."""
+    return {'operation': f"{function.__module__}.{function.__name__}",
+            'args': list(args), 'kwargs': kwargs or {}}
+
+
+def run_batch(function, files, args=(), kwargs=None, workers=1, progress=None, cancel=None,
+              manifest=None):
+    """Apply ``function(file_path, *args, **kwargs)`` to every file.
+
+    With ``workers > 1`` files go to a pool of spawned processes, so
+    ``function`` must be a module-level, tkinter-free callable. Only a few
+    files per worker are in flight at a time, which keeps memory flat on
+    large corpora and lets ``cancel`` (a ``threading.Event``) stop the batch
+    quickly. ``progress(done, total)`` is called after every file. With a
+    ``Manifest``, files processed before with the same parameters, unchanged
+    since and with their outputs still present are skipped, and every
+    finished file is recorded, so an interrupted batch resumes where it
+    stopped. Returns a summary with the per-file results, the
+    ``(file, error)`` failures and the skipped files.
+    """
+    kwargs = kwargs or {}
+    files = list(files)
+    summary = {'total': len(files), 'done': 0, 'results': {}, 'errors': [], 'skipped': [],
+               'cancelled': False}
+
+    fingerprints = {}
+    if manifest is not None:
+        params = batch_params(function, args, kwargs)
+        pending_files = []
+        for file_path in files:
+            fingerprints[file_path] = file_fingerprint(file_path)
+            if manifest.is_current(os.path.abspath(file_path), fingerprints[file_path], params):
+                summary['skipped'].append(file_path)
+            else:
+                pending_files.append(file_path)
+        files = pending_files
+    total = len(files)
+
+    def finished(outcome):
+        file_path, result, error = outcome
+        summary['done'] += 1
+        if error is None:
+            summary['results'][file_path] = result
+            if manifest is not None:
+                manifest.record(os.path.abspath(file_path), fingerprints[file_path], params,
+                                [os.path.abspath(output) for output in result or []])
+        else:
+            summary['errors'].append((file_path, error))
+        if progress:
+            progress(summary['done'], total)
+
+    if workers <= 1:
+        for file_path in files:
+            if cancel is not None and cancel.is_set():
+                summary['cancelled'] = True
+                break
+            finished(_run_file(function, file_path, args, kwargs))
+        return summary
+
+    context = multiprocessing.get_context('spawn')
+    max_pending = workers * 4
+    remaining = iter(files)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = set()
+        while True:
+            if cancel is not None and cancel.is_set():
+                summary['cancelled'] = True
+                for future in pending:
+                    future.cancel()
+                break
+            for file_path in remaining:
+                pending.add(pool.submit(_run_file, function, file_path, args, kwargs))
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                break
+            completed, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in completed:
+                finished(future.result())
+    return summary
+
+
+class BatchJob:
+    """Runs ``run_batch`` on a background thread for a Tk front-end.
+
+    Progress, completion and failure are posted to ``queue`` as
+    ``('progress', done, total)``, ``('complete', summary, None)`` and
+    ``('error', message, None)`` for the UI to poll with ``after``.
+    """
+
+    def __init__(self, function, files, args=(), kwargs=None, workers=1, manifest=None):
+        self.function = function
+        self.files = files
+        self.args = args
+        self.kwargs = kwargs
+        self.workers = workers
+        self.manifest = manifest
+        self.queue = Queue()
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _run(self):
+        try:
+            summary = run_batch(self.function, self.files, self.args, self.kwargs,
+                                workers=self.workers,
+                                progress=lambda done, total: self.queue.put(('progress', done, total)),
+                                cancel=self.cancel_event, manifest=self.manifest)
+            self.queue.put(('complete', summary, None))
+        except Exception as e:
+            self.queue.put(('error', str(e), None))
+        finally:
+            if self.manifest is not None:
+                self.manifest.close()
+
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def cancel(self):
+        self.cancel_event.set()
@@ -0,0 +1,370 @@
+"""Reproducible performance benchmarks on synthetic audio and synthetic speaker models.
+
+    python benchmark.py --output results.json
+    python benchmark.py --speakers 10,100,1000,10000 --output new.json --compare old.json
+
+Times decoding, MFCC/delta extraction, GMM training, model loading (``.gmm``
+files and model bank) and the per-tick latency of the real-time loop against
+N enrolled speakers. Each benchmark reports percentiles of repeated runs in
+milliseconds and, from one extra run under tracemalloc, its peak Python/NumPy
+memory. Everything runs offline in a temporary directory and is seeded, so
+results of different revisions can be compared with ``--compare``, which
+exits with status 2 when a median got slower than ``--threshold``.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import numpy as np
+
+
+def synthetic_speech(seconds, sr=16000, seed=0):
+    """Deterministic speech-like signal: a gliding harmonic source with a syllable-rate envelope plus noise."""
+    rng = np.random.RandomState(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    f0 = (100 + 80 * rng.rand()) * (1 + 0.1 * np.sin(2 * np.pi * 0.5 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    voice = sum(np.sin(h * phase) / h for h in range(1, 11))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t + rng.rand() * 2 * np.pi), 0, None)
+    y = 0.2 * voice * envelope + 0.01 * rng.randn(len(t))
+    return y.astype(np.float32)
+
+
+def synthetic_models(n_speakers, n_components=5, n_features=22, seed=0):
+    """(speaker, weights, means, variances) of random diagonal GMMs."""
+    rng = np.random.RandomState(seed)
+    for i in range(n_speakers):
+        weights = rng.dirichlet(np.ones(n_components))
+        means = rng.randn(n_components, n_features) * 10
+        variances = rng.uniform(1, 20, (n_components, n_features))
+        yield f"speaker_{i:05d}", weights, means, variances
+
+
+def gmm_from_params(weights, means, variances):
+    from sklearn.mixture import GaussianMixture
+    gmm = GaussianMixture(n_components=len(weights), covariance_type='diag')
+    gmm.weights_, gmm.means_, gmm.covariances_ = weights, means, variances
+    gmm.precisions_cholesky_ = 1.0 / np.sqrt(variances)
+    gmm.converged_, gmm.n_iter_ = True, 0
+    return gmm
+
+
+def summarize(samples):
+    """Percentiles of per-run seconds, in milliseconds."""
+    ms = np.asarray(samples) * 1000
+    return {'runs': len(ms), 'mean_ms': float(ms.mean()), 'p50_ms': float(np.percentile(ms, 50)),
+            'p90_ms': float(np.percentile(ms, 90)), 'p99_ms': float(np.percentile(ms, 99)),
+            'max_ms': float(ms.max())}
+
+
+def measure(function, repeats):
+    """Time ``function()`` ``repeats`` times, then once more under tracemalloc for its peak memory."""
+    function()  # Warm-up: imports, caches, allocator
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return dict(summarize(samples), peak_mb=peak / 2**20)
+
+
+def bench_decode(workdir, args):
+    import librosa
+    import soundfile as sf
+    path = os.path.join(workdir, 'decode.wav')
+    sf.write(path, synthetic_speech(args.seconds, args.sample_rate), args.sample_rate, subtype='PCM_16')
+    return {
+        'librosa': measure(lambda: librosa.load(path, sr=None), args.repeats),
+        'soundfile': measure(lambda: sf.read(path, dtype='float32'), args.repeats),
+    }
+
+
+def bench_features(workdir, args):
+    from audio_frontend import AudioFrontEnd
+    y = synthetic_speech(args.seconds, args.sample_rate)
+    results = {}
+    for name, dmfcc, ddmfcc in (('mfcc', False, False), ('mfcc+delta', True, False),
+                                ('mfcc+delta+delta2', True, True)):
+        frontend = AudioFrontEnd(args.sample_rate, n_mfcc=args.n_mfcc, use_dmfcc=dmfcc, use_ddmfcc=ddmfcc)
+        results[name] = measure(lambda: frontend.features(y), args.repeats)
+    return results
+
+
+def bench_gmm_fit(workdir, args):
+    from audio_frontend import AudioFrontEnd
+    from enrollment import train_gmm
+    frontend = AudioFrontEnd(args.sample_rate, n_mfcc=args.n_mfcc)
+    features = np.vstack([frontend.features(synthetic_speech(args.seconds, args.sample_rate, seed))
+                          for seed in range(args.utterances)])
+    return {'frames': len(features),
+            'n_components': args.components,
+            'fit': measure(lambda: train_gmm(features, args.components), args.repeats)}
+
+
+def write_models(directory, n_speakers, args, bank):
+    from enrollment import save_model
+    from model_store import BANK_FILENAME, ModelBank
+    os.makedirs(directory, exist_ok=True)
+    models = synthetic_models(n_speakers, args.components, args.n_mfcc)
+    if bank:
+        model_bank = ModelBank.create(os.path.join(directory, BANK_FILENAME), args.n_mfcc,
+                                      {'n_mfcc': args.n_mfcc, 'use_dmfcc': False, 'use_ddmfcc': False})
+        model_bank.put_many(list(models))
+    else:
+        for speaker, weights, means, variances in models:
+            save_model(gmm_from_params(weights, means, variances), os.path.join(directory, f"{speaker}.gmm"))
+
+
+def bench_loading(workdir, args):
+    from model_store import load_scorer
+    results = {}
+    for n_speakers in args.speakers:
+        results[str(n_speakers)] = {}
+        for layout in ('gmm', 'bank'):
+            directory = os.path.join(workdir, f"models_{layout}_{n_speakers}")
+            write_models(directory, n_speakers, args, bank=(layout == 'bank'))
+            results[str(n_speakers)][layout] = measure(lambda: load_scorer(directory),
+                                                       max(1, args.repeats // 4))
+    return results
+
+
+def tick_latency(args, n_candidates=None):
+    """The real-time loop's work per step: push new samples, score the new frames, update the evidence.
+
+    With ``n_candidates`` the new frames are scored against a pruned shortlist, as in the real-time tab.
+    """
+    from audio_frontend import AudioFrontEnd
+    from evidence import EvidenceAccumulator
+    from gmm_scoring import GMMScorer
+    from pruned_scoring import PrunedScorer
+    from streaming_features import StreamingMFCC
+    from streaming_denoise import StreamingDenoiser
+
+    # Same front-end settings as the real-time tab: 25 ms frames, 10 ms hop, 3 s window, 100 ms step
+    sr = 16000
+    step = int(0.1 * sr)
+    y = synthetic_speech(max(args.seconds, 10), sr)
+    results = {}
+    for n_speakers in args.speakers:
+        scorer = GMMScorer()
+        for speaker, weights, means, variances in synthetic_models(n_speakers, args.components, args.n_mfcc):
+            scorer.add_params(speaker, weights, means, variances)
+        scorer.build()
+
+        def run(n_ticks):
+            frontend = AudioFrontEnd(sr, n_fft=int(0.025 * sr), hop_length=int(0.010 * sr), n_mfcc=args.n_mfcc)
+            extractor = StreamingMFCC(frontend, window_seconds=3, denoiser=StreamingDenoiser(frontend.n_bins))
+            if n_candidates:
+                pruned = PrunedScorer(scorer, n_candidates, refresh_every=10, span_frames=300)
+            else:
+                accumulator = EvidenceAccumulator(n_speakers, 300)
+            latencies = []
+            for i in range(n_ticks):
+                start = (i * step) % (len(y) - step)
+                begin = time.perf_counter()
+                extractor.push(y[start:start + step])
+                frames = extractor.new_frames(normalize=True)
+                if frames is not None and n_candidates:
+                    pruned.add(frames)
+                elif frames is not None:
+                    accumulator.add(scorer.frame_scores(frames))
+                    dict(zip(scorer.speakers, accumulator.scores()))
+                latencies.append(time.perf_counter() - begin)
+            return latencies
+
+        run(10)
+        latencies = run(args.ticks)
+        tracemalloc.start()
+        try:
+            run(10)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        summary = summarize(latencies)
+        summary['overruns'] = int(sum(latency > 0.1 for latency in latencies))
+        summary['peak_mb'] = peak / 2**20
+        results[str(n_speakers)] = summary
+    return results
+
+
+def bench_tick(workdir, args):
+    return tick_latency(args)
+
+
+def bench_tick_pruned(workdir, args):
+    return tick_latency(args, args.candidates)
+
+
+def bench_index(workdir, args):
+    """Speaker index lookups of 3 s queries (300 frames) among MAP-adapted synthetic speakers."""
+    from speaker_index import SpeakerIndex, sample_frames
+
+    rng = np.random.RandomState(0)
+    n_components = 64
+    weights = rng.dirichlet(np.ones(n_components) * 5)
+    means = rng.randn(n_components, args.n_mfcc) * 3
+    variances = rng.uniform(1, 4, (n_components, args.n_mfcc))
+    results = {}
+    for n_speakers in args.speakers:
+        index = SpeakerIndex(weights, means, variances)
+        speakers = [f"speaker_{i:05d}" for i in range(n_speakers)]
+        speaker_means = {}
+        for speaker in speakers:
+            speaker_means[speaker] = means + rng.randn(n_components, args.n_mfcc) * 0.4 * np.sqrt(variances)
+        index.put(speakers, [index.model_vector(s, weights, speaker_means[s], variances) for s in speakers])
+        start = time.perf_counter()
+        index.train()
+        train_seconds = time.perf_counter() - start
+
+        targets = [speakers[i] for i in rng.randint(n_speakers, size=20)]
+        queries = [sample_frames(weights, speaker_means[s], variances, 300, rng) for s in targets]
+        result = {'lists': index.n_lists, 'train_s': train_seconds}
+        for name, n_probe in (('ivf', index.n_probe), ('exhaustive', max(1, index.n_lists))):
+            found = [target in index.search(query, args.candidates, n_probe)[0]
+                     for target, query in zip(targets, queries)]
+            calls = iter(range(10 ** 9))
+            result[name] = dict(measure(lambda: index.search(queries[next(calls) % len(queries)],
+                                                              args.candidates, n_probe), args.repeats),
+                                recall=float(np.mean(found)))
+        results[str(n_speakers)] = result
+    return results
+
+
+BENCHMARKS = {
+    'decode': bench_decode,
+    'features': bench_features,
+    'gmm_fit': bench_gmm_fit,
+    'loading': bench_loading,
+    'tick': bench_tick,
+    'tick_pruned': bench_tick_pruned,
+    'index': bench_index,
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_benchmarks(names, args, log=None):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names:
+            if log:
+                log(f"Running {name}...")
+            results[name] = BENCHMARKS[name](workdir, args)
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'config': {k: v for k, v in vars(args).items() if k not in ('output', 'compare', 'func')},
+        },
+        'results': results,
+    }
+
+
+def flatten(results, prefix=''):
+    """{'loading/100/bank': summary, ...} for every timed entry."""
+    entries = {}
+    for key, value in results.items():
+        if isinstance(value, dict) and 'p50_ms' in value:
+            entries[prefix + key] = value
+        elif isinstance(value, dict):
+            entries.update(flatten(value, f"{prefix}{key}/"))
+    return entries
+
+
+def compare(old, new, threshold=0.1):
+    """Lines comparing the median times of two result files, and whether any got slower than ``threshold``."""
+    old_entries, new_entries = flatten(old['results']), flatten(new['results'])
+    lines = [f"{'benchmark':40} {'old p50':>10} {'new p50':>10} {'change':>8}"]
+    regressed = False
+    for name in sorted(set(old_entries) & set(new_entries)):
+        before, after = old_entries[name]['p50_ms'], new_entries[name]['p50_ms']
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag, regressed = "  slower", True
+        elif change < -threshold:
+            flag = "  faster"
+        lines.append(f"{name:40} {before:10.3f} {after:10.3f} {change:+8.1%}{flag}")
+    return lines, regressed
+
+
+def format_results(results):
+    lines = []
+    for name, summary in flatten(results['results']).items():
+        line = (f"{name:40} p50 {summary['p50_ms']:10.3f} ms  p90 {summary['p90_ms']:10.3f} ms  "
+                f"p99 {summary['p99_ms']:10.3f} ms  peak {summary['peak_mb']:8.1f} MB")
+        if 'overruns' in summary:
+            line += f"  overruns {summary['overruns']}/{summary['runs']}"
+        if 'recall' in summary:
+            line += f"  recall {summary['recall']:.0%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark feature extraction, GMM training and real-time scoring.")
+    parser.add_argument('--benchmarks', type=lambda value: [v.strip() for v in value.split(',') if v.strip()],
+                        default=list(BENCHMARKS), help=f"comma-separated subset of {','.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--speakers', type=lambda value: [int(v) for v in value.split(',')],
+                        default=[10, 100, 1000, 10000],
+                        help="enrolled speaker counts for loading, tick latency and index search (default: 10,100,1000,10000)")
+    parser.add_argument('--seconds', type=float, default=10.0, help="length of each synthetic utterance (default: 10)")
+    parser.add_argument('--sample-rate', type=int, default=16000, help="sample rate of the synthetic audio (default: 16000)")
+    parser.add_argument('--utterances', type=int, default=6, help="utterances per speaker for GMM training (default: 6)")
+    parser.add_argument('--n-mfcc', type=int, default=22, help="number of MFCCs (default: 22)")
+    parser.add_argument('--components', type=int, default=5, help="GMM components (default: 5)")
+    parser.add_argument('--repeats', type=int, default=20, help="timed runs per benchmark (default: 20)")
+    parser.add_argument('--candidates', type=int, default=50,
+                        help="shortlist size of the pruned tick and index benchmarks (default: 50)")
+    parser.add_argument('--ticks', type=int, default=300, help="timed real-time ticks per speaker count (default: 300)")
+    parser.add_argument('--output', '-o', help="write the results to this JSON file")
+    parser.add_argument('--compare', metavar='JSON', help="compare with an earlier results file")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="relative p50 slowdown reported as a regression (default: 0.1)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmarks: {', '.join(unknown)}", file=sys.stderr)
+        return 1
+
+    results = run_benchmarks(args.benchmarks, args, log=lambda message: print(message, file=sys.stderr))
+    print(format_results(results))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            lines, regressed = compare(json.load(f), results, args.threshold)
+        print("\n".join(lines))
+        return 2 if regressed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
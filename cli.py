@@ -0,0 +1,352 @@
+"""Headless command-line entry point for the preprocessing toolkit and speaker identification.
+
+    python cli.py segment recordings/ segments/ --length 3 --jobs 8
+    python cli.py enroll train/ models/ --ubm --bank --jobs 8
+    python cli.py identify models/ test/ --top-k 3
+    python cli.py evaluate models/ test/ --confusion confusion.csv
+
+Audio and machine learning libraries are imported inside the commands, so
+``--help`` and argument errors return immediately, and tkinter is never imported.
+"""
+import os
+import sys
+import argparse
+
+
+def shard(items, spec):
+    """The ``INDEX/COUNT`` share of a list (0-based index), e.g. one task of a cluster job array."""
+    if not spec:
+        return items
+    index, count = (int(part) for part in spec.split('/'))
+    if not 0 <= index < count:
+        raise ValueError(f"Shard index must be in [0, {count}), got {index}")
+    return items[index::count]
+
+
+def progress_printer(args, label):
+    """``progress(done, total)`` callback writing a status line to stderr, unless ``--quiet``."""
+    if args.quiet:
+        return None
+
+    def progress(done, total):
+        end = "\n" if done == total else ""
+        print(f"\r{label} {done}/{total}", end=end, file=sys.stderr, flush=True)
+    return progress
+
+
+def report_errors(summary):
+    for file_path, error in summary['errors']:
+        print(f"{file_path}: {error}", file=sys.stderr)
+    return 1 if summary['errors'] else 0
+
+
+def open_manifest(args):
+    """Manifest of the destination directory, unless ``--force`` asks to redo everything."""
+    from manifest import Manifest
+    return None if args.force else Manifest.for_directory(args.destination)
+
+
+def report_skipped(summary):
+    if summary['skipped']:
+        print(f"Skipped {len(summary['skipped'])} up-to-date files", file=sys.stderr)
+
+
+def run_file_command(args, function_name, extensions, extra_args=(), exclude=False):
+    import audio_operations
+    from batch_jobs import run_batch
+
+    files = shard(audio_operations.list_files(args.source, extensions, exclude), args.shard)
+    if not files:
+        print(f"No matching audio files in {args.source}", file=sys.stderr)
+        return 1
+    summary = run_batch(getattr(audio_operations, function_name), files,
+                        (args.source, args.destination) + tuple(extra_args),
+                        workers=args.jobs, progress=progress_printer(args, args.command),
+                        manifest=open_manifest(args))
+    report_skipped(summary)
+    return report_errors(summary)
+
+
+def extensions_arg(value):
+    return tuple('.' + e.strip().lstrip('.').lower() for e in value.split(',') if e.strip())
+
+
+def cmd_convert(args):
+    if args.extensions:
+        return run_file_command(args, 'convert_file', args.extensions, (args.format,))
+    # Same selection as the toolkit window: whatever is not already mp3/wav/ogg/flac
+    from audio_operations import SOURCE_EXTENSIONS
+    return run_file_command(args, 'convert_file', SOURCE_EXTENSIONS, (args.format,), exclude=True)
+
+
+def cmd_remove_silence(args):
+    return run_file_command(args, 'remove_silence_file', ('.wav', '.mp3', '.flac'),
+                            (args.threshold, args.min_silence_len))
+
+
+def cmd_segment(args):
+    return run_file_command(args, 'segment_file', ('.wav', '.mp3', '.flac'), (args.length,))
+
+
+def cmd_trim(args):
+    from audio_operations import SOURCE_EXTENSIONS
+    return run_file_command(args, 'trim_file', SOURCE_EXTENSIONS, (args.length,))
+
+
+def cmd_denoise(args):
+    return run_file_command(args, 'reduce_noise_file', ('.wav',), (args.block_seconds or None, args.stationary))
+
+
+def cmd_normalize(args):
+    return run_file_command(args, 'normalize_file', ('.wav',))
+
+
+def cmd_pipeline(args):
+    import audio_operations
+    from batch_jobs import run_batch
+    from pipeline import build_chain, process_file
+
+    chain = build_chain(args.stages, {
+        'silence': {'silence_thresh': args.threshold, 'min_silence_len': args.min_silence_len},
+        'segment': {'utterance_length': args.length},
+    })
+    files = shard(audio_operations.list_files(args.source, audio_operations.SOURCE_EXTENSIONS), args.shard)
+    if not files:
+        print(f"No matching audio files in {args.source}", file=sys.stderr)
+        return 1
+    summary = run_batch(process_file, files, (args.source, args.destination, chain, args.format),
+                        workers=args.jobs, progress=progress_printer(args, "pipeline"),
+                        manifest=open_manifest(args))
+    report_skipped(summary)
+    return report_errors(summary)
+
+
+def cmd_enroll(args):
+    from enrollment import enroll_speakers
+
+    os.makedirs(args.destination, exist_ok=True)
+    params = {
+        'num_utterances': args.utterances,
+        'n_mfcc': args.n_mfcc or 22,
+        'use_dmfcc': args.dmfcc,
+        'use_ddmfcc': args.ddmfcc,
+        'n_components': args.components,
+        'cache_dir': args.cache_dir,
+        'model_bank': args.bank,
+        'ubm': args.ubm,
+        'relevance_factor': args.relevance_factor,
+        'skip_unchanged': not args.force,
+        'speaker_index': args.index,
+    }
+    summary = enroll_speakers(args.training, args.destination, params, workers=args.jobs,
+                              progress=progress_printer(args, "enroll"))
+    print(f"Enrolled {len(summary['speakers'])} speakers into {args.destination}"
+          f" ({len(summary['skipped'])} unchanged speakers skipped)", file=sys.stderr)
+    return 0
+
+
+def audio_inputs(paths):
+    """Audio files given directly or found (recursively) in the given directories."""
+    from enrollment import AUDIO_EXTENSIONS
+    from audio_operations import list_files
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(list_files(path, AUDIO_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+
+def cmd_identify(args):
+    import numpy as np
+    from batch_jobs import run_batch
+    from enrollment import extract_features
+    from model_store import ModelIndex, load_scorer, models_feature_config, scorer_for
+    from speaker_index import INDEX_FILENAME, find_speaker_index
+    from ubm import find_ubm
+
+    speaker_index = None
+    if args.candidates:
+        # Only the shortlisted models of each file are loaded and scored
+        speaker_index = find_speaker_index(args.models)
+        if speaker_index is None:
+            print(f"No speaker index ({INDEX_FILENAME}) in {args.models}; build one with enroll --index",
+                  file=sys.stderr)
+            return 1
+        models = ModelIndex(args.models)
+        missing = speaker_index.missing(models.speakers)
+        if missing:
+            print(f"Speaker index of {args.models} misses {len(missing)} of the enrolled speakers "
+                  f"(e.g. {missing[0]}); update it with enroll --index", file=sys.stderr)
+            return 1
+        ubm = find_ubm(args.models)
+        config = models_feature_config(models, ubm)
+        n_models = len(models)
+    else:
+        scorer, config = load_scorer(args.models)
+        n_models = len(scorer)
+    if not n_models:
+        print(f"No speaker models found in {args.models}", file=sys.stderr)
+        return 1
+    n_mfcc = args.n_mfcc or config.get('n_mfcc', 22)
+    use_dmfcc = args.dmfcc or config.get('use_dmfcc', False)
+    use_ddmfcc = args.ddmfcc or config.get('use_ddmfcc', False)
+
+    files = shard(audio_inputs(args.inputs), args.shard)
+    summary = run_batch(extract_features, files, (n_mfcc, use_dmfcc, use_ddmfcc),
+                        workers=args.jobs, progress=progress_printer(args, "features"))
+
+    for file_path in files:
+        if file_path not in summary['results']:
+            continue
+        features = summary['results'][file_path]
+        if speaker_index is not None:
+            shortlist, _ = speaker_index.search(features, args.candidates)
+            scorer = scorer_for(models, ubm, [s for s in shortlist if s in models.entries])
+        scores = scorer.score(features)
+        best = np.argsort(scores)[::-1][:args.top_k]
+        print("\t".join([file_path] + [f"{scorer.speakers[i]}\t{scores[i]:.4f}" for i in best]))
+    return report_errors(summary)
+
+
+def cmd_evaluate(args):
+    from evaluation import evaluate, format_report, write_confusion_csv, write_predictions_csv
+
+    feature_params = {}
+    if args.n_mfcc:
+        feature_params['n_mfcc'] = args.n_mfcc
+    if args.dmfcc:
+        feature_params['use_dmfcc'] = True
+    if args.ddmfcc:
+        feature_params['use_ddmfcc'] = True
+    report = evaluate(args.models, args.test, workers=args.jobs, top_k=args.top_k,
+                      progress=progress_printer(args, "features"), feature_params=feature_params,
+                      n_candidates=args.candidates, shortlist='index' if args.index else 'centroid')
+    print(format_report(report))
+    if args.confusion:
+        write_confusion_csv(report, args.confusion)
+    if args.predictions:
+        write_predictions_csv(report, args.predictions)
+    return report_errors(report)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Audio preprocessing and speaker identification, without the GUI.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--jobs', '-j', type=int, default=1, help="worker processes (default: 1)")
+    common.add_argument('--quiet', '-q', action='store_true', help="no progress output")
+
+    files = argparse.ArgumentParser(add_help=False, parents=[common])
+    files.add_argument('source', help="source folder, searched recursively")
+    files.add_argument('destination', help="destination folder, mirrors the source tree")
+    files.add_argument('--shard', metavar='INDEX/COUNT',
+                       help="only process every COUNT-th file starting at INDEX (0-based)")
+    files.add_argument('--force', action='store_true',
+                       help="reprocess files whose outputs are up to date in the destination manifest")
+
+    p = subparsers.add_parser('convert', parents=[files], help="convert audio files to another format")
+    p.add_argument('--format', default='wav', help="output format (default: wav)")
+    p.add_argument('--extensions', type=extensions_arg,
+                   help="comma-separated source extensions to convert, e.g. mp3,ogg "
+                        "(default: files that are not mp3/wav/ogg/flac, as in the toolkit)")
+    p.set_defaults(func=cmd_convert)
+
+    p = subparsers.add_parser('remove-silence', parents=[files], help="remove silent parts")
+    p.add_argument('--threshold', type=int, default=-50, help="silence threshold in dBFS (default: -50)")
+    p.add_argument('--min-silence-len', type=int, default=1000, help="shortest silence in ms (default: 1000)")
+    p.set_defaults(func=cmd_remove_silence)
+
+    p = subparsers.add_parser('segment', parents=[files], help="cut files into fixed-length utterances")
+    p.add_argument('--length', type=int, default=3, help="utterance length in seconds (default: 3)")
+    p.set_defaults(func=cmd_segment)
+
+    p = subparsers.add_parser('trim', parents=[files], help="keep the beginning of each file")
+    p.add_argument('--length', type=float, default=3.0, help="kept length in seconds (default: 3)")
+    p.set_defaults(func=cmd_trim)
+
+    p = subparsers.add_parser('denoise', parents=[files], help="noise reduction of WAV files")
+    p.add_argument('--block-seconds', type=float, default=60,
+                   help="process and write files in blocks of this length, with bounded memory; "
+                        "0 processes each file at once (default: 60)")
+    p.add_argument('--stationary', action='store_true',
+                   help="gate against one noise profile of the whole file instead of a running estimate")
+    p.set_defaults(func=cmd_denoise)
+
+    p = subparsers.add_parser('normalize', parents=[files], help="peak-normalize WAV files")
+    p.set_defaults(func=cmd_normalize)
+
+    p = subparsers.add_parser('pipeline', parents=[files],
+                              help="decode each file once and chain several operations in memory")
+    p.add_argument('--stages', type=lambda value: [v.strip() for v in value.split(',') if v.strip()],
+                   default=['silence', 'denoise', 'normalize', 'segment'],
+                   help="comma-separated stages in order, from silence, denoise, normalize, segment "
+                        "(default: all four in that order)")
+    p.add_argument('--threshold', type=int, default=-50, help="silence threshold in dBFS (default: -50)")
+    p.add_argument('--min-silence-len', type=int, default=1000, help="shortest silence in ms (default: 1000)")
+    p.add_argument('--length', type=int, default=3, help="utterance length in seconds (default: 3)")
+    p.add_argument('--format', default='wav', help="output format (default: wav)")
+    p.set_defaults(func=cmd_pipeline)
+
+    features = argparse.ArgumentParser(add_help=False)
+    features.add_argument('--n-mfcc', type=int,
+                          help="number of MFCCs (enroll default: 22, identify default: as enrolled)")
+    features.add_argument('--dmfcc', action='store_true', help="append delta MFCCs")
+    features.add_argument('--ddmfcc', action='store_true', help="append delta-delta MFCCs")
+
+    p = subparsers.add_parser('enroll', parents=[common, features],
+                              help="enroll every speaker folder of a training set")
+    p.add_argument('training', help="training set with one sub-folder per speaker")
+    p.add_argument('destination', help="models directory")
+    p.add_argument('--utterances', type=int, help="utterances sampled per speaker (default: all)")
+    p.add_argument('--components', type=int, default=5, help="GMM (or UBM) components (default: 5)")
+    p.add_argument('--cache-dir', help="persistent feature cache directory")
+    p.add_argument('--bank', action='store_true', help="store the models in a single model bank file")
+    p.add_argument('--ubm', action='store_true', help="train a UBM and MAP-adapt every speaker from it")
+    p.add_argument('--relevance-factor', type=float, default=16.0, help="MAP relevance factor (default: 16)")
+    p.add_argument('--force', action='store_true',
+                   help="retrain every speaker, not only those whose folders changed")
+    p.add_argument('--index', action='store_true',
+                   help="build or update the speaker search index used by identify --candidates")
+    p.set_defaults(func=cmd_enroll)
+
+    p = subparsers.add_parser('identify', parents=[common, features],
+                              help="identify the speaker of audio files")
+    p.add_argument('models', help="models directory")
+    p.add_argument('inputs', nargs='+', help="audio files or folders")
+    p.add_argument('--top-k', type=int, default=1, help="speakers listed per file (default: 1)")
+    p.add_argument('--shard', metavar='INDEX/COUNT',
+                   help="only process every COUNT-th file starting at INDEX (0-based)")
+    p.add_argument('--candidates', type=int,
+                   help="score only this many speakers retrieved from the speaker search index")
+    p.set_defaults(func=cmd_identify)
+
+    p = subparsers.add_parser('evaluate', parents=[common, features],
+                              help="identify a labelled test set and report accuracy, EER and speed")
+    p.add_argument('models', help="models directory")
+    p.add_argument('test', help="test set with one sub-folder per speaker, like the training set")
+    p.add_argument('--top-k', type=int, default=5, help="k of the top-k accuracy (default: 5)")
+    p.add_argument('--confusion', metavar='CSV', help="write the confusion matrix to this file")
+    p.add_argument('--predictions', metavar='CSV', help="write the identified speaker of every file to this file")
+    p.add_argument('--candidates', type=int,
+                   help="also measure the pruned search with this many centroid-shortlisted candidates")
+    p.add_argument('--index', action='store_true',
+                   help="shortlist the --candidates with the speaker search index instead of centroids")
+    p.set_defaults(func=cmd_evaluate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
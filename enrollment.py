@@ -0,0 +1,347 @@
+import os
+import zlib
+import pickle
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from sklearn.mixture import GaussianMixture
+from audio_frontend import extract_file_features
+from feature_cache import FeatureCache
+from gmm_scoring import diagonal_parameters
+from manifest import Manifest, file_fingerprint, folder_fingerprint
+from model_store import BANK_FILENAME, ModelBank
+from speaker_index import INDEX_FILENAME, build_speaker_index
+from ubm import UBM_FILENAME, train_ubm, map_adapt, save_ubm, load_ubm
+
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac')
+
+# Feature caches opened by this process, keyed by (directory, size cap)
+_feature_caches = {}
+
+# Speakers buffered in memory between model bank index writes
+BANK_FLUSH_EVERY = 64
+
+# Frames each speaker contributes to the background model training set
+UBM_FRAMES_PER_SPEAKER = 2000
+
+# Manifest key of the background model
+UBM_KEY = '__ubm__'
+
+
+def list_audio_files(folder):
+    """Audio file names directly inside a folder, in a stable order."""
+    return sorted(f for f in os.listdir(folder) if f.lower().endswith(AUDIO_EXTENSIONS))
+
+
+def list_speakers(training_path):
+    """Speaker sub-folders of a training set directory."""
+    return sorted(d for d in os.listdir(training_path)
+                  if os.path.isdir(os.path.join(training_path, d)))
+
+
+def speaker_rng(speaker, seed=0):
+    """Random state for one speaker that does not depend on processing order."""
+    return np.random.RandomState((zlib.crc32(speaker.encode('utf-8')) + seed) % 2**32)
+
+
+def feature_cache(cache_dir, max_bytes=None):
+    """Shared FeatureCache instance of this process for a cache directory."""
+    key = (cache_dir, max_bytes)
+    if key not in _feature_caches:
+        kwargs = {'max_bytes': max_bytes} if max_bytes else {}
+        _feature_caches[key] = FeatureCache(cache_dir, **kwargs)
+    return _feature_caches[key]
+
+
+def extract_features(audio_path, n_mfcc=22, use_dmfcc=False, use_ddmfcc=False, cache=None):
+    """Extract MFCC features from an audio file, through ``cache`` when given.
+
+    Features are float32 either way, the precision the cache stores, so
+    enabling the cache does not change the models fitted on them.
+    """
+    try:
+        if cache is None:
+            return np.asarray(extract_file_features(audio_path, n_mfcc, use_dmfcc, use_ddmfcc),
+                              dtype=np.float32)
+        params = {'n_mfcc': n_mfcc, 'use_dmfcc': use_dmfcc, 'use_ddmfcc': use_ddmfcc,
+                  'sr': 'native', 'n_fft': 2048, 'hop_length': 512}
+        return cache.get_or_compute(
+            audio_path, params,
+            lambda: extract_file_features(audio_path, n_mfcc, use_dmfcc, use_ddmfcc))
+    except Exception as e:
+        raise Exception(f"Error processing {audio_path}: {str(e)}")
+
+
+def process_speaker(speaker_folder, num_utterances, n_mfcc, use_dmfcc, use_ddmfcc, rng=None,
+                    cache=None):
+    """Stack the features of a speaker's recordings, sampling ``num_utterances`` of them."""
+    audio_files = list_audio_files(speaker_folder)
+
+    if num_utterances and num_utterances < len(audio_files):
+        rng = rng if rng is not None else np.random
+        audio_files = rng.choice(audio_files, num_utterances, replace=False)
+
+    all_features = [extract_features(os.path.join(speaker_folder, f), n_mfcc, use_dmfcc, use_ddmfcc,
+                                     cache=cache)
+                    for f in audio_files]
+
+    if not all_features:
+        raise Exception("No valid audio files found")
+    return np.vstack(all_features).astype(np.float64)
+
+
+def train_gmm(features, n_components=5, covariance_type='diag'):
+    """Train a GMM model on the extracted features."""
+    gmm = GaussianMixture(n_components=n_components, covariance_type=covariance_type, random_state=42)
+    gmm.fit(features)
+    return gmm
+
+
+def save_model(gmm, model_path):
+    with open(model_path, 'wb') as f:
+        pickle.dump(gmm, f)
+
+
+def feature_config(params):
+    """Feature-extraction settings recorded alongside enrolled models."""
+    return {'n_mfcc': params['n_mfcc'], 'use_dmfcc': params['use_dmfcc'],
+            'use_ddmfcc': params['use_ddmfcc'], 'sr': 'native', 'n_fft': 2048, 'hop_length': 512}
+
+
+def n_features(params):
+    return params['n_mfcc'] * (1 + bool(params['use_dmfcc']) + bool(params['use_ddmfcc']))
+
+
+def enrollment_params(params):
+    """Settings a speaker model depends on, as recorded in the manifest."""
+    keys = ('n_mfcc', 'use_dmfcc', 'use_ddmfcc', 'n_components', 'num_utterances', 'seed',
+            'model_bank', 'ubm', 'ubm_frames_per_speaker')
+    recorded = {k: params.get(k) for k in keys}
+    if params.get('ubm'):
+        recorded['relevance_factor'] = params.get('relevance_factor', 16.0)
+    return recorded
+
+
+def speaker_fingerprint(training_path, speaker):
+    folder = os.path.join(training_path, speaker)
+    return folder_fingerprint(folder, list_audio_files(folder))
+
+
+def speaker_key(training_path, speaker):
+    return 'speaker:' + os.path.abspath(os.path.join(training_path, speaker))
+
+
+def speaker_outputs(dest_path, speaker, params):
+    if params.get('model_bank'):
+        return [os.path.abspath(os.path.join(dest_path, BANK_FILENAME))]
+    return [os.path.abspath(os.path.join(dest_path, f"{speaker}.gmm"))]
+
+
+def speaker_features(speaker, training_path, params):
+    """Features of one speaker's enrollment utterances and the cache hits/misses they caused."""
+    cache = None
+    if params.get('cache_dir'):
+        cache = feature_cache(params['cache_dir'], params.get('cache_max_bytes'))
+        before = cache.stats
+
+    features = process_speaker(
+        os.path.join(training_path, speaker),
+        params['num_utterances'],
+        params['n_mfcc'],
+        params['use_dmfcc'],
+        params['use_ddmfcc'],
+        rng=speaker_rng(speaker, params.get('seed', 0)),
+        cache=cache)
+
+    cache_stats = {}
+    if cache is not None:
+        after = cache.stats
+        cache_stats = {k: after[k] - before[k] for k in ('hits', 'misses', 'evictions')}
+    return features, cache_stats
+
+
+def sample_speaker_frames(speaker, training_path, params):
+    """Random subset of a speaker's frames for background model training."""
+    features, cache_stats = speaker_features(speaker, training_path, params)
+    limit = params.get('ubm_frames_per_speaker', UBM_FRAMES_PER_SPEAKER)
+    if len(features) > limit:
+        rng = speaker_rng(speaker, params.get('seed', 0) + 1)
+        features = features[np.sort(rng.choice(len(features), limit, replace=False))]
+    return speaker, cache_stats, np.asarray(features, dtype=np.float32)
+
+
+def enroll_speaker(speaker, training_path, dest_path, params, ubm=None):
+    """Extract features, fit and save the model of one speaker.
+
+    Module-level so it can run in worker processes. With a background model
+    ``ubm`` the speaker model is MAP-adapted from it instead of fitted with EM.
+    Returns the speaker name, the feature cache hits/misses it caused and,
+    when ``params['model_bank']`` is set, the model parameters for the caller
+    to write into the bank (instead of a ``.gmm`` file).
+    """
+    features, cache_stats = speaker_features(speaker, training_path, params)
+    if ubm is not None:
+        gmm = map_adapt(ubm, features, params.get('relevance_factor', 16.0))
+    else:
+        gmm = train_gmm(features, params['n_components'])
+    model_params = None
+    if params.get('model_bank'):
+        model_params = diagonal_parameters(gmm)
+    else:
+        save_model(gmm, os.path.join(dest_path, f"{speaker}.gmm"))
+    return speaker, cache_stats, model_params
+
+
+def _run_speakers(function, speakers, args, workers, finished):
+    """Call ``function(speaker, *args)`` for every speaker, in-process or over a process pool."""
+    if workers <= 1:
+        for i, speaker in enumerate(speakers, 1):
+            finished(i, function(speaker, *args))
+        return
+    # Spawned workers only import this module, never the Tk process state
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(function, speaker, *args) for speaker in speakers]
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                finished(done, future.result())
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def enroll_speakers(training_path, dest_path, params, workers=1, progress=None):
+    """Enroll every speaker folder under ``training_path``.
+
+    With ``workers > 1`` speakers are fanned out over a process pool. Each
+    speaker draws its utterances from its own seeded random state, so the
+    written models do not depend on the worker count or completion order.
+    ``progress(done, total)`` is called after every finished speaker. With
+    ``params['model_bank']`` the models are added to ``speakers.bank`` in
+    ``dest_path`` instead of one pickle per speaker. With ``params['ubm']`` a
+    background model is first trained on frames pooled from all speakers and
+    saved as ``ubm.npz``, and every speaker is MAP-adapted from it (features
+    are extracted twice, so a feature cache is recommended). Without it, a
+    UBM left in ``dest_path`` by an earlier run is removed.
+
+    With ``params['skip_unchanged']`` a manifest in ``dest_path`` records the
+    files of every enrolled speaker folder and the settings used, and only
+    speakers whose folders changed since (or that are missing from the
+    destination) are enrolled again. An existing background model trained
+    with the same settings is reused, so adding speakers only adapts them.
+    With ``params['speaker_index']``, or when ``dest_path`` already has
+    one, the speaker search index is then brought up to date (see ``build_speaker_index``).
+    Returns the enrolled and skipped speakers and the summed feature cache
+    statistics.
+    """
+    speakers = list_speakers(training_path)
+    cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+    ubm_path = os.path.join(dest_path, UBM_FILENAME)
+
+    manifest = None
+    recorded_params = enrollment_params(params)
+    if params.get('skip_unchanged'):
+        manifest = Manifest.for_directory(dest_path)
+
+    ubm = None
+    if (manifest is not None and params.get('ubm')
+            and manifest.is_current(UBM_KEY, {}, recorded_params)):
+        ubm = load_ubm(ubm_path)
+    elif params.get('ubm'):
+        total = len(speakers)
+        samples = []
+
+        def sampled(done, result):
+            speaker, speaker_cache_stats, frames = result
+            for k, v in speaker_cache_stats.items():
+                cache_stats[k] += v
+            samples.append((speaker, frames))
+            if progress:
+                progress(done, 2 * total)
+
+        _run_speakers(sample_speaker_frames, speakers, (training_path, params), workers, sampled)
+        # Pool in speaker order so the background model does not depend on completion order
+        pooled = np.vstack([frames for _, frames in sorted(samples, key=lambda s: s[0])])
+        ubm = train_ubm(pooled.astype(np.float64), params['n_components'])
+        save_ubm(ubm, ubm_path, feature_config(params))
+        if manifest is not None:
+            manifest.record(UBM_KEY, {}, recorded_params, [os.path.abspath(ubm_path)])
+
+    if not params.get('ubm') and os.path.exists(ubm_path):
+        # The models written now are not adapted from it; a stale UBM would still be picked up
+        # for scoring, feature settings and on-the-fly adaptation
+        os.remove(ubm_path)
+
+    if ubm is not None:
+        # Speakers adapted from an earlier background model must be adapted again
+        recorded_params['ubm_file'] = file_fingerprint(ubm_path)
+
+    bank = None
+    pending = []
+    bank_path = os.path.join(dest_path, BANK_FILENAME)
+    if params.get('model_bank'):
+        bank = ModelBank.open_or_create(bank_path, n_features(params), feature_config(params))
+    # Bank entries shadow .gmm files, so retrained speakers must leave an existing bank
+    shadowing_bank = ModelBank(bank_path) if bank is None and os.path.exists(bank_path) else None
+    unshadow = []
+
+    skipped = []
+    fingerprints = {}
+    if manifest is not None:
+        pending_speakers = []
+        for speaker in speakers:
+            fingerprints[speaker] = speaker_fingerprint(training_path, speaker)
+            if (manifest.is_current(speaker_key(training_path, speaker), fingerprints[speaker],
+                                    recorded_params)
+                    and (bank is None or speaker in bank)):
+                skipped.append(speaker)
+            else:
+                pending_speakers.append(speaker)
+        speakers = pending_speakers
+    total = len(speakers)
+
+    def finished(done, result):
+        speaker, speaker_cache_stats, model_params = result
+        for k, v in speaker_cache_stats.items():
+            cache_stats[k] += v
+        if bank is not None:
+            pending.append((speaker,) + tuple(model_params))
+            if len(pending) >= BANK_FLUSH_EVERY or done == total:
+                bank.put_many(pending)
+                pending.clear()
+        elif shadowing_bank is not None and speaker in shadowing_bank:
+            unshadow.append(speaker)
+        if manifest is not None:
+            # A bank record is only trusted while the speaker is in the bank, so recording
+            # before the buffered models are flushed is safe
+            manifest.record(speaker_key(training_path, speaker), fingerprints[speaker],
+                            recorded_params, speaker_outputs(dest_path, speaker, params))
+        if progress:
+            if ubm is not None:
+                progress(total + done, 2 * total)
+            else:
+                progress(done, total)
+
+    try:
+        _run_speakers(enroll_speaker, speakers, (training_path, dest_path, params, ubm),
+                      workers, finished)
+    finally:
+        # Keep the speakers that did finish if enrollment stops early
+        if bank is not None and pending:
+            bank.put_many(pending)
+        if unshadow:
+            shadowing_bank.remove_many(unshadow)
+        if manifest is not None:
+            manifest.close()
+
+    for store in (bank, shadowing_bank):
+        if store is not None and store.needs_compaction():
+            store.compact()
+    if params.get('speaker_index') or os.path.exists(os.path.join(dest_path, INDEX_FILENAME)):
+        # An existing index is kept up to date, or the new speakers could never be shortlisted.
+        # Skipped speakers keep their vectors; a full run re-indexes every model
+        build_speaker_index(dest_path, speakers if manifest is not None else None,
+                            params.get('relevance_factor', 16.0))
+    return {'speakers': speakers, 'skipped': skipped, 'cache': cache_stats}
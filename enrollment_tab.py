@@ -2,10 +2,8 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 import numpy as np
-import librosa
 import soundfile as sf
-from sklearn.mixture import GaussianMixture
-import pickle
+from enrollment import enroll_speakers
 import threading
 from queue import Queue
 import time
@@ -21,6 +19,14 @@ class EnrollmentTab(ttk.Frame):
         self.use_dmfcc = tk.BooleanVar()
         self.use_ddmfcc = tk.BooleanVar()
         self.n_components = tk.IntVar(value=5)
+        self.workers = tk.IntVar(value=1)
+        self.use_feature_cache = tk.BooleanVar(value=False)
+        self.use_model_bank = tk.BooleanVar(value=False)
+        self.feature_cache_path = tk.StringVar(value="Feature Cache")
+        self.use_ubm = tk.BooleanVar(value=False)
+        self.skip_unchanged = tk.BooleanVar(value=True)
+        self.build_index = tk.BooleanVar(value=False)
+        self.relevance_factor = tk.StringVar(value="16")
         self.processing = False
         self.queue = Queue()
         
@@ -78,12 +84,39 @@ class EnrollmentTab(ttk.Frame):
         ttk.Entry(mfcc_frame, textvariable=self.mfcc_features, width=10).pack(side='left', padx=5)
         
         
+        workers_frame = ttk.Frame(params_frame)
+        workers_frame.pack(fill='x', pady=2)
+        ttk.Label(workers_frame, text="Worker Processes:").pack(side='left', padx=5)
+        ttk.Entry(workers_frame, textvariable=self.workers, width=10).pack(side='left', padx=5)
+        
+        
         ttk.Checkbutton(params_frame, text="Use DMFCC", variable=self.use_dmfcc).pack(fill='x', pady=2)
         
         
         ttk.Checkbutton(params_frame, text="Use DDMFCC", variable=self.use_ddmfcc).pack(fill='x', pady=2)
         
         
+        ubm_frame = ttk.Frame(params_frame)
+        ubm_frame.pack(fill='x', pady=2)
+        ttk.Checkbutton(ubm_frame, text="GMM-UBM (MAP adaptation)", variable=self.use_ubm).pack(side='left')
+        ttk.Label(ubm_frame, text="Relevance Factor:").pack(side='left', padx=5)
+        ttk.Entry(ubm_frame, textvariable=self.relevance_factor, width=10).pack(side='left', padx=5)
+        
+        
+        ttk.Checkbutton(params_frame, text="Save as Model Bank (single file)",
+                        variable=self.use_model_bank).pack(fill='x', pady=2)
+        ttk.Checkbutton(params_frame, text="Only Retrain Changed Speakers",
+                        variable=self.skip_unchanged).pack(fill='x', pady=2)
+        ttk.Checkbutton(params_frame, text="Build Speaker Search Index",
+                        variable=self.build_index).pack(fill='x', pady=2)
+        
+        
+        cache_frame = ttk.Frame(params_frame)
+        cache_frame.pack(fill='x', pady=2)
+        ttk.Checkbutton(cache_frame, text="Use Feature Cache", variable=self.use_feature_cache).pack(side='left')
+        ttk.Entry(cache_frame, textvariable=self.feature_cache_path, width=30).pack(side='left', padx=5)
+        
+        
         progress_frame = ttk.LabelFrame(main_frame, text="Progress", padding="5 5 5 5")
         progress_frame.pack(fill='x', padx=5, pady=5)
         
@@ -96,67 +129,6 @@ class EnrollmentTab(ttk.Frame):
         
         ttk.Button(main_frame, text="Enroll Speakers", command=self.start_enrollment).pack(pady=10)
 
-    def extract_features(self, audio_path, n_mfcc=22, use_dmfcc=False, use_ddmfcc=False):
-        """Extract MFCC features from an audio file."""
-        try:
-            
-            y, sr = librosa.load(audio_path, sr=None)
-            
-            
-            mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
-            features = [mfccs]
-            
-            if use_dmfcc:
-                
-                dmfcc = librosa.feature.delta(mfccs)
-                features.append(dmfcc)
-                
-            if use_ddmfcc:
-                
-                ddmfcc = librosa.feature.delta(mfccs, order=2)
-                features.append(ddmfcc)
-            
-            
-            combined_features = np.vstack(features)
-            
-            
-            return combined_features.T
-            
-        except Exception as e:
-            raise Exception(f"Error processing {audio_path}: {str(e)}")
-    
-    def process_speaker(self, speaker_folder, num_utterances, n_mfcc, use_dmfcc, use_ddmfcc):
-        """Process a single speaker's recordings."""
-        all_features = []
-        
-        
-        audio_files = [f for f in os.listdir(speaker_folder) 
-                      if f.lower().endswith(('.wav', '.mp3', '.flac'))]
-        
-        
-        if num_utterances and num_utterances < len(audio_files):
-            audio_files = np.random.choice(audio_files, num_utterances, replace=False)
-        
-        
-        for audio_file in audio_files:
-            file_path = os.path.join(speaker_folder, audio_file)
-            features = self.extract_features(file_path, n_mfcc, use_dmfcc, use_ddmfcc)
-            all_features.append(features)
-        
-        
-        if all_features:
-            combined_features = np.vstack(all_features)
-            return combined_features
-        else:
-            raise Exception("No valid audio files found")
-    
-    def train_gmm(self, features, covariance_type='diag'):
-        # To revisit later for making covariance_type a hyperparameter in the GUI
-        """Train a GMM model on the extracted features."""
-        gmm = GaussianMixture(n_components=self.n_components.get(), covariance_type=covariance_type, random_state=42)
-        gmm.fit(features)
-        return gmm
-    
     def enrollment_thread(self):
         """Background thread for processing enrollment."""
         try:
@@ -168,35 +140,25 @@ class EnrollmentTab(ttk.Frame):
             num_utterances = int(self.num_utterances.get()) if self.num_utterances.get() else None
             
             
-            speaker_folders = [d for d in os.listdir(training_path) 
-                             if os.path.isdir(os.path.join(training_path, d))]
+            params = {
+                'num_utterances': num_utterances,
+                'n_mfcc': n_mfcc,
+                'use_dmfcc': use_dmfcc,
+                'use_ddmfcc': use_ddmfcc,
+                'n_components': self.n_components.get(),
+                'cache_dir': self.feature_cache_path.get() if self.use_feature_cache.get() else None,
+                'model_bank': self.use_model_bank.get(),
+                'ubm': self.use_ubm.get(),
+                'relevance_factor': float(self.relevance_factor.get()),
+                'skip_unchanged': self.skip_unchanged.get(),
+                'speaker_index': self.build_index.get(),
+            }
             
-            total_speakers = len(speaker_folders)
+            summary = enroll_speakers(training_path, dest_path, params,
+                            workers=max(1, self.workers.get()),
+                            progress=lambda done, total: self.queue.put(('progress', done, total)))
             
-            for i, speaker in enumerate(speaker_folders, 1):
-                speaker_path = os.path.join(training_path, speaker)
-                
-                
-                self.queue.put(('progress', i, total_speakers))
-                
-                
-                features = self.process_speaker(
-                    speaker_path, 
-                    num_utterances,
-                    n_mfcc,
-                    use_dmfcc,
-                    use_ddmfcc
-                )
-                
-                
-                gmm = self.train_gmm(features)
-                
-                
-                model_path = os.path.join(dest_path, f"{speaker}.gmm")
-                with open(model_path, 'wb') as f:
-                    pickle.dump(gmm, f)
-            
-            self.queue.put(('complete', None, None))
+            self.queue.put(('complete', summary, None))
             
         except Exception as e:
             self.queue.put(('error', str(e), None))
@@ -210,10 +172,20 @@ class EnrollmentTab(ttk.Frame):
                 if msg_type == 'progress':
                     progress = (value / total) * 100
                     self.progress_bar['value'] = progress
-                    self.progress_label['text'] = f"Processing speaker {value}/{total}"
+                    if self.use_ubm.get():
+                        stage = "Sampling background frames" if value <= total // 2 else "Adapting speaker"
+                        self.progress_label['text'] = f"{stage} {value}/{total}"
+                    else:
+                        self.progress_label['text'] = f"Processing speaker {value}/{total}"
                 elif msg_type == 'complete':
                     self.progress_bar['value'] = 100
                     self.progress_label['text'] = "Enrollment complete!"
+                    if value['skipped']:
+                        self.progress_label['text'] += f" {len(value['skipped'])} unchanged speakers skipped."
+                    if self.use_feature_cache.get():
+                        cache = value['cache']
+                        self.progress_label['text'] += (
+                            f" Feature cache: {cache['hits']} hits, {cache['misses']} misses")
                     messagebox.showinfo("Success", "Speaker enrollment completed successfully!")
                     self.processing = False
                     return
@@ -245,6 +217,12 @@ class EnrollmentTab(ttk.Frame):
         except ValueError:
             messagebox.showerror("Error", "Number of MFCC features must be a valid integer")
             return
+        
+        try:
+            float(self.relevance_factor.get())
+        except ValueError:
+            messagebox.showerror("Error", "Relevance factor must be a number")
+            return
             
         
         self.processing = True
@@ -0,0 +1,215 @@
+import os
+import csv
+import time
+import numpy as np
+import soundfile as sf
+import librosa
+from audio_frontend import extract_file_features
+from batch_jobs import run_batch
+from enrollment import list_speakers, list_audio_files
+from model_store import load_scorer
+from pruned_scoring import CentroidIndex
+from speaker_index import INDEX_FILENAME, find_speaker_index
+
+
+# Upper bound on the frames scored in one call, summed over utterances
+MAX_SCORING_FRAMES = 200_000
+
+
+def list_test_set(test_path):
+    """(file path, speaker) of every utterance in a test set laid out like a training set."""
+    utterances = []
+    for speaker in list_speakers(test_path):
+        folder = os.path.join(test_path, speaker)
+        utterances.extend((os.path.join(folder, f), speaker) for f in list_audio_files(folder))
+    return utterances
+
+
+def utterance_features(audio_path, n_mfcc=22, use_dmfcc=False, use_ddmfcc=False):
+    """Features of one test utterance and its duration in seconds."""
+    try:
+        duration = sf.info(audio_path).duration
+    except Exception:
+        duration = librosa.get_duration(path=audio_path)
+    return extract_file_features(audio_path, n_mfcc, use_dmfcc, use_ddmfcc), duration
+
+
+def _batches(lengths, max_frames):
+    """[start, stop) ranges of consecutive utterances with at most ``max_frames`` frames (or one utterance)."""
+    start, n_frames = 0, 0
+    for i, length in enumerate(lengths):
+        if i > start and n_frames + length > max_frames:
+            yield start, i
+            start, n_frames = i, 0
+        n_frames += length
+    if start < len(lengths):
+        yield start, len(lengths)
+
+
+def score_utterances(scorer, features):
+    """Average log-likelihood of every utterance under every model, shape (utterances, speakers).
+
+    Utterances are stacked so each scorer call evaluates many of them at once.
+    """
+    lengths = np.array([len(f) for f in features])
+    scores = np.empty((len(features), len(scorer)))
+    for start, stop in _batches(lengths, MAX_SCORING_FRAMES):
+        frame_scores = scorer.frame_scores(np.vstack(features[start:stop]))
+        offsets = np.concatenate([[0], np.cumsum(lengths[start:stop])[:-1]])
+        scores[start:stop] = np.add.reduceat(frame_scores, offsets, axis=0) / lengths[start:stop, np.newaxis]
+    return scores
+
+
+def equal_error_rate(scores, targets):
+    """EER over all (utterance, model) trials; ``targets`` marks the true speaker of each row.
+
+    Each utterance's scores are centred on their mean over all models first,
+    so thresholds are comparable between utterances of different lengths and
+    recording conditions.
+    """
+    normalized = scores - scores.mean(axis=1, keepdims=True)
+    target_scores = np.sort(normalized[targets])
+    nontarget_scores = np.sort(normalized[~targets])
+    if not len(target_scores) or not len(nontarget_scores):
+        return float('nan')
+    thresholds = np.concatenate([target_scores, nontarget_scores])
+    false_rejections = np.searchsorted(target_scores, thresholds, side='left') / len(target_scores)
+    false_acceptances = 1 - np.searchsorted(nontarget_scores, thresholds, side='left') / len(nontarget_scores)
+    i = np.argmin(np.abs(false_rejections - false_acceptances))
+    return float((false_rejections[i] + false_acceptances[i]) / 2)
+
+
+def evaluate(models_dir, test_path, workers=1, top_k=5, progress=None, top_c=5, feature_params=None,
+             n_candidates=None, shortlist='centroid'):
+    """Identify every utterance of a test set and measure accuracy and speed.
+
+    Features are extracted over ``workers`` processes with the settings the
+    models were enrolled with (or ``feature_params``), then scored against
+    all models in batches. Utterances of speakers without a model are
+    counted in ``unenrolled`` and left out of the metrics. Returns a report
+    with accuracy, top-k accuracy, EER, the confusion matrix (rows: true
+    speaker, columns: identified speaker, both in ``speakers`` order),
+    throughput in utterances per second and the real-time factor (processing
+    time over audio duration).
+
+    With ``n_candidates`` the report also measures the pruned search of the
+    real-time tab against exhaustive scoring: how often the true speaker
+    makes the centroid shortlist, the accuracy when only the shortlist is
+    fully scored and how often that agrees with exhaustive scoring. With
+    ``shortlist='index'`` the shortlist comes from the speaker search index
+    of ``models_dir`` instead.
+    """
+    scorer, config = load_scorer(models_dir, top_c)
+    if not len(scorer):
+        raise ValueError(f"No speaker models found in {models_dir}")
+    config = dict(config or {}, **(feature_params or {}))
+    speaker_index = {speaker: i for i, speaker in enumerate(scorer.speakers)}
+
+    utterances = list_test_set(test_path)
+    enrolled = [(path, speaker) for path, speaker in utterances if speaker in speaker_index]
+    labels = dict(enrolled)
+
+    start_time = time.perf_counter()
+    summary = run_batch(utterance_features, [path for path, _ in enrolled],
+                        (config.get('n_mfcc', 22), config.get('use_dmfcc', False), config.get('use_ddmfcc', False)),
+                        workers=workers, progress=progress)
+    extraction_seconds = time.perf_counter() - start_time
+
+    files = [path for path, _ in enrolled if path in summary['results']]
+    features = [summary['results'][path][0] for path in files]
+    duration = sum(summary['results'][path][1] for path in files)
+    truth = np.array([speaker_index[labels[path]] for path in files], dtype=int)
+
+    start_time = time.perf_counter()
+    scores = score_utterances(scorer, features) if files else np.empty((0, len(scorer)))
+    scoring_seconds = time.perf_counter() - start_time
+
+    n_speakers = len(scorer)
+    ranking = np.argsort(-scores, axis=1)
+    predicted = ranking[:, 0] if len(files) else np.empty(0, dtype=int)
+    k = min(top_k, n_speakers)
+    in_top_k = (ranking[:, :k] == truth[:, np.newaxis]).any(axis=1)
+    confusion = np.zeros((n_speakers, n_speakers), dtype=int)
+    np.add.at(confusion, (truth, predicted), 1)
+    targets = np.zeros(scores.shape, dtype=bool)
+    targets[np.arange(len(files)), truth] = True
+
+    total_seconds = extraction_seconds + scoring_seconds
+    report = {
+        'speakers': list(scorer.speakers),
+        'utterances': len(files),
+        'unenrolled': len(utterances) - len(enrolled),
+        'errors': summary['errors'],
+        'accuracy': float(np.mean(predicted == truth)) if len(files) else float('nan'),
+        'top_k': k,
+        'top_k_accuracy': float(np.mean(in_top_k)) if len(files) else float('nan'),
+        'eer': equal_error_rate(scores, targets),
+        'confusion': confusion,
+        'files': files,
+        'truth': [labels[path] for path in files],
+        'predicted': [scorer.speakers[i] for i in predicted],
+        'audio_seconds': duration,
+        'extraction_seconds': extraction_seconds,
+        'scoring_seconds': scoring_seconds,
+        'utterances_per_second': len(files) / total_seconds if total_seconds else float('nan'),
+        'real_time_factor': total_seconds / duration if duration else float('nan'),
+    }
+    if n_candidates:
+        if shortlist == 'index':
+            speaker_search = find_speaker_index(models_dir)
+            if speaker_search is None:
+                raise ValueError(f"No speaker index ({INDEX_FILENAME}) found in {models_dir}")
+            missing = speaker_search.missing(scorer.speakers)
+            if missing:
+                raise ValueError(f"Speaker index of {models_dir} misses {len(missing)} of the enrolled speakers "
+                                 f"(e.g. {missing[0]}); update it with enroll --index")
+            index = speaker_search.ranker(scorer)
+        else:
+            index = CentroidIndex(scorer)
+        shortlists = [index.top(f, n_candidates) for f in features]
+        pruned = np.array([candidates[np.argmax(scores[i, candidates])]
+                           for i, candidates in enumerate(shortlists)], dtype=int)
+        report.update(
+            shortlist=shortlist,
+            candidates=min(n_candidates, n_speakers),
+            candidate_recall=float(np.mean([t in candidates for t, candidates in zip(truth, shortlists)]))
+            if len(files) else float('nan'),
+            pruned_accuracy=float(np.mean(pruned == truth)) if len(files) else float('nan'),
+            pruned_agreement=float(np.mean(pruned == predicted)) if len(files) else float('nan'))
+
+    return report
+
+
+def write_confusion_csv(report, path):
+    """Confusion matrix as CSV, true speakers down the first column."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['true \\ identified'] + report['speakers'])
+        for speaker, row in zip(report['speakers'], report['confusion']):
+            writer.writerow([speaker] + [int(count) for count in row])
+
+
+def write_predictions_csv(report, path):
+    """Identified speaker of every scored utterance."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['file', 'true', 'identified'])
+        writer.writerows(zip(report['files'], report['truth'], report['predicted']))
+
+
+def format_report(report):
+    lines = [
+        f"Utterances:        {report['utterances']} ({report['unenrolled']} of unenrolled speakers skipped, "
+        f"{len(report['errors'])} failed)",
+        f"Accuracy:          {report['accuracy']:.2%}",
+        f"Top-{report['top_k']} accuracy:    {report['top_k_accuracy']:.2%}",
+        f"EER:               {report['eer']:.2%}",
+        f"Throughput:        {report['utterances_per_second']:.1f} utterances/s "
+        f"(features {report['extraction_seconds']:.1f} s, scoring {report['scoring_seconds']:.1f} s)",
+        f"Real-time factor:  {report['real_time_factor']:.4f} ({report['audio_seconds']:.0f} s of audio)",
+    ]
+    if 'candidates' in report:
+        lines.append(f"Pruned search:     {report['candidates']} {report['shortlist']} candidates, "
+                     f"true speaker shortlisted {report['candidate_recall']:.2%}, accuracy {report['pruned_accuracy']:.2%}, "
+                     f"agreement with exhaustive {report['pruned_agreement']:.2%}")
+    return "\n".join(lines)
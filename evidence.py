@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class EvidenceAccumulator:
+    """Running per-speaker log-likelihood evidence built from frame-level scores.
+
+    Each tick adds the (n_frames, n_speakers) log-likelihoods of only the
+    newly arrived frames, so its cost is proportional to the new frames, not
+    to the evidence span. In ``'window'`` mode the evidence is the sum over
+    the last ``span_frames`` frames (a ring of past rows is kept to subtract
+    the frames that leave), and ``scores`` equals ``GaussianMixture.score``
+    of those frames. In ``'decay'`` mode older frames are down-weighted
+    exponentially with a half-life of ``span_frames``, without any history.
+    ``scores`` is the average log-likelihood per (weighted) frame, comparable
+    between ticks whatever the number of frames.
+    """
+
+    def __init__(self, n_speakers, span_frames=300, mode='window'):
+        if mode not in ('window', 'decay'):
+            raise ValueError(f"Unknown evidence mode '{mode}', expected 'window' or 'decay'")
+        self.n_speakers = n_speakers
+        self.span_frames = max(1, int(span_frames))
+        self.mode = mode
+        self.decay = 0.5 ** (1.0 / self.span_frames)
+        self.reset()
+
+    def reset(self):
+        self.sums = np.zeros(self.n_speakers)
+        self.weight = 0.0
+        self.count = 0
+        if self.mode == 'window':
+            self.history = np.zeros((self.span_frames, self.n_speakers))
+            self._since_resum = 0
+
+    def add(self, frame_scores):
+        """Fold the log-likelihoods of new frames, shape (n_frames, n_speakers), into the evidence."""
+        frame_scores = np.atleast_2d(frame_scores)
+        n = len(frame_scores)
+        if n == 0:
+            return
+        if self.mode == 'decay':
+            weights = self.decay ** np.arange(n - 1, -1, -1)
+            self.sums = self.decay ** n * self.sums + weights @ frame_scores
+            self.weight = self.decay ** n * self.weight + weights.sum()
+            self.count += n
+            return
+
+        if n >= self.span_frames:
+            frame_scores = frame_scores[-self.span_frames:]
+            self.count += n - len(frame_scores)
+            n = len(frame_scores)
+        positions = (self.count + np.arange(n)) % self.span_frames
+        if self.count + n > self.span_frames:
+            leaving = positions[max(0, self.span_frames - self.count):]
+            self.sums -= self.history[leaving].sum(axis=0)
+        self.history[positions] = frame_scores
+        self.sums += frame_scores.sum(axis=0)
+        self.count += n
+        self.weight = min(self.count, self.span_frames)
+
+        # Re-add the ring now and then so rounding errors of the running sum do not build up
+        self._since_resum += n
+        if self._since_resum >= self.span_frames:
+            self.sums = self.history[:int(self.weight)].sum(axis=0)
+            self._since_resum = 0
+
+    def scores(self):
+        """Average log-likelihood per speaker over the evidence, or None before any frame."""
+        if self.weight == 0:
+            return None
+        return self.sums / self.weight
@@ -0,0 +1,124 @@
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+
+
+# Bump when the feature extraction itself changes so stale entries are never reused
+FEATURE_VERSION = 1
+
+
+class FeatureCache:
+    """Persistent on-disk cache of per-file feature matrices.
+
+    Entries are keyed by the source file (absolute path, size and mtime, or its
+    content hash with ``hash_contents=True``) together with the extraction
+    parameters, and stored as float32 ``.npy`` files that are opened
+    memory-mapped. Writes go through a temporary file and ``os.replace`` so
+    several processes can share one cache directory. When the cache grows past
+    ``max_bytes`` the least recently used entries (oldest mtime, refreshed on
+    every hit) are evicted.
+    """
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3, hash_contents=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hash_contents = hash_contents
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.size_bytes = sum(size for _, size, _ in self._entries())
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'bytes': self.size_bytes}
+
+    def _file_identity(self, audio_path):
+        stat = os.stat(audio_path)
+        if not self.hash_contents:
+            return [os.path.abspath(audio_path), stat.st_size, stat.st_mtime_ns]
+        digest = hashlib.sha1()
+        with open(audio_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return [digest.hexdigest(), stat.st_size]
+
+    def key(self, audio_path, params):
+        """Cache key of a file under a set of extraction parameters."""
+        payload = json.dumps([FEATURE_VERSION, self._file_identity(audio_path), params],
+                             sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.npy')
+
+    def get(self, audio_path, params):
+        """Memory-mapped cached features, or None."""
+        path = self._path(self.key(audio_path, params))
+        try:
+            features = np.load(path, mmap_mode='r')
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return features
+
+    def put(self, audio_path, params, features):
+        """Store features as float32 and return the stored array."""
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        path = self._path(self.key(audio_path, params))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, features)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.size_bytes += os.path.getsize(path)
+        if self.size_bytes > self.max_bytes:
+            self.evict()
+        return features
+
+    def get_or_compute(self, audio_path, params, compute):
+        """Cached features of ``audio_path``, computing and storing them on a miss."""
+        features = self.get(audio_path, params)
+        if features is None:
+            features = self.put(audio_path, params, compute())
+        return features
+
+    def _entries(self):
+        for root_dir, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                if name.endswith('.npy'):
+                    path = os.path.join(root_dir, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime_ns
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in ``max_bytes``."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self.size_bytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self.size_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.size_bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        for path, _, _ in list(self._entries()):
+            os.remove(path)
+        self.size_bytes = 0
@@ -0,0 +1,171 @@
+import numpy as np
+
+
+LOG_2PI = np.log(2 * np.pi)
+
+
+def diagonal_parameters(model):
+    """Return (weights, means, variances) of a GMM with per-dimension variances, or None."""
+    if model.covariance_type == 'diag':
+        variances = model.covariances_
+    elif model.covariance_type == 'spherical':
+        variances = np.repeat(model.covariances_[:, np.newaxis], model.means_.shape[1], axis=1)
+    else:
+        return None
+    return model.weights_, model.means_, variances
+
+
+class GMMScorer:
+    """Score feature frames against all enrolled speaker GMMs in one batched pass.
+
+    The weights, means and precisions of every diagonal (or spherical) model are
+    stacked into contiguous (speakers, components, features) tensors once, so a
+    feature block is scored with two matrix products and a log-sum-exp instead of
+    one ``GaussianMixture.score`` call per speaker. Models with fewer components
+    are padded with zero-weight components; full and tied models fall back to
+    their own ``score_samples``.
+    """
+
+    # Upper bound on the (frames x speakers x components) block evaluated at once
+    max_block_size = 4_000_000
+
+    def __init__(self, speaker_models=None):
+        self.speakers = []
+        self.fallback_models = {}
+        self._params = []
+        if speaker_models:
+            for speaker, model in speaker_models.items():
+                self.add_model(speaker, model)
+        self.build()
+
+    def __len__(self):
+        return len(self.speakers)
+
+    def add_model(self, speaker, model):
+        """Register a fitted sklearn GaussianMixture under the given speaker name."""
+        params = diagonal_parameters(model)
+        if params is None:
+            self.speakers.append(speaker)
+            self._params.append(None)
+            self.fallback_models[speaker] = model
+        else:
+            self.add_params(speaker, *params)
+
+    def add_params(self, speaker, weights, means, variances):
+        """Register a diagonal GMM given directly by its parameter arrays."""
+        # Kept as given (possibly memory-mapped) until build() copies them
+        self.speakers.append(speaker)
+        self._params.append((np.asarray(weights), np.asarray(means), np.asarray(variances)))
+
+    def _empty(self):
+        return GMMScorer()
+
+    def snapshot(self):
+        """Built copy of the models registered so far, safe to hand to another thread."""
+        copy = self._empty()
+        copy.speakers = list(self.speakers)
+        copy._params = list(self._params)
+        copy.fallback_models = dict(self.fallback_models)
+        copy.build()
+        return copy
+
+    def subset(self, indices):
+        """Built scorer over some of the speakers (indices into ``self.speakers``), in that order."""
+        copy = self._empty()
+        for i in indices:
+            speaker = self.speakers[i]
+            copy.speakers.append(speaker)
+            copy._params.append(self._params[i])
+            if self._params[i] is None:
+                copy.fallback_models[speaker] = self.fallback_models[speaker]
+        copy.build()
+        return copy
+
+    def model_params(self, i):
+        """(weights, means, per-dimension variances) of speaker ``i``; full and tied models give
+        the diagonal of their covariances."""
+        if self._params[i] is not None:
+            return self._params[i]
+        model = self.fallback_models[self.speakers[i]]
+        covariances = np.asarray(model.covariances_)
+        if model.covariance_type == 'full':
+            variances = np.diagonal(covariances, axis1=1, axis2=2)
+        else:
+            variances = np.tile(np.diag(covariances), (len(model.weights_), 1))
+        return model.weights_, model.means_, variances
+
+    def build(self):
+        """Stack the registered parameters into the contiguous scoring tensors."""
+        diag = [p for p in self._params if p is not None]
+        self._diag_index = np.array([i for i, p in enumerate(self._params) if p is not None], dtype=int)
+        self._fallback_index = [i for i, p in enumerate(self._params) if p is None]
+
+        if not diag:
+            self.n_features = None
+            self.means = self.precisions = self.log_weights = None
+            return
+
+        n_speakers = len(diag)
+        n_components = max(w.shape[0] for w, _, _ in diag)
+        n_features = diag[0][1].shape[1]
+        self.n_features = n_features
+
+        self.means = np.zeros((n_speakers, n_components, n_features))
+        self.precisions = np.zeros((n_speakers, n_components, n_features))
+        self.log_weights = np.full((n_speakers, n_components), -np.inf)
+        log_det = np.zeros((n_speakers, n_components))
+
+        for s, params in enumerate(diag):
+            weights, means, variances = (np.asarray(p, dtype=np.float64) for p in params)
+            if means.shape[1] != n_features:
+                raise ValueError(
+                    f"Model for {self.speakers[self._diag_index[s]]} expects {means.shape[1]} "
+                    f"features, others expect {n_features}")
+            k = weights.shape[0]
+            self.means[s, :k] = means
+            self.precisions[s, :k] = 1.0 / variances
+            with np.errstate(divide='ignore'):
+                self.log_weights[s, :k] = np.log(weights)
+            log_det[s, :k] = np.sum(np.log(variances), axis=1)
+
+        flat = n_speakers * n_components
+        self._flat_precisions = np.ascontiguousarray(self.precisions.reshape(flat, n_features).T)
+        self._flat_scaled_means = np.ascontiguousarray(
+            (self.means * self.precisions).reshape(flat, n_features).T)
+        self._flat_offsets = (self.log_weights
+                              - 0.5 * (n_features * LOG_2PI + log_det)
+                              - 0.5 * np.sum(self.means ** 2 * self.precisions, axis=2)).ravel()
+
+    def _diag_frame_scores(self, X):
+        n_speakers, n_components, _ = self.means.shape
+        n_frames = X.shape[0]
+        scores = np.empty((n_frames, n_speakers))
+        block = max(1, self.max_block_size // (n_speakers * n_components))
+        for start in range(0, n_frames, block):
+            x = X[start:start + block]
+            log_prob = (x @ self._flat_scaled_means
+                        - 0.5 * ((x * x) @ self._flat_precisions)
+                        + self._flat_offsets)
+            log_prob = log_prob.reshape(x.shape[0], n_speakers, n_components)
+            peak = log_prob.max(axis=2, keepdims=True)
+            scores[start:start + block] = (
+                peak[:, :, 0] + np.log(np.exp(log_prob - peak).sum(axis=2)))
+        return scores
+
+    def frame_scores(self, X):
+        """Per-frame log-likelihoods, shape (n_frames, n_speakers), in ``self.speakers`` order."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        scores = np.empty((X.shape[0], len(self.speakers)))
+        if self.means is not None:
+            scores[:, self._diag_index] = self._diag_frame_scores(X)
+        for i in self._fallback_index:
+            scores[:, i] = self.fallback_models[self.speakers[i]].score_samples(X)
+        return scores
+
+    def score(self, X):
+        """Average log-likelihood per speaker, identical to ``GaussianMixture.score``."""
+        return self.frame_scores(X).mean(axis=0)
+
+    def score_dict(self, X):
+        """Average log-likelihood keyed by speaker name."""
+        return dict(zip(self.speakers, self.score(X)))
@@ -0,0 +1,183 @@
+import json
+import time
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+
+# Upper bounds of the latency buckets in seconds (0.1 ms to 5 s, roughly x2.5 apart)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0)
+
+SPARK_CHARS = " ▁▂▃▄▅▆▇█"
+
+
+class RollingHistogram:
+    """Latencies of one stage: lifetime bucket counts plus a ring of the most recent samples.
+
+    The lifetime counts and sum are what a Prometheus histogram exports; the
+    ring gives percentiles and a histogram over the last ``window`` samples,
+    which is what shows a lag building up.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=1000):
+        self.buckets = np.asarray(buckets, dtype=np.float64)
+        self.counts = np.zeros(len(buckets) + 1, dtype=np.int64)  # last one is +Inf
+        self.total = 0
+        self.sum = 0.0
+        self.recent = np.zeros(window)
+        self.recent_count = 0
+
+    def add(self, seconds):
+        self.counts[np.searchsorted(self.buckets, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+        self.recent[self.recent_count % len(self.recent)] = seconds
+        self.recent_count += 1
+
+    def window(self):
+        return self.recent[:min(self.recent_count, len(self.recent))]
+
+    def summary(self):
+        recent = self.window()
+        summary = {'count': self.total, 'sum_s': self.sum}
+        if len(recent):
+            p50, p90, p99 = np.percentile(recent, [50, 90, 99]) * 1000
+            summary.update(p50_ms=float(p50), p90_ms=float(p90), p99_ms=float(p99),
+                           max_ms=float(recent.max() * 1000),
+                           recent=np.bincount(np.searchsorted(self.buckets, recent),
+                                              minlength=len(self.counts)).tolist())
+        return summary
+
+
+def sparkline(counts):
+    """One block character per bucket, scaled to the fullest bucket."""
+    counts = np.asarray(counts)
+    if not len(counts) or counts.max() == 0:
+        return ""
+    levels = np.ceil(counts / counts.max() * (len(SPARK_CHARS) - 1)).astype(int)
+    return "".join(SPARK_CHARS[level] for level in levels)
+
+
+class LatencyStats:
+    """Thread-safe per-stage latency histograms, counters and gauges of a processing loop.
+
+    The processing thread records with ``timer``/``record``/``increment``/
+    ``set_gauge``; any other thread (the Tk loop, the metrics server) reads a
+    consistent copy with ``snapshot`` or ``prometheus``.
+    """
+
+    def __init__(self, stages, window=1000, buckets=DEFAULT_BUCKETS):
+        self.stages = list(stages)
+        self.window = window
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {stage: RollingHistogram(self.buckets, self.window) for stage in self.stages}
+            self.counters = {}
+            self.gauges = {}
+            self.started = time.time()
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.histograms[stage].add(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def increment(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def set_gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'uptime_s': time.time() - self.started,
+                'buckets_s': list(self.buckets),
+                'stages': {stage: histogram.summary() for stage, histogram in self.histograms.items()},
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+            }
+
+    def prometheus(self, prefix='speaker_id'):
+        """Prometheus text exposition format of all histograms, counters and gauges."""
+        with self.lock:
+            lines = [f"# HELP {prefix}_stage_seconds Processing time per real-time loop stage.",
+                     f"# TYPE {prefix}_stage_seconds histogram"]
+            for stage, histogram in self.histograms.items():
+                cumulative = np.cumsum(histogram.counts)
+                for bound, count in zip(list(self.buckets) + ['+Inf'], cumulative):
+                    lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {histogram.total}')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                lines.append(f"{prefix}_{name}_total {value}")
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f"# TYPE {prefix}_{name} gauge")
+                lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write the stats to ``path``: Prometheus text for ``.prom``/``.txt``, JSON otherwise."""
+        if path.lower().endswith(('.prom', '.txt')):
+            content = self.prometheus()
+        else:
+            content = json.dumps(self.snapshot(), indent=2)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def format(self):
+        """Short multi-line text for a stats panel."""
+        snapshot = self.snapshot()
+        lines = []
+        for stage, summary in snapshot['stages'].items():
+            if 'p50_ms' not in summary:
+                lines.append(f"{stage:9} -")
+                continue
+            lines.append(f"{stage:9} p50 {summary['p50_ms']:7.2f}  p90 {summary['p90_ms']:7.2f}  "
+                         f"p99 {summary['p99_ms']:7.2f} ms  {sparkline(summary['recent'])}")
+        values = dict(snapshot['gauges'], **snapshot['counters'])
+        if values:
+            lines.append("  ".join(f"{name}: {value:g}" if isinstance(value, float) else f"{name}: {value}"
+                                   for name, value in sorted(values.items())))
+        return "\n".join(lines)
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve ``/metrics`` (Prometheus text) from a daemon thread; returns the server to ``shutdown``."""
+        stats = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = stats.prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return server
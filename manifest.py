@@ -0,0 +1,118 @@
+import os
+import json
+import hashlib
+import tempfile
+
+
+MANIFEST_FILENAME = ".manifest.jsonl"
+
+
+def file_fingerprint(path, hash_contents=False):
+    """Size and modification time of a file, plus its SHA-1 with ``hash_contents``."""
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if hash_contents:
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        fingerprint['sha1'] = digest.hexdigest()
+    return fingerprint
+
+
+def folder_fingerprint(folder, names):
+    """Fingerprint of a set of files in a folder: changes when any is added, removed or modified."""
+    digest = hashlib.sha1()
+    for name in sorted(names):
+        stat = os.stat(os.path.join(folder, name))
+        digest.update(f"{name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+    return {'files': len(names), 'sha1': digest.hexdigest()}
+
+
+def _canonical(params):
+    return json.loads(json.dumps(params, sort_keys=True, default=str))
+
+
+class Manifest:
+    """Record of completed work, used to skip inputs whose outputs are up to date.
+
+    Each line of the JSONL file records one input: a key (usually the input
+    path), the input's fingerprint, the parameters it was processed with and
+    the outputs it produced. Lines are appended and flushed as work
+    completes, so an interrupted run keeps everything finished before the
+    interruption, and a torn last line is ignored. The latest line for a key
+    wins; the file is rewritten without superseded lines when they pile up.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        self._lines = 0
+        self._file = None
+        self.load()
+
+    @classmethod
+    def for_directory(cls, directory):
+        os.makedirs(directory, exist_ok=True)
+        return cls(os.path.join(directory, MANIFEST_FILENAME))
+
+    def load(self):
+        self.records = {}
+        self._lines = 0
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self.records[record['key']] = record
+                self._lines += 1
+        if self._lines > 2 * len(self.records) + 1000:
+            self.compact()
+
+    def is_current(self, key, fingerprint, params):
+        """True if ``key`` was processed from the same input with the same parameters and
+        all of its outputs still exist."""
+        record = self.records.get(key)
+        return (record is not None
+                and record['fingerprint'] == _canonical(fingerprint)
+                and record['params'] == _canonical(params)
+                and all(os.path.exists(output) for output in record['outputs']))
+
+    def record(self, key, fingerprint, params, outputs=()):
+        record = {'key': key, 'fingerprint': _canonical(fingerprint), 'params': _canonical(params),
+                  'outputs': list(outputs)}
+        if self._file is None:
+            self._file = open(self.path, 'a+', encoding='utf-8')
+            # Terminate a line torn by an interrupted run before appending
+            if self._file.tell() > 0:
+                self._file.seek(self._file.tell() - 1)
+                if self._file.read(1) != "\n":
+                    self._file.write("\n")
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self.records[key] = record
+        self._lines += 1
+
+    def compact(self):
+        """Rewrite the manifest with only the latest record per key."""
+        self.close()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for record in self.records.values():
+                    f.write(json.dumps(record) + "\n")
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._lines = len(self.records)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
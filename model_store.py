@@ -0,0 +1,296 @@
+import os
+import json
+import glob
+import pickle
+import struct
+import numpy as np
+from gmm_scoring import GMMScorer, diagonal_parameters
+from ubm import UBMScorer, find_ubm
+
+
+BANK_FILENAME = "speakers.bank"
+BANK_MAGIC = b"SIDBANK\0"
+BANK_VERSION = 1
+
+# magic, version, reserved, index offset, index length
+_HEADER = struct.Struct("<8sIIQQ")
+_ALIGNMENT = 64
+
+
+def _align(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+class ModelBank:
+    """Single-file store of the diagonal GMMs of all enrolled speakers.
+
+    Layout: a fixed header, one float32 record per speaker
+    (``weights[K] | means[K, D] | variances[K, D]``, 64-byte aligned) and a
+    JSON index at the end holding the speaker -> record map and the
+    feature-extraction config. The file is memory-mapped for reading, so
+    opening a bank only parses the index. Adding or replacing a speaker
+    appends its record and a new index and then rewrites the header, so an
+    interrupted write leaves the previous state intact; space left behind by
+    replaced records is reclaimed by ``compact``. No pickle is involved.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index = None
+        self._mm = None
+        self.reload()
+
+    @classmethod
+    def create(cls, path, n_features, feature_config=None):
+        """Create an empty bank for models over ``n_features``-dimensional features."""
+        index = {'version': BANK_VERSION, 'n_features': int(n_features),
+                 'feature_config': feature_config or {}, 'speakers': {}, 'garbage_bytes': 0}
+        payload = json.dumps(index).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(BANK_MAGIC, BANK_VERSION, 0, _HEADER.size, len(payload)))
+            f.write(payload)
+        return cls(path)
+
+    @classmethod
+    def open_or_create(cls, path, n_features, feature_config=None):
+        if os.path.exists(path):
+            bank = cls(path)
+            if bank.n_features != n_features:
+                raise ValueError(f"Model bank {path} holds {bank.n_features}-dimensional models, "
+                                 f"got {n_features}")
+            return bank
+        return cls.create(path, n_features, feature_config)
+
+    def reload(self):
+        """Re-read the header and index, e.g. after another process wrote the bank."""
+        with open(self.path, 'rb') as f:
+            magic, version, _, index_offset, index_length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != BANK_MAGIC:
+                raise ValueError(f"{self.path} is not a speaker model bank")
+            if version > BANK_VERSION:
+                raise ValueError(f"Unsupported model bank version {version}")
+            f.seek(index_offset)
+            self.index = json.loads(f.read(index_length).decode('utf-8'))
+        self._mm = None
+
+    @property
+    def n_features(self):
+        return self.index['n_features']
+
+    @property
+    def feature_config(self):
+        return self.index['feature_config']
+
+    @property
+    def speakers(self):
+        return list(self.index['speakers'])
+
+    def __len__(self):
+        return len(self.index['speakers'])
+
+    def __contains__(self, speaker):
+        return speaker in self.index['speakers']
+
+    def _memmap(self):
+        if self._mm is None:
+            self._mm = np.memmap(self.path, dtype=np.uint8, mode='r')
+        return self._mm
+
+    def params(self, speaker):
+        """(weights, means, variances) of a speaker as read-only memory-mapped views."""
+        entry = self.index['speakers'][speaker]
+        k, d = entry['n_components'], self.n_features
+        start = entry['offset']
+        record = self._memmap()[start:start + self._record_size(k)].view(np.float32)
+        return record[:k], record[k:k + k * d].reshape(k, d), record[k + k * d:].reshape(k, d)
+
+    def put(self, speaker, weights, means, variances):
+        """Add a speaker, or replace it, without rewriting the other records."""
+        self.put_many([(speaker, weights, means, variances)])
+
+    def put_many(self, models):
+        """Add or replace several (speaker, weights, means, variances) with a single index write."""
+        with open(self.path, 'r+b') as f:
+            _, _, _, index_offset, index_length = _HEADER.unpack(f.read(_HEADER.size))
+            # Append after the current index so it stays valid until the header moves
+            offset = index_offset + index_length
+            garbage = index_length
+            for speaker, weights, means, variances in models:
+                record = self._record(speaker, weights, means, variances)
+                aligned = _align(offset)
+                f.seek(aligned)
+                f.write(record)
+                garbage += aligned - offset
+                old = self.index['speakers'].get(speaker)
+                if old is not None:
+                    garbage += self._record_size(old['n_components'])
+                self.index['speakers'][speaker] = {'offset': aligned,
+                                                   'n_components': int(len(weights))}
+                offset = aligned + len(record)
+            self.index['garbage_bytes'] = self.index.get('garbage_bytes', 0) + garbage
+            self._write_index(f, offset)
+        self._mm = None
+
+    def _record(self, speaker, weights, means, variances):
+        means = np.asarray(means, dtype=np.float32)
+        if means.ndim != 2 or means.shape[1] != self.n_features:
+            raise ValueError(f"Model for {speaker} has {means.shape[-1]} features, "
+                             f"bank expects {self.n_features}")
+        return np.concatenate([np.asarray(weights, dtype=np.float32).ravel(),
+                               means.ravel(),
+                               np.asarray(variances, dtype=np.float32).ravel()]).tobytes()
+
+    def _record_size(self, n_components):
+        return 4 * n_components * (1 + 2 * self.n_features)
+
+    def put_model(self, speaker, model):
+        """Store a fitted sklearn GaussianMixture with diagonal or spherical covariances."""
+        params = diagonal_parameters(model)
+        if params is None:
+            raise ValueError(f"Model bank only stores diagonal GMMs, got '{model.covariance_type}'")
+        self.put(speaker, *params)
+
+    def remove(self, speaker):
+        self.remove_many([speaker])
+
+    def remove_many(self, speakers):
+        """Drop several speakers with a single index write."""
+        entries = [self.index['speakers'].pop(speaker) for speaker in speakers]
+        with open(self.path, 'r+b') as f:
+            _, _, _, index_offset, index_length = _HEADER.unpack(f.read(_HEADER.size))
+            self.index['garbage_bytes'] = (self.index.get('garbage_bytes', 0) + index_length
+                                           + sum(self._record_size(entry['n_components'])
+                                                 for entry in entries))
+            self._write_index(f, index_offset + index_length)
+        self._mm = None
+
+    def needs_compaction(self):
+        """True once replaced records and stale indexes take up half of the file."""
+        return self.index.get('garbage_bytes', 0) * 2 > os.path.getsize(self.path)
+
+    def _write_index(self, f, offset):
+        payload = json.dumps(self.index).encode('utf-8')
+        f.seek(offset)
+        f.write(payload)
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(0)
+        f.write(_HEADER.pack(BANK_MAGIC, BANK_VERSION, 0, offset, len(payload)))
+        f.flush()
+
+    def compact(self):
+        """Rewrite the bank without the space left by replaced or removed speakers."""
+        tmp_path = self.path + '.tmp'
+        index = dict(self.index, speakers={}, garbage_bytes=0)
+        with open(tmp_path, 'w+b') as f:
+            f.write(_HEADER.pack(BANK_MAGIC, BANK_VERSION, 0, 0, 0))
+            offset = _HEADER.size
+            for speaker in self.speakers:
+                weights, means, variances = self.params(speaker)
+                record = self._record(speaker, weights, means, variances)
+                offset = _align(offset)
+                f.seek(offset)
+                f.write(record)
+                index['speakers'][speaker] = {'offset': offset, 'n_components': int(len(weights))}
+                offset += len(record)
+            self.index = index
+            self._write_index(f, offset)
+        self._mm = None
+        os.replace(tmp_path, self.path)
+        self.reload()
+
+    def scorer(self):
+        """GMMScorer over every speaker in the bank."""
+        scorer = GMMScorer()
+        for speaker in self.speakers:
+            scorer.add_params(speaker, *self.params(speaker))
+        scorer.build()
+        return scorer
+
+
+class ModelIndex:
+    """Index of the speaker models in a directory, materialized on demand.
+
+    Building the index only parses the bank index and lists ``*.gmm`` files;
+    parameters are read when ``load`` is called - through the memory map for
+    bank speakers, by unpickling for ``.gmm`` files. Bank entries take
+    precedence over a ``.gmm`` file of the same speaker.
+    """
+
+    def __init__(self, models_dir):
+        self.models_dir = str(models_dir)
+        self.bank = None
+        self.entries = {}
+
+        bank_path = os.path.join(self.models_dir, BANK_FILENAME)
+        if os.path.exists(bank_path):
+            self.bank = ModelBank(bank_path)
+            for speaker in self.bank.speakers:
+                self.entries[speaker] = None
+        for model_path in sorted(glob.glob(os.path.join(glob.escape(self.models_dir), "*.gmm"))):
+            speaker = os.path.splitext(os.path.basename(model_path))[0]
+            self.entries.setdefault(speaker, model_path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def speakers(self):
+        return list(self.entries)
+
+    @property
+    def feature_config(self):
+        return self.bank.feature_config if self.bank is not None else {}
+
+    def load(self, speaker):
+        """(weights, means, variances) for bank speakers, the unpickled model otherwise."""
+        model_path = self.entries[speaker]
+        if model_path is None:
+            return self.bank.params(speaker)
+        with open(model_path, 'rb') as f:
+            return pickle.load(f)
+
+    def add_to(self, scorer, speaker):
+        """Materialize one speaker and register it with a GMMScorer."""
+        model = self.load(speaker)
+        if isinstance(model, tuple):
+            scorer.add_params(speaker, *model)
+        else:
+            scorer.add_model(speaker, model)
+
+
+def scorer_for(index, ubm, speakers, top_c=5):
+    """Built scorer over some speakers of a ModelIndex; with a UBM they are scored on its top-C components."""
+    scorer = UBMScorer(ubm, top_c) if ubm is not None else GMMScorer()
+    for speaker in speakers:
+        index.add_to(scorer, speaker)
+    scorer.build()
+    return scorer
+
+
+def models_feature_config(index, ubm):
+    """Feature config the models of a directory were enrolled with, from the bank or the UBM.
+
+    Raises ValueError when the bank and the UBM record different settings.
+    """
+    config = index.feature_config
+    if ubm is not None:
+        conflicts = sorted(key for key in set(config) & set(ubm.feature_config)
+                           if config[key] != ubm.feature_config[key])
+        if conflicts:
+            raise ValueError(f"Model bank and background model were enrolled with different "
+                             f"feature settings ({', '.join(conflicts)})")
+        if not config:
+            config = ubm.feature_config
+    return config
+
+
+def load_scorer(models_dir, top_c=5):
+    """Scorer over every model in a directory and the feature config they were enrolled with.
+
+    When the directory holds a UBM the models are scored on its top-C components.
+    """
+    index = ModelIndex(models_dir)
+    ubm = find_ubm(models_dir)
+    return scorer_for(index, ubm, index.speakers, top_c), models_feature_config(index, ubm)
@@ -0,0 +1,68 @@
+import os
+import soundfile as sf
+from audio_operations import load_audio, remove_silence, reduce_noise_array, normalize, segment
+
+
+# Stage name -> in-memory operation. Each takes (samples, sample_rate, **options)
+# and returns the processed samples, or a list of pieces (segmentation).
+STAGES = {
+    'silence': remove_silence,
+    'denoise': reduce_noise_array,
+    'normalize': normalize,
+    'segment': segment,
+}
+
+# Order used when chaining the toolkit's operations by hand
+DEFAULT_ORDER = ('silence', 'denoise', 'normalize', 'segment')
+
+
+def build_chain(names, options=None):
+    """``[(stage, options)]`` for stage names, taking each stage's options from ``options[name]``."""
+    options = options or {}
+    chain = []
+    for name in names:
+        if name not in STAGES:
+            raise ValueError(f"Unknown pipeline stage '{name}', expected one of {', '.join(STAGES)}")
+        chain.append((name, dict(options.get(name, {}))))
+    return chain
+
+
+def run_chain(y, sr, chain):
+    """Apply a chain to one decoded signal; returns the list of resulting pieces."""
+    pieces = [y]
+    for name, options in chain:
+        processed = []
+        for piece in pieces:
+            result = STAGES[name](piece, sr, **options)
+            processed.extend(result if isinstance(result, list) else [result])
+        # Pieces that became empty (all silence) are dropped
+        pieces = [piece for piece in processed if len(piece)]
+    return pieces
+
+
+def process_file(file_path, source_root, dest_root, chain, output_format="wav"):
+    """Decode one file once, run the chain in memory and write only the final result.
+
+    Unsegmented output mirrors the source tree with the ``output_format``
+    extension; segmented output goes to a folder per file with the same
+    ``{name}_{n}`` naming as the segmentation tab.
+    """
+    y, sr = load_audio(file_path)
+    pieces = run_chain(y, sr, chain)
+    if not pieces:
+        print(f"File {file_path} contains only silence and was skipped.")
+        return []
+
+    stem = os.path.splitext(os.path.relpath(file_path, source_root))[0]
+    if any(name == 'segment' for name, _ in chain):
+        output_folder = os.path.join(dest_root, stem)
+        paths = [os.path.join(output_folder, f"{os.path.basename(stem)}_{i}.{output_format}")
+                 for i in range(1, len(pieces) + 1)]
+    else:
+        output_folder = os.path.dirname(os.path.join(dest_root, stem))
+        paths = [os.path.join(dest_root, f"{stem}.{output_format}")]
+    os.makedirs(output_folder, exist_ok=True)
+
+    for path, piece in zip(paths, pieces):
+        sf.write(path, piece, sr, subtype='PCM_16' if output_format in ('wav', 'flac') else None)
+    return paths
@@ -0,0 +1,106 @@
+import numpy as np
+from gmm_scoring import LOG_2PI
+from evidence import EvidenceAccumulator
+from streaming_features import FeatureRing
+
+
+class CentroidIndex:
+    """One moment-matched diagonal Gaussian per speaker, as a cheap first scoring pass.
+
+    Each speaker GMM is collapsed to the single Gaussian with the same mean
+    and per-dimension variance. The average log-likelihood of a block of
+    frames under such a Gaussian depends only on the block's first and
+    second moments, so ranking every speaker costs one (speakers x features)
+    product, whatever the number of frames or GMM components.
+    """
+
+    def __init__(self, scorer):
+        n_speakers = len(scorer)
+        n_features = None
+        means, precisions, offsets = [], [], []
+        for i in range(n_speakers):
+            weights, component_means, variances = (np.asarray(p, dtype=np.float64)
+                                                   for p in scorer.model_params(i))
+            weights = weights / weights.sum()
+            mean = weights @ component_means
+            variance = np.maximum(weights @ (variances + component_means ** 2) - mean ** 2, 1e-6)
+            n_features = len(mean)
+            means.append(mean)
+            precisions.append(1.0 / variance)
+            offsets.append(-0.5 * (n_features * LOG_2PI + np.sum(np.log(variance))))
+        self.means = np.array(means).reshape(n_speakers, -1)
+        self.n_features = self.means.shape[1]
+        self.precisions = np.array(precisions).reshape(n_speakers, -1)
+        self.scaled_means = self.means * self.precisions
+        self.offsets = np.array(offsets) - 0.5 * np.sum(self.means ** 2 * self.precisions, axis=1)
+
+    def scores(self, X):
+        """Average log-likelihood of the frames ``X`` under every speaker's Gaussian."""
+        X = np.atleast_2d(X)
+        return (self.offsets + self.scaled_means @ X.mean(axis=0)
+                - 0.5 * (self.precisions @ (X * X).mean(axis=0)))
+
+    def top(self, X, n):
+        """Indices of the ``n`` best-ranked speakers for the frames ``X``, best first."""
+        scores = self.scores(X)
+        n = min(n, len(scores))
+        best = np.argpartition(-scores, n - 1)[:n]
+        return best[np.argsort(-scores[best])]
+
+
+class PrunedScorer:
+    """Frame-level evidence over a shortlist of speakers instead of every enrolled model.
+
+    Every ``refresh_every`` ticks the ``CentroidIndex`` ranks all speakers on
+    the recent frames and the best ``n_candidates`` (plus the current leader,
+    so it cannot drop out between refreshes) become the shortlist. Their full
+    GMM evidence is then rebuilt from those frames; in between, each tick
+    scores its new frames against the shortlist only. The per-tick cost
+    therefore depends on the shortlist size, not on the number of enrolled
+    speakers. ``refreshes`` and ``candidate_changes`` count how often and
+    how much the shortlist moved. Any ``index`` with ``top(X, n)`` and
+    ``n_features``, such as a ``SpeakerIndex.ranker``, can replace the
+    centroids.
+    """
+
+    def __init__(self, scorer, n_candidates=50, refresh_every=10, span_frames=300, mode='window',
+                 index=None):
+        self.scorer = scorer
+        self.index = index if index is not None else CentroidIndex(scorer)
+        self.n_candidates = min(n_candidates, len(scorer))
+        self.refresh_every = refresh_every
+        self.span_frames = span_frames
+        self.mode = mode
+        # A decaying evidence keeps about 6% weight four half-lives back
+        history = span_frames * (4 if mode == 'decay' else 1)
+        self.recent = FeatureRing(self.index.n_features, history)
+        self.candidates = None
+        self.shortlist = None
+        self.accumulator = None
+        self.ticks = 0
+        self.refreshes = 0
+        self.candidate_changes = 0
+
+    def refresh(self):
+        frames = self.recent.latest(self.recent.count)
+        candidates = self.index.top(frames, self.n_candidates)
+        if self.candidates is not None and len(self.candidates):
+            leader = self.candidates[np.argmax(self.accumulator.scores())]
+            if leader not in candidates:
+                candidates = np.append(candidates[:-1], leader)
+            self.candidate_changes += len(np.setdiff1d(candidates, self.candidates))
+        self.candidates = candidates
+        self.shortlist = self.scorer.subset(candidates)
+        self.accumulator = EvidenceAccumulator(len(candidates), self.span_frames, self.mode)
+        self.accumulator.add(self.shortlist.frame_scores(frames))
+        self.refreshes += 1
+
+    def add(self, frames):
+        """Score new frames; returns the evidence of the shortlisted speakers by name."""
+        self.recent.append(frames)
+        if self.candidates is None or self.ticks % self.refresh_every == 0:
+            self.refresh()
+        else:
+            self.accumulator.add(self.shortlist.frame_scores(frames))
+        self.ticks += 1
+        return dict(zip(self.shortlist.speakers, self.accumulator.scores()))
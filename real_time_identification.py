@@ -1,33 +1,76 @@
 import tkinter as tk
-from tkinter import ttk, filedialog
+from tkinter import ttk, filedialog, messagebox
 import threading
-import queue
 import time
 import numpy as np
 import sounddevice as sd
-import librosa
-import pickle
+import queue
+import heapq
 import os
 from pathlib import Path
 from scipy.signal import butter, filtfilt
-import noisereduce as nr
+from gmm_scoring import GMMScorer
+from model_store import ModelIndex, models_feature_config
+from ubm import UBMScorer, find_ubm
+from audio_frontend import AudioFrontEnd, stft_config
+from streaming_features import StreamingMFCC
+from streaming_denoise import StreamingDenoiser
+from vad import StreamingVAD
+from evidence import EvidenceAccumulator
+from pruned_scoring import PrunedScorer
+from speaker_index import find_speaker_index
+from ring_buffer import AudioRingBuffer
+from latency_stats import LatencyStats
+from result_channel import LatestResult
 
 
 class RealTimeIdentificationTab(ttk.Frame):
+    # Scoring choices: evidence mode of frame-level scoring, None for one mean vector per window
+    SCORING_MODES = {
+        "Frame-level (window)": 'window',
+        "Frame-level (decay)": 'decay',
+        "Window mean": None,
+    }
+    
     def __init__(self, notebook):
         super().__init__(notebook)
-        self.queue = queue.Queue()
         self.is_recording = False
-        self.speaker_models = {}
+        self.scorer = None
+        self.model_index = None
+        self.ubm = None
+        # Supervector search index of the models directory, when it has one
+        self.speaker_index = None
+        # UBM components evaluated per frame when the models are MAP-adapted
+        self.top_c = 5
+        self.load_generation = 0
+        self.load_queue = queue.Queue()
+        # Number of loaded models at which scoring first becomes available
+        self.publish_first = 64
         self.models_dir = None
         
         
         self.sample_rate = 16000
-        self.frame_length = int(0.025 * self.sample_rate)  
-        self.hop_length = int(0.010 * self.sample_rate)    
+        # STFT of the enrolled models (see apply_feature_config)
+        self.frame_length, self.hop_length = stft_config({}, self.sample_rate)
+        # How long the VAD holds speech after the last detected frame
+        self.vad_hangover_seconds = 0.15
         self.buffer_duration = 3  
         self.step_size = 0.1  
-        self.audio_buffer = np.zeros(self.sample_rate * self.buffer_duration)
+        self.window_samples = self.sample_rate * self.buffer_duration
+        # One extra second of slack so the producer never writes into the window being read
+        self.audio_ring = AudioRingBuffer(self.window_samples + self.sample_rate)
+        
+        # Per-stage timings of the processing loop; 'tick' is one whole step, 'render' runs on the Tk loop
+        self.stats = LatencyStats(('wait', 'frontend', 'features', 'score', 'publish', 'tick', 'render'))
+        self.metrics_server = None
+        self.serve_metrics = tk.BooleanVar(value=False)
+        self.metrics_port = tk.StringVar(value="9464")
+        
+        # Newest result of the processing thread, drawn by the Tk loop at most ui_fps times a second
+        self.results = LatestResult()
+        self.ui_fps = 15
+        self.render_job = None
+        self.display_top_k = tk.StringVar(value="10")
         
         
         self.mfcc_features = tk.StringVar(value="22")
@@ -37,6 +80,19 @@ class RealTimeIdentificationTab(ttk.Frame):
         
         self.reduce_noise = tk.BooleanVar(value=True)
         self.normalize_audio = tk.BooleanVar(value=True)
+        self.use_vad = tk.BooleanVar(value=True)
+        self.speech_active = False
+        
+        
+        self.scoring_mode = tk.StringVar(value="Frame-level (window)")
+        # Evidence window, or half-life in decay mode
+        self.evidence_seconds = tk.StringVar(value="3")
+        self.accumulator = None
+        self.accumulator_scorer = None
+        # Shortlist size of the pruned search, 0 to score every speaker
+        self.n_candidates = tk.StringVar(value="50")
+        # Ticks between two shortlist refreshes
+        self.candidate_refresh_ticks = 10
         
         self.setup_ui()
         
@@ -90,6 +146,22 @@ class RealTimeIdentificationTab(ttk.Frame):
                        variable=self.reduce_noise).pack(side=tk.LEFT, padx=10)
         ttk.Checkbutton(preprocess_frame, text="Normalize Audio", 
                        variable=self.normalize_audio).pack(side=tk.LEFT, padx=10)
+        ttk.Checkbutton(preprocess_frame, text="Voice Activity Detection", 
+                       variable=self.use_vad).pack(side=tk.LEFT, padx=10)
+        
+        
+        scoring_frame = ttk.Frame(settings_frame)
+        scoring_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(scoring_frame, text="Scoring:").pack(side=tk.LEFT, padx=5)
+        ttk.Combobox(scoring_frame, textvariable=self.scoring_mode, state='readonly', width=20,
+                     values=list(self.SCORING_MODES)).pack(side=tk.LEFT, padx=5)
+        ttk.Label(scoring_frame, text="Evidence (s):").pack(side=tk.LEFT, padx=10)
+        ttk.Entry(scoring_frame, textvariable=self.evidence_seconds, width=10).pack(side=tk.LEFT, padx=5)
+        ttk.Label(scoring_frame, text="Candidates (0 = all):").pack(side=tk.LEFT, padx=10)
+        ttk.Entry(scoring_frame, textvariable=self.n_candidates, width=10).pack(side=tk.LEFT, padx=5)
+        ttk.Label(scoring_frame, text="Show top:").pack(side=tk.LEFT, padx=10)
+        ttk.Entry(scoring_frame, textvariable=self.display_top_k, width=10).pack(side=tk.LEFT, padx=5)
         
         
         control_frame = ttk.Frame(main_frame)
@@ -107,6 +179,23 @@ class RealTimeIdentificationTab(ttk.Frame):
         self.status_label.pack(side=tk.LEFT, padx=20)
         
         
+        stats_frame = ttk.LabelFrame(main_frame, text="Performance", padding=10)
+        stats_frame.pack(fill=tk.X, pady=5)
+        
+        self.stats_label = ttk.Label(stats_frame, text="No data", font=('Courier', 9),
+                                     justify=tk.LEFT)
+        self.stats_label.pack(fill=tk.X, pady=(0, 5))
+        
+        stats_controls = ttk.Frame(stats_frame)
+        stats_controls.pack(fill=tk.X)
+        ttk.Button(stats_controls, text="Export Stats...",
+                   command=self.export_stats).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(stats_controls, text="Serve /metrics on localhost port",
+                        variable=self.serve_metrics,
+                        command=self.toggle_metrics_server).pack(side=tk.LEFT, padx=10)
+        ttk.Entry(stats_controls, textvariable=self.metrics_port, width=8).pack(side=tk.LEFT)
+        
+        
         results_frame = ttk.LabelFrame(main_frame, text="Identification Results", 
                                      padding=10)
         results_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -130,68 +219,122 @@ class RealTimeIdentificationTab(ttk.Frame):
             self.load_models()
     
     def load_models(self):
+        """Index the models directory, then materialize the models off the UI thread."""
         try:
-            self.speaker_models.clear()
-            model_files = list(self.models_dir.glob("*.gmm"))
+            self.scorer = None
+            self.speaker_index = None
+            self.load_generation += 1
+            self.model_index = ModelIndex(self.models_dir)
+            self.ubm = find_ubm(self.models_dir)
             
-            if not model_files:
+            if not len(self.model_index):
                 self.status_label.config(
-                    text="Status: No .gmm files found in selected directory!")
+                    text="Status: No .gmm files or model bank found in selected directory!")
                 self.toggle_button.config(state=tk.DISABLED)
                 return
             
-            for model_path in model_files:
-                speaker_name = model_path.stem
-                with open(model_path, 'rb') as f:
-                    self.speaker_models[speaker_name] = pickle.load(f)
+            self.apply_feature_config(models_feature_config(self.model_index, self.ubm))
             
+            # Recording may start as soon as the index exists; scoring covers
+            # the speakers loaded so far
             self.status_label.config(
-                text=f"Status: Loaded {len(self.speaker_models)} speaker models")
+                text=f"Status: Indexed {len(self.model_index)} speaker models, loading...")
             self.toggle_button.config(state=tk.NORMAL)
             
+            thread = threading.Thread(target=self.load_models_thread,
+                                      args=(self.model_index, self.ubm, self.load_generation))
+            thread.daemon = True
+            thread.start()
+            self.update_load_progress(self.load_generation)
+            
         except Exception as e:
             self.status_label.config(text=f"Status: Error loading models - {str(e)}")
             self.toggle_button.config(state=tk.DISABLED)
     
-    def preprocess_audio(self, audio):
-        if self.reduce_noise.get():
-            
-            audio = nr.reduce_noise(y=audio, sr=self.sample_rate)
-        
-        if self.normalize_audio.get():
-            
-            audio = librosa.util.normalize(audio)
-        
-        return audio
+    def load_models_thread(self, model_index, ubm, generation):
+        """Background thread materializing the indexed models into the scorer."""
+        try:
+            total = len(model_index)
+            speaker_index = find_speaker_index(model_index.models_dir)
+            if speaker_index is not None and speaker_index.missing(model_index.speakers):
+                # An index that misses some speakers would never shortlist them; centroids cover all
+                speaker_index = None
+            if generation != self.load_generation:
+                return
+            self.speaker_index = speaker_index
+            # MAP-adapted models are scored on the top-C components of their UBM
+            scorer = UBMScorer(ubm, self.top_c) if ubm is not None else GMMScorer()
+            next_publish = min(total, self.publish_first)
+            for i, speaker in enumerate(model_index.speakers, 1):
+                if generation != self.load_generation:
+                    return
+                model_index.add_to(scorer, speaker)
+                if i == next_publish:
+                    # Publishing rebuilds the stacked tensors, so do it at doubling counts
+                    snapshot = scorer.snapshot()
+                    if generation != self.load_generation:
+                        return
+                    self.scorer = snapshot
+                    next_publish = min(total, next_publish * 2)
+                    self.load_queue.put((generation, 'progress', i, total))
+            self.load_queue.put((generation, 'complete', total, total))
+        except Exception as e:
+            self.load_queue.put((generation, 'error', str(e), None))
     
-    def extract_features(self, audio):
-        
-        n_mfcc = int(self.mfcc_features.get())
-        mfccs = librosa.feature.mfcc(y=audio, 
-                                   sr=self.sample_rate,
-                                   n_mfcc=n_mfcc,
-                                   hop_length=self.hop_length,
-                                   n_fft=self.frame_length)
-        
-        features = [mfccs]
-        
-        if self.use_dmfcc.get():
-            
-            delta_mfccs = librosa.feature.delta(mfccs)
-            features.append(delta_mfccs)
-        
-        if self.use_ddmfcc.get():
-            
-            delta2_mfccs = librosa.feature.delta(mfccs, order=2)
-            features.append(delta2_mfccs)
-        
-        
-        combined_features = np.concatenate(features, axis=0)
-        
+    def update_load_progress(self, generation):
+        """Report model loading progress from the loader thread on the UI."""
+        if generation != self.load_generation:
+            return
         
-        feature_vector = np.mean(combined_features, axis=1).reshape(1, -1)
+        try:
+            while True:
+                msg_generation, msg_type, value, total = self.load_queue.get_nowait()
+                # Messages of a superseded loader may still arrive; only this one's count
+                if msg_generation != generation:
+                    continue
+                
+                if msg_type == 'progress':
+                    self.status_label.config(
+                        text=f"Status: Loaded {value}/{total} speaker models...")
+                elif msg_type == 'complete':
+                    text = f"Status: Loaded {value} speaker models"
+                    if self.speaker_index is not None:
+                        text += f" (search index of {len(self.speaker_index)})"
+                    self.status_label.config(text=text)
+                    return
+                elif msg_type == 'error':
+                    self.status_label.config(
+                        text=f"Status: Error loading models - {value}")
+                    self.toggle_button.config(state=tk.DISABLED)
+                    return
+                
+        except queue.Empty:
+            pass
         
-        return feature_vector
+        self.after(100, self.update_load_progress, generation)
+    
+    def apply_feature_config(self, config):
+        """Match the feature settings to the ones the models were enrolled with.
+
+        This includes the STFT, so frames and their deltas span the same
+        time live as they did at enrollment.
+        """
+        self.frame_length, self.hop_length = stft_config(config, self.sample_rate)
+        if 'n_mfcc' in config:
+            self.mfcc_features.set(str(config['n_mfcc']))
+        if 'use_dmfcc' in config:
+            self.use_dmfcc.set(config['use_dmfcc'])
+        if 'use_ddmfcc' in config:
+            self.use_ddmfcc.set(config['use_ddmfcc'])
+    
+    def extract_streaming_features(self):
+        """Window feature vector from the incremental extractor, None until enough frames."""
+        features = self.feature_extractor.features(
+            normalize=self.normalize_audio.get())
+        if features is None:
+            return None
+        
+        return np.mean(features, axis=0).reshape(1, -1)
     
     def toggle_recording(self):
         if not self.is_recording:
@@ -200,15 +343,56 @@ class RealTimeIdentificationTab(ttk.Frame):
             self.stop_recording()
     
     def start_recording(self):
-        if not self.speaker_models:
+        if self.model_index is None or not len(self.model_index):
             self.status_label.config(text="Status: No models loaded!")
             return
+        
+        try:
+            evidence_seconds = float(self.evidence_seconds.get())
+        except ValueError:
+            evidence_seconds = 0
+        if evidence_seconds <= 0:
+            self.status_label.config(text="Status: Evidence length must be a positive number")
+            return
+        try:
+            self.max_candidates = int(self.n_candidates.get())
+        except ValueError:
+            self.max_candidates = -1
+        if self.max_candidates < 0:
+            self.status_label.config(text="Status: Candidates must be a whole number (0 for all)")
+            return
+        try:
+            self.top_k = int(self.display_top_k.get())
+        except ValueError:
+            self.top_k = 0
+        if self.top_k <= 0:
+            self.status_label.config(text="Status: Shown speakers must be a positive whole number")
+            return
+        self.evidence_mode = self.SCORING_MODES[self.scoring_mode.get()]
+        self.evidence_frames = int(evidence_seconds * self.sample_rate / self.hop_length)
+        self.accumulator = None
+        self.accumulator_scorer = None
             
         self.is_recording = True
         self.toggle_button.config(text="Stop Recording")
         self.status_label.config(text="Status: Recording...")
         self.select_dir_button.config(state=tk.DISABLED)
         
+        self.audio_ring.reset()
+        self.stats.reset()
+        self.results.reset()
+        self.frontend = AudioFrontEnd(self.sample_rate,
+                                      n_fft=self.frame_length,
+                                      hop_length=self.hop_length,
+                                      n_mfcc=int(self.mfcc_features.get()),
+                                      use_dmfcc=self.use_dmfcc.get(),
+                                      use_ddmfcc=self.use_ddmfcc.get())
+        self.feature_extractor = StreamingMFCC(self.frontend,
+                                               window_seconds=self.buffer_duration)
+        self.denoiser = StreamingDenoiser(self.frontend.n_bins)
+        self.vad = StreamingVAD(self.frontend, hangover_frames=max(
+            1, round(self.vad_hangover_seconds * self.sample_rate / self.hop_length)))
+        self.speech_active = False
         
         self.record_thread = threading.Thread(target=self.record_audio)
         self.record_thread.daemon = True
@@ -218,6 +402,11 @@ class RealTimeIdentificationTab(ttk.Frame):
         self.process_thread = threading.Thread(target=self.process_audio)
         self.process_thread.daemon = True
         self.process_thread.start()
+        
+        self.update_stats_panel()
+        if self.render_job is not None:
+            self.after_cancel(self.render_job)
+        self.render_results()
     
     def stop_recording(self):
         self.is_recording = False
@@ -228,8 +417,11 @@ class RealTimeIdentificationTab(ttk.Frame):
     def record_audio(self):
         def audio_callback(indata, frames, time, status):
             if status:
-                print(f"Audio callback status: {status}")
-            self.queue.put(indata.copy())
+                self.stats.increment('callback_status')
+                for flag in ('input_overflow', 'input_underflow'):
+                    if getattr(status, flag, False):
+                        self.stats.increment(flag)
+            self.audio_ring.write(indata[:, 0])
         
         try:
             with sd.InputStream(callback=audio_callback,
@@ -240,60 +432,174 @@ class RealTimeIdentificationTab(ttk.Frame):
                     time.sleep(self.step_size)
         except Exception as e:
             print(f"Error in audio recording: {str(e)}")
-            self.stop_recording()
+            # Tk is only touched from its own loop, which stops the recording
+            self.results.fail(f"audio recording error - {e}")
+            self.is_recording = False
     
     def process_audio(self):
+        stats = self.stats
         while self.is_recording:
             try:
                 
-                audio_chunk = self.queue.get(timeout=1)
-                
-                
-                self.audio_buffer = np.roll(self.audio_buffer, 
-                                          -len(audio_chunk.flatten()))
-                self.audio_buffer[-len(audio_chunk.flatten()):] = \
-                    audio_chunk.flatten()
-                
+                wait_start = time.perf_counter()
+                if not self.audio_ring.wait(timeout=1):
+                    continue
+                tick_start = time.perf_counter()
+                stats.record('wait', tick_start - wait_start)
+                stats.set_gauge('backlog_ms', 1000 * self.audio_ring.available() / self.sample_rate)
+                audio_chunk = self.audio_ring.read()
+                stats.set_gauge('ring_overruns', self.audio_ring.overruns)
+                stats.set_gauge('ring_overrun_ms', 1000 * self.audio_ring.overrun_samples / self.sample_rate)
                 
-                processed_audio = self.preprocess_audio(self.audio_buffer)
+                # Denoising gates only the new STFT frames inside the extractor
+                self.feature_extractor.denoiser = (
+                    self.denoiser if self.reduce_noise.get() else None)
+                # Without speech the tick ends after the VAD's frame energies
+                use_vad = self.use_vad.get()
+                self.feature_extractor.vad = self.vad if use_vad else None
+                with stats.timer('frontend'):
+                    n_speech = self.feature_extractor.push(audio_chunk)
+                if use_vad and n_speech == 0:
+                    stats.increment('silent_ticks')
+                    if self.speech_active:
+                        self.speech_active = False
+                        self.results.publish(('silence', None, None))
+                    continue
+                self.speech_active = True
                 
+                scorer = self.scorer
+                if scorer is not None and scorer.n_features not in (None, self.frontend.n_features):
+                    # Settings changed since the models were loaded; scoring would only fail every tick
+                    self.results.fail(f"features have {self.frontend.n_features} values per frame, "
+                                      f"the models expect {scorer.n_features}")
+                    self.is_recording = False
+                    break
                 
-                feature_vector = self.extract_features(processed_audio)
+                if self.evidence_mode is None:
+                    with stats.timer('features'):
+                        feature_vector = self.extract_streaming_features()
+                    if feature_vector is None:
+                        continue
+                    
+                    scorer = self.scorer
+                    if scorer is None:
+                        continue
+                    with stats.timer('score'):
+                        predictions = scorer.score_dict(feature_vector)
+                else:
+                    # Only the frames finalized since the last tick are scored
+                    with stats.timer('features'):
+                        frames = self.feature_extractor.new_frames(
+                            normalize=self.normalize_audio.get())
+                    scorer = self.scorer
+                    if frames is None or scorer is None:
+                        continue
+                    with stats.timer('score'):
+                        predictions = self.accumulate_evidence(scorer, frames)
                 
                 
-                predictions = {}
-                for speaker, model in self.speaker_models.items():
-                    try:
-                        score = model.score(feature_vector)
-                        predictions[speaker] = score
-                    except Exception as e:
-                        print(f"Error predicting for {speaker}: {str(e)}")
+                # Only the top speakers cross over to the Tk loop; rendering never blocks this thread
+                with stats.timer('publish'):
+                    top = heapq.nlargest(self.top_k, predictions.items(), key=lambda item: item[1])
+                    self.results.publish(('speech', top, len(predictions)))
+                tick = time.perf_counter() - tick_start
+                stats.record('tick', tick)
+                if tick > self.step_size:
+                    stats.increment('deadline_misses')
                 
-                
-                self.update_results(predictions)
-                
-            except queue.Empty:
-                continue
             except Exception as e:
+                stats.increment('errors')
                 print(f"Error in audio processing: {str(e)}")
     
-    def update_results(self, predictions):
-        if not predictions:
+    def accumulate_evidence(self, scorer, frames):
+        """Add the frame-level scores of new frames to the running evidence of every speaker,
+        or of a shortlist of them when more speakers than ``max_candidates`` are loaded."""
+        pruned = self.max_candidates and len(scorer) > self.max_candidates
+        if self.accumulator is None or self.accumulator_scorer is not scorer:
+            # Models were (re)loaded: speakers changed, so the evidence starts over
+            if pruned:
+                # The search index shortlists once every model it covers is loaded, centroids until then
+                index = None
+                if self.speaker_index is not None and len(scorer) == len(self.model_index):
+                    index = self.speaker_index.ranker(scorer)
+                self.accumulator = PrunedScorer(scorer, self.max_candidates, self.candidate_refresh_ticks,
+                                                self.evidence_frames, self.evidence_mode, index)
+            else:
+                self.accumulator = EvidenceAccumulator(len(scorer), self.evidence_frames, self.evidence_mode)
+            self.accumulator_scorer = scorer
+        if pruned:
+            predictions = self.accumulator.add(frames)
+            self.stats.set_gauge('candidates', len(predictions))
+            self.stats.set_gauge('candidate_changes', self.accumulator.candidate_changes)
+            return predictions
+        self.accumulator.add(scorer.frame_scores(frames))
+        return dict(zip(scorer.speakers, self.accumulator.scores()))
+    
+    def update_stats_panel(self):
+        """Refresh the performance panel once a second while recording."""
+        self.stats_label.config(text=self.stats.format() or "No data")
+        if self.is_recording:
+            self.after(1000, self.update_stats_panel)
+    
+    def export_stats(self):
+        path = filedialog.asksaveasfilename(
+            title="Export Latency Stats", defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom")])
+        if not path:
+            return
+        try:
+            self.stats.export(path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not export stats: {e}")
+    
+    def toggle_metrics_server(self):
+        """Start or stop the Prometheus endpoint, bound to localhost only."""
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+            self.metrics_server = None
+        if not self.serve_metrics.get():
+            return
+        try:
+            self.metrics_server = self.stats.serve(int(self.metrics_port.get()))
+        except (ValueError, OSError) as e:
+            self.serve_metrics.set(False)
+            messagebox.showerror("Error", f"Could not serve metrics: {e}")
+    
+    def render_results(self):
+        """Draw the newest result of the processing thread; intermediate ones are skipped."""
+        self.render_job = None
+        # Read before draining, so results published as recording stops still get one more pass
+        recording = self.is_recording
+        error = self.results.take_error()
+        if error is not None:
+            self.stop_recording()
+            self.status_label.config(text=f"Status: Stopped, {error}")
+        result = self.results.take()
+        if result is not None:
+            start = time.perf_counter()
+            msg_type, value, total = result
+            if msg_type == 'speech':
+                self.update_results(value, total)
+            elif msg_type == 'silence':
+                self.prediction_label.config(text="Detected Speaker: None (no speech)")
+                # The last scores are no longer current
+                self.confidence_text.delete(1.0, tk.END)
+            self.stats.record('render', time.perf_counter() - start)
+            self.stats.set_gauge('coalesced_results', self.results.coalesced)
+        if recording:
+            self.render_job = self.after(int(1000 / self.ui_fps), self.render_results)
+    
+    def update_results(self, top, total):
+        """Show the best speakers, ``top`` being (speaker, score) pairs best first out of ``total`` scored."""
+        if not top:
             return
-            
-        
-        sorted_speakers = sorted(predictions.items(), 
-                               key=lambda x: x[1], 
-                               reverse=True)
-        
         
-        most_likely_speaker = sorted_speakers[0][0]
+        most_likely_speaker = top[0][0]
         self.prediction_label.config(
             text=f"Detected Speaker: {most_likely_speaker}")
         
-        
+        lines = [f"Confidence Scores (top {len(top)} of {total}):", ""]
+        lines += [f"{speaker}: {score:.2f}" for speaker, score in top]
         self.confidence_text.delete(1.0, tk.END)
-        self.confidence_text.insert(tk.END, "Confidence Scores:\n\n")
-        for speaker, score in sorted_speakers:
-            self.confidence_text.insert(
-                tk.END, f"{speaker}: {score:.2f}\n")
+        self.confidence_text.insert(tk.END, "\n".join(lines) + "\n")
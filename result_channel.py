@@ -0,0 +1,51 @@
+import threading
+
+
+class LatestResult:
+    """Single-slot, thread-safe mailbox from a processing thread to the Tk loop.
+
+    ``publish`` replaces whatever result is still waiting, so the producer
+    never blocks on the UI and a UI that falls behind only ever draws the
+    newest result; ``take`` returns that result, or None when nothing was
+    published since the last call. ``published`` and ``coalesced`` (results
+    replaced before they were taken) count the traffic. A failure goes to a
+    separate slot with ``fail`` so later results cannot overwrite it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.value = None
+            self.pending = False
+            self.error = None
+            self.published = 0
+            self.coalesced = 0
+
+    def publish(self, value):
+        with self.lock:
+            if self.pending:
+                self.coalesced += 1
+            self.value = value
+            self.pending = True
+            self.published += 1
+
+    def take(self):
+        with self.lock:
+            if not self.pending:
+                return None
+            value, self.value = self.value, None
+            self.pending = False
+            return value
+
+    def fail(self, error):
+        """Report an error; it stays until ``take_error`` whatever is published after it."""
+        with self.lock:
+            self.error = error
+
+    def take_error(self):
+        with self.lock:
+            error, self.error = self.error, None
+            return error
@@ -0,0 +1,83 @@
+import time
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Preallocated single-producer / single-consumer audio ring buffer.
+
+    The producer (the ``sd.InputStream`` callback) copies each block into the
+    ring and then advances ``written``; the consumer only reads ``written`` and
+    its own ``read_cursor``, so neither side takes a lock and the hot path
+    allocates nothing. Samples are mirrored at ``i`` and ``i + capacity`` so any
+    window of up to ``capacity`` samples is a contiguous, zero-copy view.
+    Samples the producer overwrote before the consumer got to them are counted
+    in ``overrun_samples`` / ``overruns``.
+    """
+
+    def __init__(self, capacity, dtype=np.float32):
+        self.capacity = capacity
+        self.data = np.zeros(2 * capacity, dtype=dtype)
+        self.written = 0
+        self.read_cursor = 0
+        self.overruns = 0
+        self.overrun_samples = 0
+
+    def reset(self):
+        """Forget all buffered audio and counters (call while no producer is running)."""
+        self.data[:] = 0
+        self.written = 0
+        self.read_cursor = 0
+        self.overruns = 0
+        self.overrun_samples = 0
+
+    def write(self, samples):
+        """Append samples; called from the producer thread only."""
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+        count = len(samples)
+        start = (self.written + n - count) % self.capacity
+        first = min(count, self.capacity - start)
+        self.data[start:start + first] = samples[:first]
+        self.data[start + self.capacity:start + self.capacity + first] = samples[:first]
+        rest = count - first
+        if rest:
+            self.data[:rest] = samples[first:]
+            self.data[self.capacity:self.capacity + rest] = samples[first:]
+        # Publish only after the samples are in place
+        self.written += n
+
+    def available(self):
+        """Number of samples written since the consumer last read."""
+        return self.written - self.read_cursor
+
+    def wait(self, timeout, poll_interval=0.005):
+        """Sleep until new samples arrive or ``timeout`` seconds pass; returns True on data."""
+        deadline = time.monotonic() + timeout
+        while self.written == self.read_cursor:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+        return True
+
+    def read(self):
+        """View of the samples written since the last read, advancing the read cursor."""
+        end = self.written
+        new = end - self.read_cursor
+        if new > self.capacity:
+            self.overruns += 1
+            self.overrun_samples += new - self.capacity
+            new = self.capacity
+        self.read_cursor = end
+        return self.latest(new, end)
+
+    def latest(self, n, end=None):
+        """View of the ``n`` samples ending at absolute position ``end`` (default: read cursor).
+
+        Positions before the start of the stream read as zeros.
+        """
+        end = self.read_cursor if end is None else end
+        n = min(n, self.capacity)
+        stop = end % self.capacity + self.capacity
+        return self.data[stop - n:stop]
+
@@ -0,0 +1,117 @@
+import numpy as np
+
+
+def _frame(ms, sr):
+    # Same arithmetic as AudioSegment slicing
+    return int(ms * (sr / 1000.0))
+
+
+def _duration_ms(n_frames, sr):
+    return round(1000 * n_frames / sr)
+
+
+def _as_integer_samples(samples, sample_width):
+    """Float audio in [-1, 1] on the integer scale pydub measures; integer audio as is."""
+    samples = np.asarray(samples)
+    if np.issubdtype(samples.dtype, np.floating):
+        max_amplitude = 1 << (8 * sample_width - 1)
+        samples = np.clip(np.round(samples * (max_amplitude - 1)), -max_amplitude, max_amplitude - 1)
+    return samples
+
+
+def detect_silence_array(samples, sr, min_silence_len=1000, silence_thresh=-16, seek_step=1,
+                         sample_width=2):
+    """Silent ``[start, end]`` ranges in ms, equal to ``pydub.silence.detect_silence``.
+
+    ``samples`` is shaped (frames,) or (frames, channels). Instead of one
+    ``audioop.rms`` call per millisecond, the energy of every
+    ``min_silence_len`` window is read off a cumulative sum of squared
+    samples, and the windows are merged into ranges with array operations.
+    """
+    samples = _as_integer_samples(samples, sample_width)
+    n_frames = samples.shape[0]
+    seg_len = _duration_ms(n_frames, sr)
+    if seg_len < min_silence_len:
+        return []
+
+    threshold = 10 ** (silence_thresh / 20) * (1 << (8 * sample_width - 1))
+
+    # Sum of squares over channels per frame; exact in int64 for 16-bit audio
+    accumulator = np.int64 if sample_width <= 2 else np.float64
+    squares = samples.astype(accumulator) ** 2
+    if squares.ndim > 1:
+        squares = squares.sum(axis=1)
+    cumulative = np.concatenate([np.zeros(1, dtype=accumulator), np.cumsum(squares)])
+
+    last_slice_start = seg_len - min_silence_len
+    starts = np.arange(0, last_slice_start + 1, seek_step)
+    if last_slice_start % seek_step:
+        starts = np.append(starts, last_slice_start)
+
+    first = (starts * (sr / 1000.0)).astype(np.int64)
+    last = ((starts + min_silence_len) * (sr / 1000.0)).astype(np.int64)
+    # Windows running past the end are padded with zeros by pydub, and those count in the mean
+    energy = cumulative[np.minimum(last, n_frames)] - cumulative[np.minimum(first, n_frames)]
+    count = (last - first) * (samples.shape[1] if samples.ndim > 1 else 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rms = np.where(count > 0, np.floor(np.sqrt(energy / np.maximum(count, 1))), 0)
+
+    silence_starts = starts[rms <= threshold]
+    if not len(silence_starts):
+        return []
+
+    previous, current = silence_starts[:-1], silence_starts[1:]
+    breaks = (current != previous + seek_step) & (current > previous + min_silence_len)
+    range_starts = np.concatenate([silence_starts[:1], current[breaks]])
+    range_ends = np.concatenate([previous[breaks], silence_starts[-1:]]) + min_silence_len
+    return [[int(s), int(e)] for s, e in zip(range_starts, range_ends)]
+
+
+def detect_nonsilent_array(samples, sr, min_silence_len=1000, silence_thresh=-16, seek_step=1,
+                           sample_width=2):
+    """Non-silent ``[start, end]`` ranges in ms, equal to ``pydub.silence.detect_nonsilent``."""
+    silent_ranges = detect_silence_array(samples, sr, min_silence_len, silence_thresh, seek_step,
+                                         sample_width)
+    len_seg = _duration_ms(np.shape(samples)[0], sr)
+
+    if not silent_ranges:
+        return [[0, len_seg]]
+    if silent_ranges[0][0] == 0 and silent_ranges[0][1] == len_seg:
+        return []
+
+    prev_end_i = 0
+    nonsilent_ranges = []
+    for start_i, end_i in silent_ranges:
+        nonsilent_ranges.append([prev_end_i, start_i])
+        prev_end_i = end_i
+    if end_i != len_seg:
+        nonsilent_ranges.append([prev_end_i, len_seg])
+    if nonsilent_ranges[0] == [0, 0]:
+        nonsilent_ranges.pop(0)
+    return nonsilent_ranges
+
+
+def join_ranges(samples, ranges, sr):
+    """Concatenate ms ranges of a signal into one preallocated array.
+
+    Matches ``sum(audio[start:end] ...)`` on an AudioSegment in linear instead
+    of quadratic time: ranges are cut at the segment's length in ms, and the
+    zero padding pydub adds when that length rounds up past the last frame
+    is kept.
+    """
+    len_seg = _duration_ms(samples.shape[0], sr)
+    bounds = [(_frame(min(start, len_seg), sr), _frame(min(end, len_seg), sr)) for start, end in ranges]
+    out = np.zeros((sum(max(b - a, 0) for a, b in bounds),) + samples.shape[1:], dtype=samples.dtype)
+    position = 0
+    for a, b in bounds:
+        piece = samples[a:b]
+        out[position:position + len(piece)] = piece
+        position += max(b - a, 0)
+    return out
+
+
+def remove_silence_array(samples, sr, silence_thresh=-50, min_silence_len=1000, sample_width=2):
+    """Non-silent parts of a signal joined together, empty if it is all silence."""
+    ranges = detect_nonsilent_array(samples, sr, min_silence_len, silence_thresh,
+                                    sample_width=sample_width)
+    return join_ranges(samples, ranges, sr)
@@ -0,0 +1,351 @@
+import os
+import zlib
+import numpy as np
+from gmm_scoring import GMMScorer, LOG_2PI
+from model_store import ModelIndex
+from ubm import find_ubm, train_ubm
+
+
+INDEX_FILENAME = "speakers.index.npz"
+INDEX_VERSION = 1
+
+# Frames drawn from a speaker model that was not adapted from the reference mixture
+MODEL_SAMPLE_FRAMES = 1000
+
+# Reference mixture derived from the models when the directory has no UBM
+REFERENCE_COMPONENTS = 64
+REFERENCE_FRAMES = 20_000
+
+# Below this many speakers a single list is scanned, which is exhaustive and already fast
+MIN_IVF_SPEAKERS = 256
+
+# Inverted lists scanned per query
+N_PROBE = 16
+
+KMEANS_ITERATIONS = 20
+
+
+def sample_frames(weights, means, variances, n_frames, rng):
+    """Draw frames from a diagonal GMM."""
+    weights = np.asarray(weights, dtype=np.float64)
+    components = rng.choice(len(weights), n_frames, p=weights / weights.sum())
+    return (np.asarray(means, dtype=np.float64)[components]
+            + rng.standard_normal((n_frames, np.shape(means)[1]))
+            * np.sqrt(np.asarray(variances, dtype=np.float64)[components]))
+
+
+def spherical_kmeans(vectors, n_clusters, iterations=KMEANS_ITERATIONS, seed=0):
+    """Cluster unit vectors by cosine similarity; returns unit centroids and the assignments.
+
+    Initialized with k-means++ on the cosine distance. A cluster that runs
+    empty is re-seeded with the vector farthest from its centroid.
+    """
+    rng = np.random.RandomState(seed)
+    n = len(vectors)
+    n_clusters = min(n_clusters, n)
+    centroids = np.empty((n_clusters, vectors.shape[1]), dtype=vectors.dtype)
+    centroids[0] = vectors[rng.randint(n)]
+    distance = np.maximum(1.0 - vectors @ centroids[0], 0)
+    for c in range(1, n_clusters):
+        total = distance.sum()
+        pick = rng.choice(n, p=distance / total) if total > 0 else rng.randint(n)
+        centroids[c] = vectors[pick]
+        distance = np.minimum(distance, np.maximum(1.0 - vectors @ centroids[c], 0))
+
+    assignments = np.zeros(n, dtype=int)
+    for iteration in range(iterations):
+        similarity = vectors @ centroids.T
+        new_assignments = similarity.argmax(axis=1)
+        if iteration and np.array_equal(new_assignments, assignments):
+            break
+        assignments = new_assignments
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        for c in np.flatnonzero(counts == 0):
+            farthest = np.argmin(similarity[np.arange(n), assignments])
+            sums[c] = vectors[farthest]
+            assignments[farthest] = c
+            similarity[farthest, c] = 1.0
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.maximum(norms, 1e-12)
+    return centroids, assignments
+
+
+class SpeakerIndex:
+    """Approximate nearest-neighbour search of speakers by GMM supervector (IVF).
+
+    Every speaker is represented by the means of a reference mixture (the
+    UBM, or a mixture fitted to frames drawn from the models) adapted to
+    the speaker, stacked into one vector: each component's shift from the
+    reference mean, scaled by the square root of its weight and by its
+    standard deviations, and normalized to unit length. MAP-adapted models
+    give their means directly; other models are adapted from frames drawn
+    from them. An utterance is turned into a vector the same way, by MAP
+    adaptation on its frames, and speakers are ranked by cosine similarity.
+
+    The vectors are clustered with spherical k-means into about sqrt(N)
+    inverted lists; a query scans the ``n_probe`` lists whose centroids are
+    closest, so it touches a small fraction of the speakers. New vectors
+    are filed under their nearest centroid, and the lists are re-clustered
+    once the index has doubled since it was last trained.
+    """
+
+    def __init__(self, weights, means, variances, relevance_factor=16.0):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.means = np.asarray(means, dtype=np.float64)
+        self.variances = np.asarray(variances, dtype=np.float64)
+        self.relevance_factor = relevance_factor
+        self.n_probe = N_PROBE
+
+        self.precisions = 1.0 / self.variances
+        self.scale = (np.sqrt(self.weights)[:, np.newaxis] / np.sqrt(self.variances)).ravel()
+        self.offsets = (np.log(self.weights)
+                        - 0.5 * (self.means.shape[1] * LOG_2PI + np.sum(np.log(self.variances), axis=1))
+                        - 0.5 * np.sum(self.means ** 2 * self.precisions, axis=1))
+
+        self.speakers = []
+        self.vectors = np.empty((0, self.means.size), dtype=np.float32)
+        self.centroids = None
+        self.assignments = np.empty(0, dtype=int)
+        self.trained_size = 0
+        self._lists = None
+
+    @classmethod
+    def from_ubm(cls, ubm, relevance_factor=16.0):
+        return cls(ubm.weights_, ubm.means_, ubm.covariances_, relevance_factor)
+
+    @classmethod
+    def from_models(cls, models, relevance_factor=16.0, seed=0):
+        """Index whose reference mixture is fitted to frames drawn from ``(speaker, params)`` models."""
+        per_model = min(MODEL_SAMPLE_FRAMES, -(-REFERENCE_FRAMES // len(models)))
+        rng = np.random.RandomState(seed)
+        pooled = np.vstack([sample_frames(*params, per_model, rng) for _, params in models])
+        n_components = max(1, min(REFERENCE_COMPONENTS, len(pooled) // 50))
+        return cls.from_ubm(train_ubm(pooled, n_components, max_frames=REFERENCE_FRAMES, random_state=seed),
+                            relevance_factor)
+
+    def __len__(self):
+        return len(self.speakers)
+
+    @property
+    def n_lists(self):
+        return 0 if self.centroids is None else len(self.centroids)
+
+    def missing(self, speakers):
+        """Those of ``speakers`` the index has no vector for; the index can never shortlist them."""
+        indexed = set(self.speakers)
+        return [speaker for speaker in speakers if speaker not in indexed]
+
+    def matches(self, ubm):
+        """True if the index was built on this UBM."""
+        return (self.means.shape == ubm.means_.shape
+                and np.allclose(self.means, ubm.means_) and np.allclose(self.weights, ubm.weights_)
+                and np.allclose(self.variances, ubm.covariances_))
+
+    def _is_adapted(self, weights, variances):
+        return (np.shape(weights) == self.weights.shape
+                and np.allclose(weights, self.weights, rtol=1e-4, atol=1e-7)
+                and np.allclose(variances, self.variances, rtol=1e-4, atol=1e-7))
+
+    def adapt(self, X):
+        """Reference means MAP-adapted to the frames ``X``."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        log_prob = (X @ (self.means * self.precisions).T
+                    - 0.5 * ((X * X) @ self.precisions.T)
+                    + self.offsets)
+        log_prob -= log_prob.max(axis=1, keepdims=True)
+        responsibilities = np.exp(log_prob)
+        responsibilities /= responsibilities.sum(axis=1, keepdims=True)
+        counts = responsibilities.sum(axis=0)
+        expected = (responsibilities.T @ X) / np.maximum(counts, 1e-10)[:, np.newaxis]
+        alpha = (counts / (counts + self.relevance_factor))[:, np.newaxis]
+        return alpha * expected + (1 - alpha) * self.means
+
+    def supervector(self, means):
+        """Unit-length supervector of adapted reference means."""
+        vector = (np.asarray(means, dtype=np.float64) - self.means).ravel() * self.scale
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def model_vector(self, speaker, weights, means, variances):
+        """Supervector of a speaker GMM; models not adapted from the reference are sampled."""
+        if self._is_adapted(weights, variances):
+            return self.supervector(means)
+        rng = np.random.RandomState(zlib.crc32(speaker.encode('utf-8')))
+        return self.supervector(self.adapt(sample_frames(weights, means, variances, MODEL_SAMPLE_FRAMES, rng)))
+
+    def query_vector(self, X):
+        return self.supervector(self.adapt(X))
+
+    def put(self, speakers, vectors):
+        """Add speakers or replace their vectors; new vectors go to their nearest list."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(speakers), -1)
+        position = {speaker: i for i, speaker in enumerate(self.speakers)}
+        lists = self._nearest_lists(vectors) if self.centroids is not None else np.zeros(len(speakers), dtype=int)
+        appended_vectors, appended_lists = [], []
+        for speaker, vector, list_id in zip(speakers, vectors, lists):
+            if speaker in position:
+                self.vectors[position[speaker]] = vector
+                self.assignments[position[speaker]] = list_id
+            else:
+                position[speaker] = len(self.speakers)
+                self.speakers.append(speaker)
+                appended_vectors.append(vector)
+                appended_lists.append(list_id)
+        if appended_vectors:
+            self.vectors = np.vstack([self.vectors, appended_vectors])
+            self.assignments = np.concatenate([self.assignments, np.array(appended_lists, dtype=int)])
+        self._lists = None
+
+    def remove(self, speakers):
+        removed = set(speakers)
+        keep = np.array([speaker not in removed for speaker in self.speakers], dtype=bool)
+        self.speakers = [speaker for speaker in self.speakers if speaker not in removed]
+        self.vectors = self.vectors[keep]
+        self.assignments = self.assignments[keep]
+        self._lists = None
+
+    def needs_training(self):
+        return self.centroids is None or len(self) > 2 * self.trained_size
+
+    def train(self, seed=0):
+        """Cluster the vectors into about sqrt(N) inverted lists."""
+        n_lists = int(round(np.sqrt(len(self)))) if len(self) >= MIN_IVF_SPEAKERS else 1
+        if len(self) == 0:
+            self.centroids = None
+        elif n_lists == 1:
+            self.centroids = np.zeros((1, self.vectors.shape[1]), dtype=np.float32)
+            self.assignments = np.zeros(len(self), dtype=int)
+        else:
+            self.centroids, self.assignments = spherical_kmeans(self.vectors, n_lists, seed=seed)
+        self.trained_size = len(self)
+        self._lists = None
+
+    def _nearest_lists(self, vectors):
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def _inverted_lists(self):
+        if self._lists is None:
+            order = np.argsort(self.assignments, kind='stable')
+            bounds = np.searchsorted(self.assignments[order], np.arange(self.n_lists + 1))
+            self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(self.n_lists)]
+        return self._lists
+
+    def search(self, X, k, n_probe=None):
+        """The ``k`` speakers nearest to the frames ``X`` and their cosine similarities, best first."""
+        if not len(self):
+            return [], np.empty(0)
+        query = self.query_vector(X).astype(np.float32)
+        n_probe = n_probe or self.n_probe
+        if self.centroids is None or n_probe >= self.n_lists:
+            members = np.arange(len(self))
+        else:
+            lists = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+            inverted = self._inverted_lists()
+            members = np.concatenate([inverted[i] for i in lists])
+        similarity = self.vectors[members] @ query
+        k = min(k, len(members))
+        best = np.argpartition(-similarity, k - 1)[:k]
+        best = best[np.argsort(-similarity[best])]
+        return [self.speakers[i] for i in members[best]], similarity[best]
+
+    def ranker(self, scorer):
+        """Shortlist source over the speakers of ``scorer``, for ``PrunedScorer``."""
+        return IndexRanker(self, scorer)
+
+    def save(self, path):
+        """Write the index to ``path`` through a temporary file, so readers never see a partial one."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, version=INDEX_VERSION, weights=self.weights, means=self.means,
+                     variances=self.variances, relevance_factor=self.relevance_factor,
+                     speakers=np.array(self.speakers, dtype=str), vectors=self.vectors,
+                     centroids=self.centroids if self.centroids is not None
+                     else np.empty((0, self.vectors.shape[1]), dtype=np.float32),
+                     assignments=self.assignments, trained_size=self.trained_size)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data['version']) > INDEX_VERSION:
+                raise ValueError(f"Unsupported speaker index version {int(data['version'])}")
+            index = cls(data['weights'], data['means'], data['variances'], float(data['relevance_factor']))
+            index.speakers = [str(speaker) for speaker in data['speakers']]
+            index.vectors = data['vectors']
+            index.centroids = data['centroids'] if len(data['centroids']) else None
+            index.assignments = data['assignments']
+            index.trained_size = int(data['trained_size'])
+        return index
+
+
+class IndexRanker:
+    """Ranks the speakers of a scorer with a ``SpeakerIndex``; speakers it does not hold are never shortlisted."""
+
+    def __init__(self, index, scorer):
+        self.index = index
+        self.n_features = index.means.shape[1]
+        self.positions = {speaker: i for i, speaker in enumerate(scorer.speakers)}
+
+    def top(self, X, n):
+        """Scorer indices of the ``n`` speakers nearest to the frames ``X``, best first."""
+        speakers, _ = self.index.search(X, n)
+        return np.array([self.positions[s] for s in speakers if s in self.positions], dtype=int)
+
+
+def find_speaker_index(models_dir):
+    """The speaker index saved in a models directory, or None."""
+    path = os.path.join(str(models_dir), INDEX_FILENAME)
+    return SpeakerIndex.load(path) if os.path.exists(path) else None
+
+
+def _model_params(models, speaker):
+    scorer = GMMScorer()
+    models.add_to(scorer, speaker)
+    return scorer.model_params(0)
+
+
+def build_speaker_index(models_dir, speakers=None, relevance_factor=16.0, progress=None):
+    """Create or update the speaker index of a models directory.
+
+    With ``speakers`` an existing index built on the directory's current UBM
+    is updated in place: those speakers, and any model not indexed yet, get
+    new vectors, and speakers whose models are gone are dropped. Otherwise
+    (or when the UBM changed) the index is rebuilt from every model.
+    ``progress(done, total)`` is called as vectors are computed. Returns the
+    index, which is also saved as ``INDEX_FILENAME`` in ``models_dir``.
+    """
+    models_dir = str(models_dir)
+    models = ModelIndex(models_dir)
+    ubm = find_ubm(models_dir)
+    index = find_speaker_index(models_dir) if speakers is not None else None
+    if index is not None and ubm is not None and not index.matches(ubm):
+        index = None
+
+    if index is None:
+        if ubm is not None:
+            index = SpeakerIndex.from_ubm(ubm, relevance_factor)
+        elif len(models):
+            index = SpeakerIndex.from_models([(speaker, _model_params(models, speaker))
+                                              for speaker in models.speakers], relevance_factor)
+        else:
+            raise ValueError(f"No speaker models found in {models_dir}")
+        todo = models.speakers
+    else:
+        indexed = set(index.speakers)
+        index.remove([speaker for speaker in index.speakers if speaker not in models.entries])
+        requested = set(speakers)
+        todo = [speaker for speaker in models.speakers if speaker in requested or speaker not in indexed]
+
+    vectors = []
+    for done, speaker in enumerate(todo, 1):
+        vectors.append(index.model_vector(speaker, *_model_params(models, speaker)))
+        if progress:
+            progress(done, len(todo))
+    if todo:
+        index.put(todo, np.array(vectors))
+    if index.needs_training():
+        index.train()
+    index.save(os.path.join(models_dir, INDEX_FILENAME))
+    return index
@@ -0,0 +1,83 @@
+import numpy as np
+import scipy.ndimage
+import scipy.signal
+from audio_frontend import frame_energy_db
+
+
+class StreamingDenoiser:
+    """Stateful spectral-gating denoiser for a stream of STFT power frames.
+
+    Works like noisereduce's stationary gate (a bin is kept when it rises
+    ``n_std_thresh`` standard deviations above the noise level in dB), but the
+    noise mean and variance are running estimates updated only from frames
+    classified as non-speech, and only newly arrived frames are gated. It
+    consumes the power spectra computed by ``AudioFrontEnd``, so no extra STFT
+    is needed.
+    """
+
+    def __init__(self, n_bins, n_std_thresh=1.5, prop_decrease=1.0, speech_margin_db=6.0,
+                 adaptation_rate=0.05, init_frames=10, freq_smooth_bins=5, time_smoothing=0.5):
+        self.n_bins = n_bins
+        self.n_std_thresh = n_std_thresh
+        self.prop_decrease = prop_decrease
+        self.speech_margin_db = speech_margin_db
+        self.adaptation_rate = adaptation_rate
+        self.init_frames = init_frames
+        self.freq_smooth_bins = freq_smooth_bins
+        self.time_smoothing = time_smoothing
+        self.reset()
+
+    def reset(self):
+        self.noise_mean = np.zeros(self.n_bins)
+        self.noise_var = np.zeros(self.n_bins)
+        self.noise_energy_db = 0.0
+        self.noise_frames = 0
+        self.last_speech = np.zeros(0, dtype=bool)
+        self._mask_state = np.ones(self.n_bins)
+
+    def classify(self, power):
+        """Speech/non-speech decision per frame from its energy relative to the noise floor."""
+        energy_db = frame_energy_db(power)
+        if self.noise_frames < self.init_frames:
+            # Bootstrap the noise estimate from the first frames of the stream
+            return np.zeros(len(power), dtype=bool), energy_db
+        return energy_db > self.noise_energy_db + self.speech_margin_db, energy_db
+
+    def update_noise(self, power_db, energy_db):
+        """Fold non-speech frames into the running noise statistics."""
+        n = len(power_db)
+        if n == 0:
+            return
+        frame_mean = power_db.mean(axis=0)
+        if self.noise_frames == 0:
+            self.noise_mean = frame_mean
+            self.noise_var = power_db.var(axis=0)
+            self.noise_energy_db = energy_db.mean()
+        else:
+            alpha = 1.0 - (1.0 - self.adaptation_rate) ** n
+            self.noise_mean = (1 - alpha) * self.noise_mean + alpha * frame_mean
+            self.noise_var = ((1 - alpha) * self.noise_var
+                              + alpha * np.mean((power_db - self.noise_mean) ** 2, axis=0))
+            self.noise_energy_db = (1 - alpha) * self.noise_energy_db + alpha * energy_db.mean()
+        self.noise_frames += n
+
+    def process(self, power):
+        """Gate a (n_frames, n_bins) block of power spectra and return the gated power."""
+        if len(power) == 0:
+            return power
+        power_db = 10.0 * np.log10(np.maximum(power, 1e-10))
+        speech, energy_db = self.classify(power)
+        self.update_noise(power_db[~speech], energy_db[~speech])
+        self.last_speech = speech
+
+        threshold = self.noise_mean + self.n_std_thresh * np.sqrt(self.noise_var)
+        mask = (power_db > threshold).astype(np.float64)
+        if self.freq_smooth_bins > 1:
+            mask = scipy.ndimage.uniform_filter1d(mask, self.freq_smooth_bins, axis=1)
+        # Causal one-pole smoothing over time, continued across calls
+        mask, _ = scipy.signal.lfilter([1 - self.time_smoothing], [1, -self.time_smoothing], mask,
+                                       axis=0, zi=self.time_smoothing * self._mask_state[np.newaxis])
+        self._mask_state = mask[-1]
+
+        gain = mask * self.prop_decrease + (1.0 - self.prop_decrease)
+        return power * gain ** 2
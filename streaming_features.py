@@ -0,0 +1,248 @@
+import numpy as np
+import librosa
+from audio_frontend import delta_coeffs, frame_energy_db
+
+
+class FeatureRing:
+    """Fixed-capacity ring of feature frames with contiguous views of the latest frames.
+
+    Every frame is written twice (at ``i`` and ``i + capacity``) so the most
+    recent ``n <= capacity`` frames are always one contiguous slice and reading
+    them never copies.
+    """
+
+    def __init__(self, n_features, capacity):
+        self.capacity = capacity
+        self.data = np.zeros((2 * capacity, n_features))
+        self.count = 0
+
+    def append(self, frames):
+        """Append a (n_frames, n_features) block."""
+        n_frames = len(frames)
+        frames = frames[-self.capacity:]
+        self.set(self.count + n_frames - len(frames), frames)
+        self.count += n_frames
+
+    def set(self, index, frames):
+        """Overwrite frames starting at absolute frame index ``index``."""
+        positions = (index + np.arange(len(frames))) % self.capacity
+        self.data[positions] = frames
+        self.data[positions + self.capacity] = frames
+
+    def latest(self, n):
+        """View of the last ``n`` frames (fewer if not enough have been written)."""
+        n = min(n, self.count, self.capacity)
+        end = self.count % self.capacity + self.capacity
+        return self.data[end - n:end]
+
+
+class StreamingMFCC:
+    """Incremental MFCC / delta / delta-delta extraction over a sliding window.
+
+    Only the STFT frames covered by newly pushed samples are computed, through
+    the shared ``AudioFrontEnd``; past frames are kept in feature rings, so the
+    cost of a tick scales with the step size rather than the window length.
+    The stream is primed with the zero padding of a centered STFT, so frames
+    land on the same grid as ``librosa.feature.mfcc``. A delta is final once
+    ``width // 2`` later frames exist; the newest frames get the edge fit
+    librosa applies at the end of a window. Normalization is applied as the
+    equivalent dB offset of the window peak (measured after denoising).
+
+    An optional ``denoiser`` (see ``streaming_denoise.StreamingDenoiser``)
+    gates the power spectra of the new frames before the mel stage, sharing
+    the front-end's STFT.
+
+    With a ``vad`` (see ``vad.StreamingVAD``) only speech frames enter the
+    window: pushes without speech compute nothing beyond frame energies
+    (the denoiser's noise estimate is still refreshed every
+    ``noise_refresh_every`` such pushes), and non-speech frames of a push
+    with speech are dropped after denoising.
+    """
+
+    # Pushes without speech between two updates of the denoiser's noise estimate
+    noise_refresh_every = 10
+
+    def __init__(self, frontend, window_seconds=3, denoiser=None, vad=None):
+        self.frontend = frontend
+        self.denoiser = denoiser
+        self.vad = vad
+        self.silent_pushes = 0
+        # Frames already handed out by new_frames
+        self.emitted = 0
+        self.window_frames = 1 + int(window_seconds * frontend.sr) // frontend.hop_length
+
+        width = frontend.delta_width
+        capacity = self.window_frames + width // 2 + 1
+        self.mel_db = FeatureRing(frontend.n_mels, capacity)
+        self.mfcc = FeatureRing(frontend.n_mfcc, capacity)
+        self.frame_stats = FeatureRing(3, capacity)  # min dB, max dB, peak |sample|
+        self.deltas = {order: FeatureRing(frontend.n_mfcc, capacity)
+                       for order in frontend.delta_orders}
+
+        self.pending = np.zeros(frontend.n_fft // 2)
+
+    @property
+    def n_features(self):
+        return self.frontend.n_features
+
+    def push(self, samples):
+        """Feed new audio samples; computes only the frames they complete and returns how many entered the window."""
+        frontend = self.frontend
+        self.pending = np.concatenate([self.pending, np.asarray(samples, dtype=np.float64).ravel()])
+        frames = frontend.frames(self.pending)
+        n_new = len(frames)
+        if n_new == 0:
+            return 0
+
+        power = None
+        speech = None
+        if self.vad is not None:
+            speech, power = self.vad.classify(frames)
+            if not speech.any():
+                self._refresh_noise(frames, power)
+                self.pending = self.pending[n_new * frontend.hop_length:]
+                return 0
+            self.silent_pushes = 0
+
+        if power is None:
+            power = frontend.power_frames(frames)
+        peaks = frontend.frame_peaks(frames)
+        if self.denoiser is not None:
+            gated = self.denoiser.process(power)
+            peaks = frontend.gated_peaks(peaks, power, gated)
+            power = gated
+        self.pending = self.pending[n_new * frontend.hop_length:]
+        if speech is not None and not speech.all():
+            power, peaks = power[speech], peaks[speech]
+        mel_db = frontend.mel_db(power)
+
+        self.mel_db.append(mel_db)
+        self.mfcc.append(frontend.mfcc(mel_db))
+        self.frame_stats.append(np.column_stack([mel_db.min(axis=1), mel_db.max(axis=1), peaks]))
+
+        self._finalize_deltas()
+        return len(mel_db)
+
+    def _refresh_noise(self, frames, power):
+        """Let the denoiser learn the noise from non-speech pushes: at the start, then periodically."""
+        denoiser = self.denoiser
+        self.silent_pushes += 1
+        if denoiser is None:
+            return
+        if denoiser.noise_frames >= denoiser.init_frames and self.silent_pushes % self.noise_refresh_every:
+            return
+        if power is None:
+            power = self.frontend.power_frames(frames)
+        denoiser.update_noise(10.0 * np.log10(np.maximum(power, 1e-10)), frame_energy_db(power))
+
+    def _finalize_deltas(self):
+        width = self.frontend.delta_width
+        half = width // 2
+        for order, ring in self.deltas.items():
+            # A delta is final once the frames up to ``half`` ahead of it exist
+            last_final = self.mfcc.count - half
+            if last_final <= ring.count:
+                continue
+            if ring.count == 0:
+                if self.mfcc.count < width:
+                    continue
+                # The first frames of the stream keep librosa's interp edge fit
+                history = self.mfcc.latest(self.mfcc.count)
+                ring.count = self.mfcc.count - len(history)
+                head = librosa.feature.delta(history.T, width=width, order=order).T
+                ring.append(head[:len(history) - half])
+                continue
+            # Skip frames that already fell out of the mfcc ring
+            ring.count = max(ring.count, self.mfcc.count + half - self.mfcc.capacity)
+            context = self.mfcc.latest(self.mfcc.count - ring.count + half)
+            windows = np.lib.stride_tricks.sliding_window_view(context, width, axis=0)
+            ring.append(windows @ delta_coeffs(width, order))
+
+    def _clamp(self, mfcc, stats, mel_db, peak_db):
+        """Re-derive the MFCCs of the frames that fall under the ``top_db`` floor below ``peak_db``."""
+        clamped = np.flatnonzero(stats[:, 0] < peak_db - self.frontend.top_db)
+        if len(clamped):
+            mfcc = mfcc.copy()
+            mfcc[clamped] = self.frontend.mfcc(self.frontend.clamp(mel_db[clamped], peak_db))
+        return mfcc
+
+    def _clamped_deltas(self, back, n, peak_db):
+        """Deltas of the ``n`` frames starting ``back`` frames before the newest, recomputed
+        from MFCCs clamped at ``peak_db`` with their neighbours as context, or None when the
+        floor changes none of those frames (the rings were computed without it)."""
+        half = self.frontend.delta_width // 2
+        before = min(half, min(self.mfcc.count, self.mfcc.capacity) - back)
+        after = min(half, back - n)
+        length = before + n + after
+        stats = self.frame_stats.latest(back + before)[:length]
+        if not (stats[:, 0] < peak_db - self.frontend.top_db).any():
+            return None
+        mfcc = self._clamp(self.mfcc.latest(back + before)[:length], stats,
+                           self.mel_db.latest(back + before)[:length], peak_db)
+        return [deltas[before:before + n] for deltas in self.frontend.deltas(mfcc)]
+
+    def _clamped_mfcc(self, n):
+        mfcc = self.mfcc.latest(n)
+        stats = self.frame_stats.latest(n)
+        if self.frontend.top_db is None:
+            return mfcc, stats
+        return self._clamp(mfcc, stats, self.mel_db.latest(n), stats[:, 1].max()), stats
+
+    def final_count(self):
+        """Frames whose features can no longer change (their deltas have all the context they need)."""
+        if self.deltas:
+            return min(ring.count for ring in self.deltas.values())
+        return self.mfcc.count
+
+    def new_frames(self, normalize=False):
+        """Feature frames finalized since the last call, shape (n_frames, n_features), or None.
+
+        For frame-level scoring: every frame is returned exactly once, with
+        the same MFCC/delta layout the models were trained on. The ``top_db``
+        floor and normalization use the current window, as ``features`` does.
+        """
+        final = self.final_count()
+        # Frames that already left the rings are skipped
+        start = max(self.emitted, final - self.window_frames)
+        self.emitted = final
+        n = final - start
+        if n <= 0:
+            return None
+
+        back = self.mfcc.count - start
+        mfcc = self.mfcc.latest(back)[:n]
+        stats = self.frame_stats.latest(back)[:n]
+        window_stats = self.frame_stats.latest(min(self.window_frames, self.mfcc.count))
+        deltas = None
+        if self.frontend.top_db is not None:
+            peak_db = window_stats[:, 1].max()
+            mfcc = self._clamp(mfcc, stats, self.mel_db.latest(back)[:n], peak_db)
+            if self.deltas:
+                deltas = self._clamped_deltas(back, n, peak_db)
+        if normalize:
+            mfcc = mfcc + self.frontend.normalization_offset(window_stats[:, 2].max())
+
+        if deltas is None:
+            deltas = [ring.latest(ring.count - start)[:n] for ring in self.deltas.values()]
+        return np.hstack([mfcc] + deltas)
+
+    def features(self, normalize=False):
+        """Feature frames of the current window, shape (n_frames, n_features), or None."""
+        width = self.frontend.delta_width
+        n = min(self.window_frames, self.mfcc.count)
+        if n < width:
+            return None
+
+        mfcc, stats = self._clamped_mfcc(n)
+        deltas = None
+        if self.frontend.top_db is not None and self.deltas:
+            deltas = self._clamped_deltas(n, n, stats[:, 1].max())
+        if deltas is None:
+            half = width // 2
+            tails = self.frontend.deltas(mfcc[-width:])
+            deltas = [np.vstack([ring.latest(n - half), tail[-half:]])
+                      for ring, tail in zip(self.deltas.values(), tails)]
+        if normalize:
+            mfcc = mfcc + self.frontend.normalization_offset(stats[:, 2].max())
+
+        return np.hstack([mfcc] + deltas)
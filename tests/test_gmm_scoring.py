@@ -0,0 +1,45 @@
+import os
+import sys
+import numpy as np
+from sklearn.mixture import GaussianMixture
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gmm_scoring import GMMScorer
+
+
+def fitted_models():
+    """Models of mixed component counts and covariance types, fitted on different data."""
+    rng = np.random.RandomState(0)
+    models = {}
+    for i, (n_components, covariance_type) in enumerate([(4, 'diag'), (2, 'diag'), (3, 'spherical'),
+                                                         (2, 'full')]):
+        data = rng.randn(300, 6) * (1 + i) + i
+        models[f"speaker{i}"] = GaussianMixture(n_components, covariance_type=covariance_type,
+                                                random_state=0).fit(data)
+    return models
+
+
+def test_frame_scores_match_score_samples():
+    models = fitted_models()
+    scorer = GMMScorer(models)
+    X = np.random.RandomState(1).randn(50, 6) * 2
+    expected = np.column_stack([models[speaker].score_samples(X) for speaker in scorer.speakers])
+    np.testing.assert_allclose(scorer.frame_scores(X), expected, rtol=1e-10, atol=1e-8)
+
+
+def test_blocked_scoring_matches_one_block():
+    models = fitted_models()
+    scorer = GMMScorer(models)
+    X = np.random.RandomState(2).randn(37, 6)
+    whole = scorer.frame_scores(X)
+    scorer.max_block_size = 1
+    np.testing.assert_allclose(scorer.frame_scores(X), whole, rtol=1e-12)
+
+
+def test_score_dict_matches_gaussian_mixture_score():
+    models = fitted_models()
+    X = np.random.RandomState(3).randn(20, 6)
+    scores = GMMScorer(models).score_dict(X)
+    for speaker, model in models.items():
+        assert np.isclose(scores[speaker], model.score(X), rtol=1e-10)
@@ -0,0 +1,82 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_store import BANK_MAGIC, BANK_VERSION, ModelBank, _HEADER
+
+
+N_FEATURES = 6
+
+
+def random_model(n_components, seed):
+    rng = np.random.RandomState(seed)
+    weights = rng.dirichlet(np.ones(n_components))
+    return weights, rng.randn(n_components, N_FEATURES), rng.rand(n_components, N_FEATURES) + 0.1
+
+
+def assert_model_equal(bank, speaker, model):
+    for stored, expected in zip(bank.params(speaker), model):
+        np.testing.assert_array_equal(stored, np.asarray(expected, dtype=np.float32))
+
+
+def test_models_round_trip_through_the_file(tmp_path):
+    path = str(tmp_path / "speakers.bank")
+    models = {f"speaker{i}": random_model(3 + i, i) for i in range(4)}
+    bank = ModelBank.create(path, N_FEATURES, {'n_mfcc': N_FEATURES})
+    bank.put_many([(speaker,) + model for speaker, model in models.items()])
+
+    reopened = ModelBank(path)
+    assert reopened.speakers == list(models)
+    assert reopened.feature_config == {'n_mfcc': N_FEATURES}
+    for speaker, model in models.items():
+        assert reopened.index['speakers'][speaker]['offset'] % 64 == 0
+        assert_model_equal(reopened, speaker, model)
+
+    with open(path, 'rb') as f:
+        magic, version, _, index_offset, index_length = _HEADER.unpack(f.read(_HEADER.size))
+    assert (magic, version) == (BANK_MAGIC, BANK_VERSION)
+    assert index_offset + index_length == os.path.getsize(path)
+
+
+def test_replaced_and_removed_records_are_reclaimed_by_compact(tmp_path):
+    path = str(tmp_path / "speakers.bank")
+    bank = ModelBank.create(path, N_FEATURES)
+    for i in range(3):
+        bank.put(f"speaker{i}", *random_model(4, i))
+    replacement = random_model(2, 10)
+    bank.put("speaker1", *replacement)
+    bank.remove("speaker2")
+    assert bank.index['garbage_bytes'] > 0
+    size = os.path.getsize(path)
+
+    bank.compact()
+    assert bank.index['garbage_bytes'] == 0
+    assert os.path.getsize(path) < size
+    assert bank.speakers == ["speaker0", "speaker1"]
+    assert_model_equal(bank, "speaker0", random_model(4, 0))
+    assert_model_equal(ModelBank(path), "speaker1", replacement)
+
+
+def test_bytes_past_the_index_do_not_change_the_bank(tmp_path):
+    # An interrupted append leaves records after the index the header still points to
+    path = str(tmp_path / "speakers.bank")
+    bank = ModelBank.create(path, N_FEATURES)
+    bank.put("speaker0", *random_model(3, 0))
+    with open(path, 'ab') as f:
+        f.write(b"\xff" * 1000)
+    reopened = ModelBank(path)
+    assert reopened.speakers == ["speaker0"]
+    assert_model_equal(reopened, "speaker0", random_model(3, 0))
+
+
+def test_models_of_another_dimension_are_rejected(tmp_path):
+    path = str(tmp_path / "speakers.bank")
+    bank = ModelBank.create(path, N_FEATURES)
+    weights, means, variances = random_model(2, 0)
+    with pytest.raises(ValueError):
+        bank.put("speaker0", weights, means[:, :-1], variances[:, :-1])
+    with pytest.raises(ValueError):
+        ModelBank.open_or_create(path, N_FEATURES + 1)
@@ -0,0 +1,55 @@
+import os
+import sys
+import warnings
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with warnings.catch_warnings():
+    # pydub, imported by audio_operations, warns when ffmpeg is missing
+    warnings.simplefilter('ignore')
+    import audio_operations
+import noisereduce as nr
+
+
+SR = 8000
+
+
+def noisy_recording(path, seconds, seed=0):
+    """16-bit WAV of an intermittent tone in slowly varying noise; returns the samples as read back."""
+    rng = np.random.RandomState(seed)
+    t = np.arange(int(seconds * SR)) / SR
+    noise = 0.05 * rng.randn(len(t)) * (1 + 0.5 * np.sin(2 * np.pi * t / 7))
+    tone = 0.3 * np.sin(2 * np.pi * 440 * t) * (np.sin(2 * np.pi * t / 1.5) > 0)
+    sf.write(path, np.clip(noise + tone, -1, 1), SR, subtype='PCM_16')
+    return sf.read(path, dtype='float32')[0]
+
+
+def as_pcm16(path, y):
+    sf.write(path, y, SR, subtype='PCM_16')
+    return sf.read(path, dtype='int16')[0].astype(int)
+
+
+def test_stationary_blocks_match_one_pass(tmp_path, monkeypatch):
+    # Blocks with a short context and statistics in small batches: only a threshold
+    # streamed over the whole file gives the one-pass output
+    monkeypatch.setattr(audio_operations, 'NOISE_CONTEXT_SECONDS', 1)
+    monkeypatch.setattr(audio_operations, 'NOISE_STATS_FRAMES', 100)
+    y = noisy_recording(str(tmp_path / "in.wav"), 40)
+    audio_operations.reduce_noise_stream(str(tmp_path / "in.wav"), str(tmp_path / "out.wav"),
+                                         block_seconds=6, stationary=True)
+    blocked = sf.read(str(tmp_path / "out.wav"), dtype='int16')[0].astype(int)
+    expected = as_pcm16(str(tmp_path / "ref.wav"),
+                        nr.reduce_noise(y=y, sr=SR, stationary=True, chunk_size=None))
+    assert len(blocked) == len(expected)
+    assert np.abs(blocked - expected).max() <= 1
+
+
+def test_non_stationary_blocks_stay_close_to_one_pass(tmp_path):
+    y = noisy_recording(str(tmp_path / "in.wav"), 30, seed=1)
+    audio_operations.reduce_noise_stream(str(tmp_path / "in.wav"), str(tmp_path / "out.wav"), block_seconds=8)
+    blocked = sf.read(str(tmp_path / "out.wav"), dtype='int16')[0].astype(int)
+    expected = as_pcm16(str(tmp_path / "ref.wav"), nr.reduce_noise(y=y, sr=SR, chunk_size=None))
+    assert len(blocked) == len(expected)
+    assert np.abs(blocked - expected).max() <= 64
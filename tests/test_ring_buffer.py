@@ -0,0 +1,43 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ring_buffer import AudioRingBuffer
+
+
+def test_reads_return_every_sample_in_order_across_wraps():
+    ring = AudioRingBuffer(10)
+    signal = np.arange(100, dtype=np.float32)
+    received = []
+    for start in range(0, 100, 7):
+        ring.write(signal[start:start + 7])
+        received.append(ring.read().copy())
+    np.testing.assert_array_equal(np.concatenate(received), signal)
+    assert ring.overruns == 0 and ring.available() == 0
+
+
+def test_latest_is_a_contiguous_view_of_the_newest_samples():
+    ring = AudioRingBuffer(8)
+    ring.write(np.arange(13, dtype=np.float32))
+    ring.read()
+    window = ring.latest(8)
+    np.testing.assert_array_equal(window, np.arange(5, 13))
+    assert np.shares_memory(window, ring.data)
+
+
+def test_positions_before_the_stream_read_as_zeros():
+    ring = AudioRingBuffer(8)
+    ring.write(np.array([1, 2, 3], dtype=np.float32))
+    ring.read()
+    np.testing.assert_array_equal(ring.latest(5), [0, 0, 1, 2, 3])
+
+
+def test_overrun_keeps_the_newest_samples_and_counts_the_lost_ones():
+    ring = AudioRingBuffer(8)
+    ring.write(np.arange(5, dtype=np.float32))
+    ring.write(np.arange(5, 20, dtype=np.float32))
+    np.testing.assert_array_equal(ring.read(), np.arange(12, 20))
+    assert ring.overruns == 1
+    assert ring.overrun_samples == 12
@@ -0,0 +1,58 @@
+import os
+import sys
+import warnings
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with warnings.catch_warnings():
+    # pydub warns when ffmpeg is missing; segments built from raw samples do not need it
+    warnings.simplefilter('ignore')
+    from pydub import AudioSegment
+    from pydub.silence import detect_nonsilent, detect_silence
+
+from silence import detect_nonsilent_array, detect_silence_array, join_ranges
+
+
+def bursts(sr, channels, seed=0):
+    """16-bit audio alternating silence and noise bursts of random lengths."""
+    rng = np.random.RandomState(seed)
+    pieces = []
+    for i in range(12):
+        n = rng.randint(sr // 20, sr // 2)
+        level = 3 if i % 2 == 0 else 8000
+        pieces.append(rng.randint(-level, level + 1, size=(n, channels)))
+    return np.concatenate(pieces).astype(np.int16)
+
+
+def segment(samples, sr):
+    return AudioSegment(samples.tobytes(), frame_rate=sr, sample_width=2, channels=samples.shape[1])
+
+
+@pytest.mark.parametrize("sr, channels, seek_step", [(16000, 1, 1), (22050, 2, 1), (8000, 1, 7)])
+def test_ranges_match_pydub(sr, channels, seek_step):
+    samples = bursts(sr, channels)
+    audio = segment(samples, sr)
+    for min_silence_len, silence_thresh in [(100, -40), (250, -60)]:
+        args = (min_silence_len, silence_thresh, seek_step)
+        assert detect_silence_array(samples, sr, *args) == detect_silence(audio, *args)
+        assert detect_nonsilent_array(samples, sr, *args) == detect_nonsilent(audio, *args)
+
+
+def test_float_samples_are_measured_on_the_16_bit_scale():
+    sr = 16000
+    samples = bursts(sr, 1, seed=1)
+    as_float = samples[:, 0] / 32767.0
+    assert detect_silence_array(as_float, sr, 100, -40) == detect_silence(segment(samples, sr), 100, -40)
+
+
+def test_joined_ranges_match_concatenated_segments():
+    sr = 22050
+    samples = bursts(sr, 2, seed=2)
+    audio = segment(samples, sr)
+    # The last range runs past the end, which pydub pads with zeros
+    ranges = [[0, 120], [300, 451], [len(audio) - 40, len(audio) + 25]]
+    expected = sum((audio[start:end] for start, end in ranges), AudioSegment.empty())
+    joined = join_ranges(samples, ranges, sr)
+    assert joined.tobytes() == expected.raw_data
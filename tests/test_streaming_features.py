@@ -0,0 +1,62 @@
+import os
+import sys
+import numpy as np
+import librosa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_frontend import AudioFrontEnd
+from streaming_features import StreamingMFCC
+
+
+SR = 16000
+STEP = 1600
+
+
+def tone(seconds, seed=0):
+    """Amplitude-modulated tone whose quiet dips fall under the top_db floor.
+
+    It is loudest in the first pushed block, so the floor is final from the first frames on.
+    """
+    t = np.arange(int(seconds * SR)) / SR
+    envelope = 0.8 * np.abs(np.sin(2 * np.pi * 1.5 * t)) ** 4
+    envelope[:STEP] = 1.0
+    return 0.3 * np.sin(2 * np.pi * 220 * t) * envelope + 1e-6 * np.random.RandomState(seed).randn(len(t))
+
+
+def stream(frontend, y, window_seconds=3):
+    extractor = StreamingMFCC(frontend, window_seconds=window_seconds)
+    new_frames = []
+    for start in range(0, len(y), STEP):
+        extractor.push(y[start:start + STEP])
+        frames = extractor.new_frames()
+        if frames is not None:
+            new_frames.append(frames)
+    return extractor, np.vstack(new_frames)
+
+
+def test_window_features_match_librosa():
+    y = tone(2)
+    frontend = AudioFrontEnd(SR, n_fft=400, hop_length=160, n_mfcc=13, use_dmfcc=True, use_ddmfcc=True)
+    features = stream(frontend, y)[0].features()
+    mfcc = librosa.feature.mfcc(y=y, sr=SR, n_mfcc=13, n_fft=400, hop_length=160)[:, :len(features)]
+    expected = np.vstack([mfcc, librosa.feature.delta(mfcc), librosa.feature.delta(mfcc, order=2)]).T
+    np.testing.assert_allclose(features, expected, atol=1e-9)
+
+
+def test_new_frames_match_whole_signal_features():
+    y = tone(2)
+    frontend = AudioFrontEnd(SR, n_fft=400, hop_length=160, n_mfcc=13, use_dmfcc=True, use_ddmfcc=True)
+    frames = stream(frontend, y)[1]
+    np.testing.assert_allclose(frames, frontend.features(y)[:len(frames)], atol=1e-9)
+
+
+def test_new_frames_cover_a_stream_longer_than_the_window():
+    y = tone(5)
+    frontend = AudioFrontEnd(SR, n_fft=400, hop_length=160, n_mfcc=13, use_dmfcc=True, top_db=None)
+    frames = stream(frontend, y)[1]
+    expected = frontend.features(y)
+    # Every frame with its full delta context is handed out once, across several windows
+    n_frames = (len(y) - frontend.n_fft // 2) // frontend.hop_length + 1
+    assert len(frames) == n_frames - frontend.delta_width // 2
+    np.testing.assert_allclose(frames, expected[:len(frames)], atol=1e-9)
@@ -0,0 +1,46 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_frontend import AudioFrontEnd
+from vad import StreamingVAD
+
+
+SR = 16000
+FRAME = 400
+HOP = 160
+
+
+def classify_stream(y):
+    """Speech mask of a signal fed to the VAD 100 ms at a time, as in the real-time tab."""
+    vad = StreamingVAD(AudioFrontEnd(SR, n_fft=FRAME, hop_length=HOP))
+    frames = np.lib.stride_tricks.sliding_window_view(y, FRAME)[::HOP]
+    return np.concatenate([vad.classify(np.ascontiguousarray(frames[i:i + 10]))[0]
+                           for i in range(0, len(frames), 10)])
+
+
+def white_noise(seconds, level_db, seed=0):
+    rng = np.random.RandomState(seed)
+    return (rng.randn(int(seconds * SR)) * 10 ** (level_db / 20)).astype(np.float32)
+
+
+def test_noise_is_not_speech():
+    assert classify_stream(white_noise(10, -50)).mean() < 0.05
+
+
+def test_leading_digital_silence_does_not_lock_the_floor():
+    # Many devices deliver zeros first; the floor must not stay pinned below the real noise
+    y = np.concatenate([np.zeros(int(0.3 * SR), dtype=np.float32), white_noise(10, -50)])
+    speech = classify_stream(y)
+    assert speech[30:].mean() < 0.05
+    assert not speech[-200:].any()
+
+
+def test_voiced_signal_is_speech():
+    t = np.arange(5 * SR) / SR
+    voice = sum(np.sin(2 * np.pi * 150 * h * t) / h for h in range(1, 11))
+    y = (0.2 * voice).astype(np.float32) + white_noise(5, -50)
+    y[:SR] = white_noise(1, -50, seed=1)
+    assert classify_stream(y)[150:].mean() > 0.95
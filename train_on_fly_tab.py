@@ -11,6 +11,10 @@ import threading
 import time
 from sklearn.mixture import GaussianMixture
 import pickle
+from enrollment import extract_features, feature_cache, feature_config
+from model_store import BANK_FILENAME, ModelBank
+from speaker_index import INDEX_FILENAME, build_speaker_index
+from ubm import UBM_FILENAME, find_ubm, map_adapt
 
 
 class TrainOnFlyTab(ttk.Frame):
@@ -26,6 +30,10 @@ class TrainOnFlyTab(ttk.Frame):
         self.normalize_audio = tk.BooleanVar(value=True)
         self.enroll_speaker = tk.BooleanVar()
         self.models_path = tk.StringVar(value="Speaker Models")
+        self.use_feature_cache = tk.BooleanVar(value=False)
+        self.use_model_bank = tk.BooleanVar(value=False)
+        self.feature_cache_path = tk.StringVar(value="Feature Cache")
+        self.use_ubm = tk.BooleanVar(value=False)
         
         self.is_recording = False
         self.processing = False
@@ -99,6 +107,7 @@ class TrainOnFlyTab(ttk.Frame):
         ttk.Label(self.models_dir_frame, text="Models Directory:").pack(side='left', padx=5)
         ttk.Entry(self.models_dir_frame, textvariable=self.models_path).pack(side='left', padx=5, expand=True, fill='x')
         ttk.Button(self.models_dir_frame, text="Browse", command=self.browse_models_dir).pack(side='left', padx=5)
+        ttk.Checkbutton(self.models_dir_frame, text="Model Bank", variable=self.use_model_bank).pack(side='left', padx=5)
         
         
         self.mfcc_frame = ttk.Frame(enroll_frame)
@@ -112,6 +121,8 @@ class TrainOnFlyTab(ttk.Frame):
         
         ttk.Checkbutton(self.mfcc_frame, text="Use DMFCC", variable=self.use_dmfcc).pack(side='left', padx=5)
         ttk.Checkbutton(self.mfcc_frame, text="Use DDMFCC", variable=self.use_ddmfcc).pack(side='left', padx=5)
+        ttk.Checkbutton(self.mfcc_frame, text="Use Feature Cache", variable=self.use_feature_cache).pack(side='left', padx=5)
+        ttk.Checkbutton(self.mfcc_frame, text="Adapt from UBM", variable=self.use_ubm).pack(side='left', padx=5)
         
         self.enroll_speaker.trace('w', self.toggle_enrollment_options)
         
@@ -243,34 +254,6 @@ class TrainOnFlyTab(ttk.Frame):
         if directory:
             self.models_path.set(directory)
     
-    def extract_features(self, audio_path, n_mfcc=22, use_dmfcc=False, use_ddmfcc=False):
-        """Extract MFCC features from an audio file."""
-        try:
-            
-            y, sr = librosa.load(audio_path, sr=None)
-            
-            
-            mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
-            features = [mfccs]
-            
-            if use_dmfcc:
-                
-                dmfcc = librosa.feature.delta(mfccs)
-                features.append(dmfcc)
-                
-            if use_ddmfcc:
-                
-                ddmfcc = librosa.feature.delta(mfccs, order=2)
-                features.append(ddmfcc)
-            
-            
-            combined_features = np.vstack(features)
-            
-            return combined_features.T
-            
-        except Exception as e:
-            raise Exception(f"Error processing {audio_path}: {str(e)}")
-    
     def train_gmm(self, features, covariance_type='diag'):
         """Train a GMM model on the extracted features."""
         gmm = GaussianMixture(n_components=self.n_components.get(), covariance_type=covariance_type, random_state=42)
@@ -288,27 +271,55 @@ class TrainOnFlyTab(ttk.Frame):
             audio_files = [f for f in os.listdir(speaker_dir) 
                          if f.lower().endswith(('.wav', '.mp3', '.flac'))]
             
+            cache = feature_cache(self.feature_cache_path.get()) if self.use_feature_cache.get() else None
+            
             all_features = []
             for audio_file in audio_files:
                 file_path = os.path.join(speaker_dir, audio_file)
-                features = self.extract_features(file_path, n_mfcc, use_dmfcc, use_ddmfcc)
+                features = extract_features(file_path, n_mfcc, use_dmfcc, use_ddmfcc, cache=cache)
                 all_features.append(features)
             
             if all_features:
                 
-                combined_features = np.vstack(all_features)
+                combined_features = np.vstack(all_features).astype(np.float64)
                 
+                models_dir = self.models_path.get()
                 
-                gmm = self.train_gmm(combined_features)
+                if self.use_ubm.get():
+                    # Closed-form MAP adaptation of the background model trained at enrollment
+                    ubm = find_ubm(models_dir)
+                    if ubm is None:
+                        raise Exception(f"No background model ({UBM_FILENAME}) found in {models_dir}")
+                    if ubm.means_.shape[1] != combined_features.shape[1]:
+                        raise Exception(f"Background model expects {ubm.means_.shape[1]} features, "
+                                        f"got {combined_features.shape[1]}")
+                    gmm = map_adapt(ubm, combined_features)
+                else:
+                    gmm = self.train_gmm(combined_features)
                 
                 
-                models_dir = self.models_path.get()
                 os.makedirs(models_dir, exist_ok=True)
                 
                 
-                model_path = os.path.join(models_dir, f"{self.speaker_name.get()}.gmm")
-                with open(model_path, 'wb') as f:
-                    pickle.dump(gmm, f)
+                if self.use_model_bank.get():
+                    params = {'n_mfcc': n_mfcc, 'use_dmfcc': use_dmfcc, 'use_ddmfcc': use_ddmfcc}
+                    bank = ModelBank.open_or_create(os.path.join(models_dir, BANK_FILENAME),
+                                                    gmm.means_.shape[1], feature_config(params))
+                    bank.put_model(self.speaker_name.get(), gmm)
+                else:
+                    model_path = os.path.join(models_dir, f"{self.speaker_name.get()}.gmm")
+                    with open(model_path, 'wb') as f:
+                        pickle.dump(gmm, f)
+                    # A bank entry of the same speaker would shadow the new file
+                    bank_path = os.path.join(models_dir, BANK_FILENAME)
+                    if os.path.exists(bank_path):
+                        bank = ModelBank(bank_path)
+                        if self.speaker_name.get() in bank:
+                            bank.remove(self.speaker_name.get())
+                
+                # Keep an existing speaker search index in step with the new model
+                if os.path.exists(os.path.join(models_dir, INDEX_FILENAME)):
+                    build_speaker_index(models_dir, [self.speaker_name.get()])
             else:
                 raise Exception("No valid audio segments found")
             
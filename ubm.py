@@ -0,0 +1,149 @@
+import os
+import copy
+import json
+import numpy as np
+from sklearn.mixture import GaussianMixture
+from gmm_scoring import GMMScorer, LOG_2PI
+
+
+UBM_FILENAME = "ubm.npz"
+
+
+def train_ubm(features, n_components=64, max_frames=200000, random_state=42):
+    """Fit a diagonal Universal Background Model on pooled features of many speakers."""
+    if len(features) > max_frames:
+        rng = np.random.RandomState(random_state)
+        features = features[rng.choice(len(features), max_frames, replace=False)]
+    ubm = GaussianMixture(n_components=n_components, covariance_type='diag', random_state=random_state)
+    ubm.fit(features)
+    return ubm
+
+
+def map_adapt(ubm, features, relevance_factor=16.0):
+    """Speaker GMM by MAP adaptation of the UBM means (Reynolds et al., 2000).
+
+    A single closed-form pass over the speaker's frames: components that see
+    many frames move towards the speaker's data, the rest stay at the UBM.
+    Weights and covariances are shared with the UBM.
+    """
+    responsibilities = ubm.predict_proba(features)
+    counts = responsibilities.sum(axis=0)
+    first_order = responsibilities.T @ features
+    expected = first_order / np.maximum(counts, 1e-10)[:, np.newaxis]
+    alpha = (counts / (counts + relevance_factor))[:, np.newaxis]
+
+    gmm = copy.deepcopy(ubm)
+    gmm.means_ = alpha * expected + (1 - alpha) * ubm.means_
+    return gmm
+
+
+def save_ubm(ubm, path, feature_config=None):
+    np.savez(path, weights=ubm.weights_, means=ubm.means_, covariances=ubm.covariances_,
+             feature_config=json.dumps(feature_config or {}))
+
+
+def load_ubm(path):
+    """Rebuild a fitted diagonal GaussianMixture saved with ``save_ubm``."""
+    with np.load(path) as data:
+        ubm = GaussianMixture(n_components=len(data['weights']), covariance_type='diag')
+        ubm.weights_ = data['weights']
+        ubm.means_ = data['means']
+        ubm.covariances_ = data['covariances']
+        ubm.feature_config = json.loads(str(data['feature_config']))
+    ubm.precisions_cholesky_ = 1.0 / np.sqrt(ubm.covariances_)
+    ubm.precisions_ = 1.0 / ubm.covariances_
+    ubm.converged_ = True
+    ubm.n_iter_ = 0
+    ubm.lower_bound_ = -np.inf
+    return ubm
+
+
+def find_ubm(models_dir):
+    """The UBM saved in a models directory, or None."""
+    path = os.path.join(str(models_dir), UBM_FILENAME)
+    return load_ubm(path) if os.path.exists(path) else None
+
+
+class UBMScorer(GMMScorer):
+    """Top-C scoring of MAP-adapted speaker models against their UBM.
+
+    For every frame only the ``top_c`` best-scoring UBM components are
+    evaluated for each speaker, which is accurate because adaptation keeps
+    speakers close to the UBM. Speakers whose weights/covariances differ from
+    the UBM (i.e. not adapted from it) are scored exhaustively.
+    """
+
+    def __init__(self, ubm, top_c=5):
+        self.ubm = ubm
+        self.top_c = min(top_c, ubm.n_components)
+        self.others = GMMScorer()
+        super().__init__()
+
+    def _empty(self):
+        return UBMScorer(self.ubm, self.top_c)
+
+    def _is_adapted(self, weights, variances):
+        return (weights.shape == self.ubm.weights_.shape
+                and np.allclose(weights, self.ubm.weights_, rtol=1e-4, atol=1e-7)
+                and np.allclose(variances, self.ubm.covariances_, rtol=1e-4, atol=1e-7))
+
+    def build(self):
+        self.others = GMMScorer()
+        adapted, adapted_index, other_index = [], [], []
+        for i, params in enumerate(self._params):
+            if params is None:
+                self.others.add_model(self.speakers[i], self.fallback_models[self.speakers[i]])
+                other_index.append(i)
+            elif self._is_adapted(params[0], params[2]):
+                adapted.append(np.asarray(params[1], dtype=np.float64))
+                adapted_index.append(i)
+            else:
+                self.others.add_params(self.speakers[i], *params)
+                other_index.append(i)
+        self.others.build()
+        self._adapted_index = np.array(adapted_index, dtype=int)
+        self._other_index = np.array(other_index, dtype=int)
+
+        ubm = self.ubm
+        self.n_features = ubm.means_.shape[1]
+        self.ubm_precisions = 1.0 / ubm.covariances_
+        self.ubm_offsets = (np.log(ubm.weights_)
+                            - 0.5 * (self.n_features * LOG_2PI + np.sum(np.log(ubm.covariances_), axis=1)))
+        if adapted:
+            means = np.stack(adapted)  # (speakers, components, features)
+            # Per component: (features, speakers) matrix of precision-scaled means
+            self.scaled_means = np.ascontiguousarray((means * self.ubm_precisions).transpose(1, 2, 0))
+            self.mean_terms = np.sum(means ** 2 * self.ubm_precisions, axis=2).T  # (components, speakers)
+        else:
+            self.scaled_means = None
+
+    def top_components(self, X):
+        """Indices of the ``top_c`` best UBM components per frame, shape (n_frames, top_c)."""
+        log_prob = (X @ (self.ubm.means_ * self.ubm_precisions).T
+                    - 0.5 * ((X * X) @ self.ubm_precisions.T)
+                    - 0.5 * np.sum(self.ubm.means_ ** 2 * self.ubm_precisions, axis=1)
+                    + self.ubm_offsets)
+        return np.argpartition(-log_prob, self.top_c - 1, axis=1)[:, :self.top_c]
+
+    def frame_scores(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        n_frames = X.shape[0]
+        scores = np.empty((n_frames, len(self.speakers)))
+
+        if self.scaled_means is not None:
+            top = self.top_components(X)
+            n_speakers = self.scaled_means.shape[2]
+            log_prob = np.empty((n_frames, self.top_c, n_speakers))
+            shared = -0.5 * ((X * X) @ self.ubm_precisions.T) + self.ubm_offsets  # (frames, components)
+            for k in np.unique(top):
+                rows, slots = np.nonzero(top == k)
+                log_prob[rows, slots] = (X[rows] @ self.scaled_means[k]
+                                         - 0.5 * self.mean_terms[k]
+                                         + shared[rows, k][:, np.newaxis])
+            peak = log_prob.max(axis=1, keepdims=True)
+            scores[:, self._adapted_index] = (peak[:, 0]
+                                              + np.log(np.exp(log_prob - peak).sum(axis=1)))
+
+        if len(self._other_index):
+            scores[:, self._other_index] = self.others.frame_scores(X)
+        return scores
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+class StreamingVAD:
+    """Frame-level voice activity detector for a stream of time-domain frames.
+
+    A frame is speech when its energy is ``margin_db`` above a running noise
+    floor and its spectrum is peaky (spectral flatness below
+    ``flatness_threshold``, as voiced speech is and broadband noise is not),
+    or when it is ``loud_margin_db`` above the floor regardless of its
+    flatness (fricatives, plosives). Energy is a dot product per frame; the
+    power spectrum needed for the flatness is only computed when some frame
+    is loud enough to be a candidate, and handed back for reuse. Speech
+    decisions are held for ``hangover_frames`` so word endings and short
+    pauses are not cut. The noise floor follows non-speech frames upwards
+    slowly and drops immediately to any quieter frame, but never below
+    ``floor_db``, so the digital zeros many devices deliver first cannot
+    pin it down. Speech frames raise it too, ``speech_adaptation_rate``
+    times more slowly, so a floor that is too low still recovers when
+    everything looks like speech.
+    """
+
+    def __init__(self, frontend, margin_db=6.0, loud_margin_db=20.0, flatness_threshold=0.4,
+                 floor_db=-70.0, hangover_frames=15, init_frames=10, adaptation_rate=0.02,
+                 speech_adaptation_rate=0.002):
+        self.frontend = frontend
+        self.margin_db = margin_db
+        self.loud_margin_db = loud_margin_db
+        self.flatness_threshold = flatness_threshold
+        self.floor_db = floor_db
+        self.hangover_frames = hangover_frames
+        self.init_frames = init_frames
+        self.adaptation_rate = adaptation_rate
+        self.speech_adaptation_rate = speech_adaptation_rate
+        self.reset()
+
+    def reset(self):
+        self.noise_db = None
+        self.noise_frames = 0
+        self.hangover = 0
+
+    @staticmethod
+    def energy_db(frames):
+        """Mean-square level of each frame in dB relative to full scale."""
+        return 10.0 * np.log10(np.maximum(np.einsum('ij,ij->i', frames, frames) / frames.shape[1], 1e-12))
+
+    @staticmethod
+    def flatness(power):
+        """Spectral flatness (geometric over arithmetic mean, DC excluded) of each power frame."""
+        power = np.maximum(power[:, 1:], 1e-20)
+        return np.exp(np.log(power).mean(axis=1)) / power.mean(axis=1)
+
+    def _update_floor(self, energy_db, speech):
+        energy_db = np.maximum(energy_db, self.floor_db)
+        for value, is_speech in zip(energy_db, speech):
+            if self.noise_db is None or value < self.noise_db:
+                self.noise_db = value
+            else:
+                rate = self.speech_adaptation_rate if is_speech else self.adaptation_rate
+                self.noise_db += rate * (value - self.noise_db)
+        self.noise_frames += int(np.count_nonzero(~speech))
+
+    def classify(self, frames):
+        """Speech mask of a (n_frames, n_fft) block and its power spectra (None if not computed)."""
+        energy_db = self.energy_db(frames)
+        speech = np.zeros(len(frames), dtype=bool)
+        power = None
+        if self.noise_frames >= self.init_frames:
+            above = energy_db - self.noise_db
+            candidates = (above > self.margin_db) & (energy_db > self.floor_db)
+            if candidates.any():
+                power = self.frontend.power_frames(frames)
+                speech = candidates & ((above > self.loud_margin_db)
+                                       | (self.flatness(power) < self.flatness_threshold))
+
+        # Hangover: keep speech on for a few frames after the last detected one
+        held = np.zeros(len(frames), dtype=bool)
+        hangover = self.hangover
+        for i, is_speech in enumerate(speech):
+            if is_speech:
+                hangover = self.hangover_frames
+            elif hangover > 0:
+                held[i] = True
+                hangover -= 1
+        self.hangover = hangover
+
+        speech |= held
+        self._update_floor(energy_db, speech)
+        return speech, power